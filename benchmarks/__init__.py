@@ -0,0 +1 @@
+"""Benchmarks for NFQWS HA."""
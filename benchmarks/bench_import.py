@@ -0,0 +1,109 @@
+"""Import-time budget check for NFQWS HA.
+
+Imports the integration the way Home Assistant does at startup, each run in a
+fresh interpreter, and fails if it takes longer than the budget or pulls in an
+SSH backend before the first connection. Run from the repository root:
+
+    python -m benchmarks.bench_import --runs 5 --budget-ms 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Модули, которые HA загружает сам еще до интеграции, в замер не входят
+_PRELOAD = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.components.sensor",
+    "homeassistant.components.button",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+
+# Что HA импортирует при настройке записи: сам пакет, платформы и мастер настройки
+_INTEGRATION = (
+    "custom_components.nfqws",
+    "custom_components.nfqws.sensor",
+    "custom_components.nfqws.button",
+    "custom_components.nfqws.config_flow",
+    "custom_components.nfqws.diagnostics",
+)
+
+# Тяжелые зависимости, которые интеграция не должна подгружать до первого подключения
+# (cryptography HA может загрузить и сам — тогда она не считается)
+HEAVY_MODULES = ("paramiko", "asyncssh", "cryptography", "bcrypt", "nacl")
+
+_CHILD = """
+import importlib, json, sys, time
+for name in {preload!r}:
+    importlib.import_module(name)
+preloaded = set(sys.modules)
+started = time.perf_counter()
+for name in {integration!r}:
+    importlib.import_module(name)
+integration = time.perf_counter() - started
+heavy = sorted(name for name in {heavy!r} if name in set(sys.modules) - preloaded)
+from custom_components.nfqws.transport import load_transport
+backends = {{}}
+for backend in {backends!r}:
+    started = time.perf_counter()
+    load_transport(backend)
+    backends[backend] = time.perf_counter() - started
+print(json.dumps({{"integration": integration, "heavy": heavy, "backends": backends}}))
+"""
+
+def _run_once(backends: tuple[str, ...]) -> dict:
+    """Measure one cold import in a fresh interpreter."""
+    code = _CHILD.format(
+        preload=_PRELOAD, integration=_INTEGRATION, heavy=HEAVY_MODULES, backends=backends
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def _parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="maximum median import time of the integration")
+    parser.add_argument("--backends", default="paramiko,asyncssh",
+                        help="backends whose deferred import time is reported")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    return parser.parse_args()
+
+def main() -> int:
+    """Entry point; returns a non-zero exit status if the budget is exceeded."""
+    args = _parse_args()
+    backends = tuple(filter(None, args.backends.split(",")))
+    runs = [_run_once(backends) for _ in range(args.runs)]
+    integration_ms = statistics.median(run["integration"] for run in runs) * 1000
+    heavy = sorted({name for run in runs for name in run["heavy"]})
+    backend_ms = {
+        backend: statistics.median(run["backends"][backend] for run in runs) * 1000
+        for backend in backends
+    }
+
+    print(f"integration import: {integration_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for backend, value in backend_ms.items():
+        print(f"  {backend} on first connect: {value:8.1f} ms")
+    if heavy:
+        print(f"loaded before first connect: {', '.join(heavy)}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                {"integration_ms": integration_ms, "backend_ms": backend_ms, "heavy": heavy},
+                file, indent=2,
+            )
+    ok = integration_ms <= args.budget_ms and not heavy
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""Poll and command benchmarks for NFQWS HA against simulated routers.
+
+Run from the repository root in an environment with Home Assistant and the
+integration requirements installed:
+
+    python -m benchmarks.bench_ssh --routers 1,10,100,500 --duration 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from custom_components.nfqws.const import (
+    CMD_PROCESS_STATS_TEMPLATE,
+    CMD_QUEUE_STATS,
+    CMD_RESTART_KEENETIC_V2,
+    CMD_STATUS_KEENETIC_V2,
+    CONF_SCAN_INTERVAL,
+    CONF_SSH_BACKEND,
+    CONF_SSH_PORT,
+    CONF_STATUS_MONITORING,
+    DEFAULT_SSH_BACKEND,
+    DOMAIN,
+    FLEET_MAX_CONCURRENT_POLLS,
+    LATENCY_PHASES,
+    PROCESS_NFQWS_V2,
+    SSH_BACKEND_ASYNCSSH,
+    SSH_BACKEND_PARAMIKO,
+)
+from custom_components.nfqws.coordinator import NFQWSDataUpdateCoordinator
+from custom_components.nfqws.package_cache import NFQWSPackageCache
+from custom_components.nfqws.state_cache import NFQWSStateCache
+from custom_components.nfqws.scheduler import NFQWSFleetScheduler
+from custom_components.nfqws.ssh_helper import SSHConnectionPool, SSHHelper
+from custom_components.nfqws.stats import percentile
+
+from .fake_router import PASSWORD, FakeRouterConfig, FakeRouterFleet
+
+USERNAME = "root"
+
+# Независимые пробы опроса для сравнения пакета и параллельных каналов
+PROBES = {
+    "status": CMD_STATUS_KEENETIC_V2,
+    "process": CMD_PROCESS_STATS_TEMPLATE.format(process=PROCESS_NFQWS_V2),
+    "queue": CMD_QUEUE_STATS,
+}
+
+@dataclass
+class BenchResult:
+    """Outcome of one benchmark run."""
+
+    target: str
+    workload: str
+    routers: int
+    operations: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    connects: int = 0
+    warm_up: float | None = None
+    latency: dict[str, float] = field(default_factory=dict)
+    phases: dict[str, dict[str, float] | None] = field(default_factory=dict)
+
+    @property
+    def rate(self) -> float:
+        """Return successful operations per second."""
+        return self.operations / self.elapsed if self.elapsed else 0.0
+
+def _summarize(samples: list[float]) -> dict[str, float]:
+    """Return p50/p95/p99 in milliseconds."""
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    return {
+        f"p{pct}": round(percentile(samples, pct) * 1000, 1) for pct in (50, 95, 99)
+    }
+
+def _collect_phases(helpers: list[SSHHelper]) -> dict[str, dict[str, float] | None]:
+    """Merge per-router phase samples into fleet-wide percentiles."""
+    return {
+        phase: _summarize([s for helper in helpers for s in helper.stats.samples(phase)]) or None
+        for phase in LATENCY_PHASES
+    }
+
+def _acquire_helpers(pool: SSHConnectionPool, fleet: FakeRouterFleet, backend: str) -> list[SSHHelper]:
+    """Return one pooled helper per simulated router."""
+    return [
+        pool.acquire("127.0.0.1", router.port, USERNAME, PASSWORD, backend)
+        for router in fleet.routers
+    ]
+
+async def async_bench_helper(fleet: FakeRouterFleet, args: argparse.Namespace) -> BenchResult:
+    """Drive SSHHelper directly, back to back, with bounded concurrency."""
+    result = BenchResult("helper", args.workload, fleet.count)
+    pool = SSHConnectionPool()
+    helpers = _acquire_helpers(pool, fleet, args.backend)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    connects = fleet.connects
+    started = time.monotonic()
+    deadline = started + args.duration
+
+    async def _async_one(helper: SSHHelper) -> bool:
+        if not await helper.async_connect():
+            return False
+        if args.workload == "command":
+            return (await helper.async_run_command(CMD_RESTART_KEENETIC_V2)).exit_status is not None
+        if args.workload == "batch":
+            results = await helper.async_execute_batch(PROBES)
+        elif args.workload == "parallel":
+            results = await helper.async_execute_parallel(PROBES)
+        else:
+            results = await helper.async_execute_batch({"status": CMD_STATUS_KEENETIC_V2})
+        return all(result.exit_status is not None for result in results.values())
+
+    async def _async_loop(helper: SSHHelper) -> None:
+        while time.monotonic() < deadline:
+            async with semaphore:
+                op_started = time.monotonic()
+                ok = await _async_one(helper)
+            if ok:
+                result.operations += 1
+                latencies.append(time.monotonic() - op_started)
+            else:
+                result.errors += 1
+                # Не крутим пустой цикл, пока circuit breaker открыт
+                await asyncio.sleep(args.error_pause)
+
+    try:
+        await asyncio.gather(*(_async_loop(helper) for helper in helpers))
+        result.elapsed = time.monotonic() - started
+        result.connects = fleet.connects - connects
+        result.latency = _summarize(latencies)
+        result.phases = _collect_phases(helpers)
+    finally:
+        await pool.async_close()
+    return result
+
+async def async_bench_coordinator(fleet: FakeRouterFleet, args: argparse.Namespace) -> BenchResult:
+    """Run real coordinators under the fleet scheduler at the configured interval."""
+    result = BenchResult("coordinator", "poll", fleet.count)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        pool = SSHConnectionPool()
+        scheduler = NFQWSFleetScheduler(
+            hass, max_concurrent=args.concurrency, stagger=args.stagger
+        )
+        package_cache = NFQWSPackageCache(hass)
+        state_cache = NFQWSStateCache(hass)
+        helpers = _acquire_helpers(pool, fleet, args.backend)
+        coordinators = []
+        for router, helper in zip(fleet.routers, helpers):
+            entry = ConfigEntry(
+                version=1,
+                minor_version=1,
+                domain=DOMAIN,
+                title=f"bench {router.port}",
+                data={
+                    CONF_HOST: "127.0.0.1",
+                    CONF_SSH_PORT: router.port,
+                    CONF_USERNAME: USERNAME,
+                    CONF_PASSWORD: PASSWORD,
+                    CONF_SSH_BACKEND: args.backend,
+                    CONF_STATUS_MONITORING: True,
+                    CONF_SCAN_INTERVAL: args.interval,
+                },
+                source="user",
+            )
+            coordinators.append(
+                NFQWSDataUpdateCoordinator(
+                    hass, entry, helper, scheduler, package_cache, state_cache
+                )
+            )
+
+        def _count_update() -> None:
+            result.operations += 1
+
+        try:
+            started = time.monotonic()
+            await asyncio.gather(*(scheduler.async_warm_up(c) for c in coordinators))
+            result.warm_up = round(time.monotonic() - started, 2)
+            for coordinator in coordinators:
+                coordinator.async_add_listener(_count_update)
+            connects = fleet.connects
+            started = time.monotonic()
+            await asyncio.sleep(args.duration)
+            result.elapsed = time.monotonic() - started
+            result.connects = fleet.connects - connects
+            result.errors = sum(
+                1 for c in coordinators if not c.data or not c.data.get("available")
+            )
+            # Полное время опроса каждого роутера, включая ожидание слота
+            result.latency = _summarize(
+                [s for helper in helpers for s in helper.stats.samples("poll")]
+            )
+            result.phases = _collect_phases(helpers)
+        finally:
+            scheduler.async_shutdown()
+            await pool.async_close()
+            await hass.async_stop(force=True)
+    return result
+
+def _print_result(result: BenchResult, phases: bool) -> None:
+    """Print one result row, optionally followed by the phase breakdown."""
+    latency = result.latency
+    print(
+        f"{result.target:<12} {result.workload:<8} {result.routers:>7} {result.operations:>8} "
+        f"{result.rate:>9.1f} {result.errors:>7} {result.connects:>8} "
+        f"{latency.get('p50', 0):>8.1f} {latency.get('p95', 0):>8.1f} {latency.get('p99', 0):>8.1f}"
+        + (f"  warm-up {result.warm_up}s" if result.warm_up is not None else "")
+    )
+    if phases:
+        for phase, values in result.phases.items():
+            if values:
+                print(f"{'':>14}{phase:<14} " + " ".join(f"{k}={v}" for k, v in values.items()))
+
+def _parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routers", default="1,10,100",
+                        help="comma separated fleet sizes (default: %(default)s)")
+    parser.add_argument("--target", choices=("helper", "coordinator", "both"), default="both")
+    parser.add_argument("--workload", choices=("poll", "command", "batch", "parallel"),
+                        default="poll",
+                        help="helper workload: status batch, restart command, or the poll "
+                             "probes in one batch or on parallel channels")
+    parser.add_argument("--backend", choices=(SSH_BACKEND_PARAMIKO, SSH_BACKEND_ASYNCSSH),
+                        default=DEFAULT_SSH_BACKEND)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--interval", type=int, default=5,
+                        help="coordinator scan interval in seconds")
+    parser.add_argument("--concurrency", type=int, default=FLEET_MAX_CONCURRENT_POLLS)
+    parser.add_argument("--stagger", type=float, default=0.0,
+                        help="scheduler warm-up stagger in seconds")
+    parser.add_argument("--handshake-latency", type=float, default=0.0)
+    parser.add_argument("--command-latency", type=float, default=0.0)
+    parser.add_argument("--connect-failure-rate", type=float, default=0.0)
+    parser.add_argument("--command-failure-rate", type=float, default=0.0)
+    parser.add_argument("--error-pause", type=float, default=0.5,
+                        help="pause after a failed helper operation")
+    parser.add_argument("--phases", action="store_true", help="print per-phase latency")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+async def async_main(args: argparse.Namespace) -> list[BenchResult]:
+    """Run every requested benchmark."""
+    config = FakeRouterConfig(
+        handshake_latency=args.handshake_latency,
+        command_latency=args.command_latency,
+        connect_failure_rate=args.connect_failure_rate,
+        command_failure_rate=args.command_failure_rate,
+    )
+    targets = ("helper", "coordinator") if args.target == "both" else (args.target,)
+    results = []
+    print(
+        f"{'target':<12} {'workload':<8} {'routers':>7} {'ops':>8} {'ops/s':>9} "
+        f"{'errors':>7} {'connects':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for count in (int(value) for value in args.routers.split(",")):
+        for target in targets:
+            # Свежий парк на каждый прогон, чтобы счетчики не смешивались
+            with FakeRouterFleet(count, config) as fleet:
+                if target == "helper":
+                    result = await async_bench_helper(fleet, args)
+                else:
+                    result = await async_bench_coordinator(fleet, args)
+            _print_result(result, args.phases)
+            results.append(result)
+    return results
+
+def main() -> None:
+    """Entry point."""
+    args = _parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.ERROR)
+    if not args.verbose:
+        # Серверная сторона paramiko шумит о сброшенных при остановке сессиях
+        logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    results = asyncio.run(async_main(args))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                [{**asdict(result), "rate": round(result.rate, 2)} for result in results],
+                file, indent=2,
+            )
+
+if __name__ == "__main__":
+    main()
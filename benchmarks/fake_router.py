@@ -0,0 +1,356 @@
+"""Local stand-in SSH router for NFQWS HA benchmarks.
+
+Every simulated router listens on its own localhost port, accepts password
+``pw`` for any user and runs exec requests through ``sh`` with the
+Keenetic/OpenWRT service scripts, ``opkg`` and ``pidof`` replaced by stubs
+that keep their state in a per-router directory. The nfqws daemon is a
+shell loop that ignores SIGHUP, so its pid changes on restart. Files
+written over SFTP land in the same stub tree.
+"""
+from __future__ import annotations
+
+import os
+import random
+import selectors
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import paramiko
+
+PASSWORD = "pw"
+NFQWS_VERSION = "2.3.1"
+
+_INIT_SCRIPT = """#!/bin/sh
+case "$1" in
+  status) if [ -f "$NFQWS_STATE/running" ]; then echo "{name} is running"; else echo "{name} is not running"; fi ;;
+  start|restart|reload) nfqws-ctl "$1"; echo "Starting {name}" ;;
+  stop) nfqws-ctl stop; echo "Stopping {name}" ;;
+  *) echo "Usage: $0 {{start|stop|restart|status}}" >&2; exit 1 ;;
+esac
+"""
+
+_SERVICE = """#!/bin/sh
+shift
+case "$1" in
+  status) if [ -f "$NFQWS_STATE/running" ]; then echo "running"; else echo "inactive"; fi ;;
+  start|restart|reload|stop) nfqws-ctl "$1" ;;
+esac
+"""
+
+# Демон-заглушка: настоящий процесс, чтобы менялся pid и работали /proc и kill -HUP
+_DAEMON = """#!/bin/sh
+trap '' HUP
+while :; do sleep 1; done
+"""
+
+_CTL = """#!/bin/sh
+pidfile="$NFQWS_STATE/running"
+start() { [ -f "$pidfile" ] && return; nfqws-stub </dev/null >/dev/null 2>&1 & echo $! > "$pidfile"; }
+stop() { [ -f "$pidfile" ] && kill "$(cat "$pidfile")" 2>/dev/null; rm -f "$pidfile"; }
+case "$1" in
+  start) start ;;
+  stop) stop ;;
+  restart) stop; start ;;
+  reload) [ -f "$pidfile" ] && kill -HUP "$(cat "$pidfile")" ;;
+esac
+"""
+
+_OPKG = """#!/bin/sh
+printf 'Package: %s\\nVersion: {version}\\nDepends: libc, iptables\\nStatus: install user installed\\nArchitecture: mipsel-3.4\\n' "$2"
+"""
+
+_CONTROL = """Package: {package}
+Version: {version}
+Architecture: mipsel-3.4
+"""
+
+_PIDOF = """#!/bin/sh
+if [ -f "$NFQWS_STATE/running" ]; then cat "$NFQWS_STATE/running"; else exit 1; fi
+"""
+
+@dataclass
+class FakeRouterConfig:
+    """Latency and failure injection settings shared by simulated routers."""
+
+    handshake_latency: float = 0.0
+    command_latency: float = 0.0
+    # Доля соединений, сброшенных до рукопожатия
+    connect_failure_rate: float = 0.0
+    # Доля команд, оборванных без кода возврата
+    command_failure_rate: float = 0.0
+    running: bool = True
+    # Entware dropbear часто ставится без sftp-server
+    sftp: bool = True
+
+class _Server(paramiko.ServerInterface):
+    """Accept password auth and exec requests for one connection."""
+
+    def __init__(self, router: FakeRouter) -> None:
+        """Initialize the server interface."""
+        self.router = router
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        """Allow session channels."""
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def get_allowed_auths(self, username: str) -> str:
+        """Offer password authentication only, like Entware dropbear."""
+        return "password"
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        """Accept the benchmark password."""
+        if password == PASSWORD:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        """Run the command in a worker thread."""
+        threading.Thread(
+            target=self.router.run_command,
+            args=(channel, command.decode()),
+            daemon=True,
+        ).start()
+        return True
+
+class _SFTPServer(paramiko.SFTPServerInterface):
+    """Minimal SFTP server that only writes and reads whole files."""
+
+    def __init__(self, server: _Server, router: FakeRouter) -> None:
+        """Initialize the SFTP interface."""
+        super().__init__(server)
+        self.router = router
+
+    def open(self, path: str, flags: int, attr: paramiko.SFTPAttributes) -> object:
+        """Open a file under the stub tree."""
+        try:
+            fd = os.open(self.router.local_path(path), flags, 0o644)
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+        handle = paramiko.SFTPHandle(flags)
+        mode = "wb" if flags & (os.O_WRONLY | os.O_RDWR) else "rb"
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+class FakeRouter:
+    """One simulated router."""
+
+    def __init__(
+        self, root: str, state_dir: str, config: FakeRouterConfig, host_key: paramiko.PKey
+    ) -> None:
+        """Initialize the router and open its listening socket."""
+        self.root = root
+        self.state_dir = state_dir
+        self.config = config
+        self.host_key = host_key
+        self.connects = 0
+        self.commands = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._transports: list[paramiko.Transport] = []
+        os.makedirs(state_dir, exist_ok=True)
+        self._env = {
+            **os.environ,
+            "PATH": f"{root}/bin:{os.environ.get('PATH', '/usr/bin:/bin')}",
+            "NFQWS_STATE": state_dir,
+        }
+        if config.running:
+            subprocess.run(["nfqws-ctl", "start"], env=self._env, check=True)
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(128)
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+
+    @property
+    def is_running(self) -> bool:
+        """Return True if the emulated nfqws daemon is running."""
+        return os.path.exists(os.path.join(self.state_dir, "running"))
+
+    def local_path(self, path: str) -> str:
+        """Map an absolute router path into the stub tree."""
+        return path.replace("/opt/", f"{self.root}/opt/", 1) if path.startswith("/opt/") else path
+
+    def accept(self) -> None:
+        """Accept one pending connection and start its SSH session."""
+        try:
+            client, _ = self.sock.accept()
+        except BlockingIOError:
+            return
+        client.setblocking(True)
+        with self._lock:
+            self.connects += 1
+        if random.random() < self.config.connect_failure_rate:
+            with self._lock:
+                self.dropped += 1
+            client.close()
+            return
+        threading.Thread(target=self._handshake, args=(client,), daemon=True).start()
+
+    def _handshake(self, client: socket.socket) -> None:
+        """Run the server side of the SSH handshake."""
+        if self.config.handshake_latency:
+            time.sleep(self.config.handshake_latency)
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        if self.config.sftp:
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _SFTPServer, self)
+        with self._lock:
+            self._transports.append(transport)
+        try:
+            transport.start_server(server=_Server(self))
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+
+    def run_command(self, channel: paramiko.Channel, command: str) -> None:
+        """Execute a command with the stubbed router environment."""
+        with self._lock:
+            self.commands += 1
+        if self.config.command_latency:
+            time.sleep(self.config.command_latency)
+        # Абсолютные пути роутера перенаправляем в каталог с заглушками
+        command = command.replace("/opt/", f"{self.root}/opt/")
+        process = subprocess.Popen(
+            ["sh", "-c", command],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self._env,
+        )
+
+        def _pump_stderr() -> None:
+            for chunk in iter(lambda: process.stderr.read1(65536), b""):
+                channel.sendall_stderr(chunk)
+
+        def _pump_stdin() -> None:
+            try:
+                for chunk in iter(lambda: channel.recv(65536), b""):
+                    process.stdin.write(chunk)
+                process.stdin.close()
+            except (OSError, ValueError):
+                pass
+
+        pump = threading.Thread(target=_pump_stderr, daemon=True)
+        pump.start()
+        threading.Thread(target=_pump_stdin, daemon=True).start()
+        try:
+            for chunk in iter(lambda: process.stdout.read1(65536), b""):
+                channel.sendall(chunk)
+        except OSError:
+            process.kill()
+        pump.join()
+        status = process.wait()
+        try:
+            if random.random() < self.config.command_failure_rate:
+                # Обрыв канала без кода возврата, как при падении оболочки
+                with self._lock:
+                    self.dropped += 1
+            else:
+                channel.send_exit_status(status)
+            channel.close()
+        except (EOFError, OSError):
+            pass
+
+    def close(self) -> None:
+        """Stop accepting connections, drop open sessions and the daemon stub."""
+        subprocess.run(["nfqws-ctl", "stop"], env=self._env, check=False)
+        self.sock.close()
+        with self._lock:
+            transports, self._transports = self._transports, []
+        for transport in transports:
+            transport.close()
+
+class FakeRouterFleet:
+    """A set of simulated routers served by one accept thread."""
+
+    def __init__(self, count: int, config: FakeRouterConfig | None = None) -> None:
+        """Initialize the fleet."""
+        self.count = count
+        self.config = config or FakeRouterConfig()
+        self.routers: list[FakeRouter] = []
+        self._root = ""
+        self._selector = selectors.DefaultSelector()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def connects(self) -> int:
+        """Return TCP connections accepted by all routers."""
+        return sum(router.connects for router in self.routers)
+
+    @property
+    def commands(self) -> int:
+        """Return exec requests served by all routers."""
+        return sum(router.commands for router in self.routers)
+
+    @property
+    def dropped(self) -> int:
+        """Return connections and commands dropped by failure injection."""
+        return sum(router.dropped for router in self.routers)
+
+    def _write_stubs(self) -> None:
+        """Create the router file system stubs."""
+        scripts = {
+            "opt/etc/init.d/S51nfqws2": _INIT_SCRIPT.format(name="nfqws2"),
+            "opt/etc/init.d/S51nfqws": _INIT_SCRIPT.format(name="nfqws"),
+            "opt/lib/opkg/info/nfqws2.control": _CONTROL.format(package="nfqws2", version=NFQWS_VERSION),
+            "opt/lib/opkg/info/nfqws-keenetic.control": _CONTROL.format(package="nfqws-keenetic", version=NFQWS_VERSION),
+            "bin/service": _SERVICE,
+            "bin/opkg": _OPKG.format(version=NFQWS_VERSION),
+            "bin/pidof": _PIDOF,
+            "bin/nfqws-ctl": _CTL,
+            "bin/nfqws-stub": _DAEMON,
+        }
+        for path, body in scripts.items():
+            full = os.path.join(self._root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "w") as file:
+                file.write(body)
+            os.chmod(full, 0o755)
+
+    def start(self) -> FakeRouterFleet:
+        """Open all router ports and start accepting connections."""
+        self._root = tempfile.mkdtemp(prefix="nfqws_bench_")
+        self._write_stubs()
+        host_key = paramiko.RSAKey.generate(2048)
+        for index in range(self.count):
+            router = FakeRouter(
+                self._root, os.path.join(self._root, "state", str(index)), self.config, host_key
+            )
+            self._selector.register(router.sock, selectors.EVENT_READ, router)
+            self.routers.append(router)
+        self._thread = threading.Thread(target=self._serve, name="fake_router", daemon=True)
+        self._thread.start()
+        return self
+
+    def _serve(self) -> None:
+        """Accept connections for every router until stopped."""
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(timeout=0.2):
+                key.data.accept()
+
+    def stop(self) -> None:
+        """Shut all routers down and remove their files."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for router in self.routers:
+            self._selector.unregister(router.sock)
+            router.close()
+        self._selector.close()
+        shutil.rmtree(self._root, ignore_errors=True)
+
+    def __enter__(self) -> FakeRouterFleet:
+        """Start the fleet."""
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        """Stop the fleet."""
+        self.stop()
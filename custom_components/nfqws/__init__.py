@@ -2,45 +2,148 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
 
-from .const import DOMAIN, CONF_SSH_PORT, DEFAULT_SSH_PORT, CONF_STATUS_MONITORING
+from .const import (
+    DOMAIN,
+    CONF_SSH_PORT,
+    DEFAULT_SSH_PORT,
+    CONF_STATUS_MONITORING,
+    DATA_SSH_POOL,
+    SSH_POOL_EVICT_INTERVAL,
+    CONF_SSH_BACKEND,
+    DEFAULT_SSH_BACKEND,
+    DATA_SCHEDULER,
+    DATA_PACKAGE_CACHE,
+    DATA_STATE_CACHE,
+)
 from .coordinator import NFQWSDataUpdateCoordinator
+from .package_cache import NFQWSPackageCache
+from .scheduler import NFQWSFleetScheduler
+from .services import async_setup_services, async_unload_services
+from .state_cache import NFQWSStateCache
+from .ssh_helper import SSHConnectionPool
 
 _LOGGER = logging.getLogger(__name__)
 
 # Важен порядок: сначала сенсоры, потом кнопки
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON]
 
+@callback
+def _async_get_pool(hass: HomeAssistant) -> SSHConnectionPool:
+    """Return the shared SSH connection pool, creating it on first use."""
+    if DATA_SSH_POOL not in hass.data:
+        pool = SSHConnectionPool()
+
+        async def _async_evict_idle(_now: Any) -> None:
+            await pool.async_evict_idle()
+
+        async def _async_stop(_event: Event) -> None:
+            # При остановке HA записи не выгружаются — соединения и потоки закрываем сами
+            await _async_close_pool(hass)
+
+        cancel_evict = async_track_time_interval(
+            hass, _async_evict_idle, timedelta(seconds=SSH_POOL_EVICT_INTERVAL)
+        )
+        cancel_stop = hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, _async_stop)
+
+        @callback
+        def _async_cancel() -> None:
+            cancel_evict()
+            cancel_stop()
+
+        hass.data[DATA_SSH_POOL] = (pool, _async_cancel)
+    return hass.data[DATA_SSH_POOL][0]
+
+@callback
+def _async_get_scheduler(hass: HomeAssistant) -> NFQWSFleetScheduler:
+    """Return the domain-wide poll scheduler, creating it on first use."""
+    if DATA_SCHEDULER not in hass.data:
+        hass.data[DATA_SCHEDULER] = NFQWSFleetScheduler(hass)
+    return hass.data[DATA_SCHEDULER]
+
+async def _async_get_package_cache(hass: HomeAssistant) -> NFQWSPackageCache:
+    """Return the persistent package metadata cache, loading it on first use."""
+    if DATA_PACKAGE_CACHE not in hass.data:
+        cache = NFQWSPackageCache(hass)
+        await cache.async_load()
+        hass.data.setdefault(DATA_PACKAGE_CACHE, cache)
+    return hass.data[DATA_PACKAGE_CACHE]
+
+async def _async_get_state_cache(hass: HomeAssistant) -> NFQWSStateCache:
+    """Return the persistent last-known state cache, loading it on first use."""
+    if DATA_STATE_CACHE not in hass.data:
+        cache = NFQWSStateCache(hass)
+        await cache.async_load()
+        hass.data.setdefault(DATA_STATE_CACHE, cache)
+    return hass.data[DATA_STATE_CACHE]
+
+async def _async_first_poll(coordinator: NFQWSDataUpdateCoordinator) -> None:
+    """Poll the router for the first time; the scheduler spreads first polls of many entries."""
+    await coordinator.scheduler.async_warm_up(coordinator)
+    # Don't fail setup if connection is temporarily unavailable
+    if not coordinator.data["available"]:
+        _LOGGER.warning(
+            "Initial connection to router failed, but integration will continue trying. "
+            "Check your SSH credentials and network connectivity."
+        )
+
+async def _async_close_pool(hass: HomeAssistant) -> None:
+    """Close the shared SSH connection pool and its threads (last entry gone or HA stopping)."""
+    if DATA_SSH_POOL not in hass.data:
+        return
+    pool, cancel = hass.data.pop(DATA_SSH_POOL)
+    cancel()
+    await pool.async_close()
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up NFQWS HA from a config entry."""
     hass.data.setdefault(DOMAIN, {})
     
-    # Create coordinator
-    coordinator = NFQWSDataUpdateCoordinator(hass, entry)
-    
-    try:
-        # Try to get initial data (including nfqws version)
-        await coordinator.async_refresh()
-        
-        # Don't fail setup if connection is temporarily unavailable
-        if not coordinator.data["available"]:
-            _LOGGER.warning(
-                "Initial connection to router failed, but integration will continue trying. "
-                "Check your SSH credentials and network connectivity."
-            )
-            
-    except Exception as err:
-        _LOGGER.error("Error setting up NFQWS HA integration: %s", err)
-        raise ConfigEntryNotReady from err
+    # Create coordinator on top of the pooled SSH connection
+    pool = _async_get_pool(hass)
+    ssh = pool.acquire(
+        entry.data[CONF_HOST],
+        entry.data.get(CONF_SSH_PORT, DEFAULT_SSH_PORT),
+        entry.data[CONF_USERNAME],
+        entry.data[CONF_PASSWORD],
+        entry.data.get(CONF_SSH_BACKEND, DEFAULT_SSH_BACKEND),
+    )
+    scheduler = _async_get_scheduler(hass)
+    package_cache = await _async_get_package_cache(hass)
+    state_cache = await _async_get_state_cache(hass)
+    # Сущности поднимаются с последним известным состоянием, SSH не задерживает старт HA
+    coordinator = NFQWSDataUpdateCoordinator(
+        hass, entry, ssh, scheduler, package_cache, state_cache
+    )
+    entry.async_create_background_task(
+        hass, _async_first_poll(coordinator), f"{coordinator.name} first poll"
+    )
 
     # Store coordinator
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    async_setup_services(hass)
+
+    if coordinator.push_mode:
+        # Задача отменяется автоматически при выгрузке записи
+        entry.async_create_background_task(
+            hass, coordinator.async_watch(), f"{coordinator.name} watch"
+        )
+    if coordinator.reachability is not None:
+        # Проверки сайтов идут своим, более редким расписанием, чем опрос статуса
+        entry.async_on_unload(coordinator.reachability.async_start())
     
     # Setup platforms (сенсоры будут созданы первыми)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -51,10 +154,23 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok and entry.entry_id in hass.data[DOMAIN]:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator: NFQWSDataUpdateCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_flush_hostlists()
+        coordinator.scheduler.async_unregister(coordinator)
+        if DATA_SSH_POOL in hass.data:
+            # После остановки HA пула уже нет — соединение закрыто вместе с ним
+            await hass.data[DATA_SSH_POOL][0].async_release(coordinator.ssh)
+        if not hass.data[DOMAIN]:
+            hass.data.pop(DATA_SCHEDULER).async_shutdown()
+            async_unload_services(hass)
+            await _async_close_pool(hass)
     
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the saved state of a removed config entry."""
+    (await _async_get_state_cache(hass)).remove(entry.entry_id)
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
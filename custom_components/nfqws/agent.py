@@ -0,0 +1,157 @@
+"""Router-side snapshot agent for NFQWS HA integration."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import posixpath
+import secrets
+import shlex
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    AGENT_FORMAT_VERSION,
+    AGENT_MAX_FAILURES,
+    AGENT_MISMATCH_STATUS,
+    AGENT_MISSING_STATUS,
+    AGENT_NAME_TEMPLATE,
+    AGENT_SCRIPT,
+    AGENT_TIMEOUT,
+    CMD_AGENT_INSTALL_TEMPLATE,
+    CMD_AGENT_RUN_TEMPLATE,
+    CMD_STATE_DIR_PREPARE_TEMPLATE,
+)
+from .ssh_helper import SSHHelper
+from .transport import CommandResult
+
+_LOGGER = logging.getLogger(__name__)
+
+# Ключ снимка -> все его значения в порядке вывода
+AgentSnapshot = dict[str, list[str]]
+
+class AgentError(Exception):
+    """Raised when the agent cannot be installed or its output is unusable."""
+
+def parse_snapshot(output: str) -> AgentSnapshot:
+    """Parse agent output in one pass, rejecting foreign formats and cut-off snapshots."""
+    lines = output.splitlines()
+    header = lines[0].strip() if lines else ""
+    if header != f"nfqws-agent {AGENT_FORMAT_VERSION}":
+        raise AgentError(f"Unexpected agent output header: {header!r}")
+    snapshot: AgentSnapshot = {}
+    for line in lines[1:]:
+        key, sep, value = line.partition("=")
+        if sep:
+            snapshot.setdefault(key, []).append(value)
+    if "end" not in snapshot:
+        raise AgentError("Agent snapshot is incomplete")
+    return snapshot
+
+def _load_script() -> bytes:
+    """Read the agent script shipped with the integration (blocking)."""
+    return Path(__file__).with_name(AGENT_SCRIPT).read_bytes()
+
+class NFQWSAgent:
+    """Snapshot script kept on the router under its content hash."""
+
+    def __init__(self, hass: HomeAssistant, ssh: SSHHelper, directory: str) -> None:
+        """Initialize the agent; the script is read and uploaded on first use."""
+        self.hass = hass
+        self.ssh = ssh
+        self.directory = directory
+        self.path: str | None = None
+        self._script: bytes | None = None
+        self._digest: str | None = None
+        self.enabled = True
+        self.failures = 0
+        self.uploads = 0
+        self.mismatches = 0
+
+    async def async_snapshot(self, *args: str) -> AgentSnapshot | None:
+        """Run the agent, installing it first if needed; None if the router did not answer."""
+        try:
+            result = await self._async_run(args)
+            if result.exit_status == AGENT_MISMATCH_STATUS:
+                self.mismatches += 1
+                _LOGGER.warning(
+                    "Snapshot agent %s on %s does not match its hash, reinstalling",
+                    self.path, self.ssh.host,
+                )
+            if result.exit_status in (AGENT_MISSING_STATUS, AGENT_MISMATCH_STATUS):
+                await self._async_install()
+                result = await self._async_run(args)
+                if result.exit_status == AGENT_MISMATCH_STATUS:
+                    raise AgentError(f"Cannot verify the agent on {self.ssh.host}")
+            if result.exit_status is None:
+                return None
+            snapshot = parse_snapshot(result.stdout)
+        except AgentError:
+            self.failures += 1
+            if self.failures >= AGENT_MAX_FAILURES and self.enabled:
+                self.enabled = False
+                _LOGGER.warning(
+                    "Snapshot agent on %s failed %d times in a row, polling with separate "
+                    "commands until the integration is reloaded",
+                    self.ssh.host, self.failures,
+                )
+            raise
+        self.failures = 0
+        return snapshot
+
+    async def _async_run(self, args: tuple[str, ...]) -> CommandResult:
+        """Invoke the installed agent."""
+        if self._script is None:
+            script = await self.hass.async_add_executor_job(_load_script)
+            self._digest = hashlib.sha256(script).hexdigest()
+            # Новая версия скрипта — новое имя файла, установленная копия не совпадет
+            self.path = posixpath.join(
+                self.directory, AGENT_NAME_TEMPLATE.format(digest=self._digest[:16])
+            )
+            self._script = script
+        # Хеш сверяется перед каждым запуском, а не только при установке
+        command = CMD_AGENT_RUN_TEMPLATE.format(
+            path=shlex.quote(self.path),
+            digest=self._digest,
+            missing=AGENT_MISSING_STATUS,
+            mismatch=AGENT_MISMATCH_STATUS,
+            args=" ".join(map(shlex.quote, args)),
+        )
+        # Записи с одного роутера получают один снимок на всех
+        return await self.ssh.async_run_command(
+            command, AGENT_TIMEOUT, coalesce_key=f"agent:{command}"
+        )
+
+    async def _async_install(self) -> None:
+        """Upload the agent next to its final path and move it into place."""
+        result = await self.ssh.async_run_command(
+            CMD_STATE_DIR_PREPARE_TEMPLATE.format(dir=shlex.quote(self.directory))
+        )
+        if result.exit_status != 0:
+            raise AgentError(
+                f"Cannot prepare {self.directory} on {self.ssh.host}: "
+                f"{result.stderr or 'not owned by the SSH user'}"
+            )
+        staging = f"{self.path}.{secrets.token_hex(4)}"
+        if not await self.ssh.async_write_file(staging, self._script):
+            raise AgentError(f"Cannot upload the agent to {self.ssh.host}")
+        result = await self.ssh.async_run_command(
+            CMD_AGENT_INSTALL_TEMPLATE.format(
+                staging=shlex.quote(staging), path=shlex.quote(self.path)
+            )
+        )
+        if result.exit_status != 0:
+            raise AgentError(f"Cannot install the agent on {self.ssh.host}: {result.stderr}")
+        self.uploads += 1
+        _LOGGER.debug("Installed snapshot agent %s on %s", self.path, self.ssh.host)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return agent state for diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "uploads": self.uploads,
+            "mismatches": self.mismatches,
+            "failures": self.failures,
+        }
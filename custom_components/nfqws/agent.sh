@@ -0,0 +1,75 @@
+#!/bin/sh
+# Снимок состояния nfqws для интеграции NFQWS HA.
+# Загружается на роутер по хешу содержимого и запускается один раз за опрос.
+# Вывод: заголовок "nfqws-agent <версия формата>", затем строки key=value
+# (ключ может повторяться) и "end=1" в конце полного снимка.
+# Аргументы: имя процесса, имя пакета, control-файл пакета, известный отпечаток.
+process=$1
+package=$2
+control=$3
+known=$4
+
+echo "nfqws-agent 1"
+
+# Обходимся встроенными командами оболочки: на слабом CPU каждый fork заметен
+read -r uptime _ < /proc/uptime
+cpus=0
+while read -r key _; do
+    [ "$key" = processor ] && cpus=$((cpus + 1))
+done < /proc/cpuinfo
+
+pids=$(pidof "$process")
+if [ -n "$pids" ]; then
+    echo "running=1"
+else
+    echo "running=0"
+fi
+
+echo "process=uptime $uptime $cpus"
+for pid in $pids; do
+    # Процесс мог завершиться после pidof
+    [ -r /proc/"$pid"/stat ] || continue
+    fds=0
+    for fd in /proc/"$pid"/fd/*; do
+        [ -L "$fd" ] && fds=$((fds + 1))
+    done
+    status=""
+    while read -r key value _; do
+        case $key in
+            VmRSS:|Threads:) status="$status${key%:}=$value " ;;
+        esac
+    done < /proc/"$pid"/status
+    read -r stat < /proc/"$pid"/stat
+    echo "process=pid $pid fds=$fds ${status}stat=$stat"
+done
+
+echo "queue=uptime $uptime"
+if [ -r /proc/net/netfilter/nfnetlink_queue ]; then
+    while read -r line; do
+        echo "queue=nfq $line"
+    done < /proc/net/netfilter/nfnetlink_queue
+fi
+# iptables-nft видны и в nft, поэтому nft читаем, только если iptables пуст
+rules=$(for table in iptables ip6tables; do
+    $table -w -t mangle -vxnL 2>/dev/null | awk '$3 == "NFQUEUE" {print "rule", $1, $2}'
+done)
+if [ -z "$rules" ]; then
+    rules=$(nft list ruleset 2>/dev/null \
+        | sed -n 's/.*counter packets \([0-9]*\) bytes \([0-9]*\).*queue.*/rule \1 \2/p')
+fi
+if [ -n "$rules" ]; then
+    echo "$rules" | while read -r line; do
+        echo "queue=$line"
+    done
+fi
+
+# opkg запускается, только если control-файл пакета изменился
+fingerprint=$(stat -c '%Y %s' "$control" 2>/dev/null)
+echo "package=fp:$fingerprint"
+if [ "$fingerprint" != "$known" ]; then
+    opkg info "$package" 2>/dev/null | while IFS= read -r line; do
+        echo "package=$line"
+    done
+fi
+
+echo "end=1"
@@ -1,13 +1,15 @@
 """Button platform for NFQWS Keenetic."""
 from __future__ import annotations
 
+from typing import Any
+
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
 
-from .const import DOMAIN, CONF_STATUS_MONITORING
+from .const import DOMAIN
 from .coordinator import NFQWSDataUpdateCoordinator
 
 async def async_setup_entry(
@@ -21,7 +23,8 @@ async def async_setup_entry(
     async_add_entities([
         NFQWSStartButton(coordinator, entry),
         NFQWSStopButton(coordinator, entry),
-        NFQWSRestartButton(coordinator, entry)
+        NFQWSRestartButton(coordinator, entry),
+        NFQWSReloadButton(coordinator, entry),
     ])
 
 class NFQWSButtonBase(ButtonEntity):
@@ -67,9 +70,8 @@ class NFQWSStartButton(NFQWSButtonBase):
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        success = await self.coordinator.async_execute_command("start")
-        if success and self._entry.data.get(CONF_STATUS_MONITORING, False):
-            await self.coordinator.async_request_refresh()
+        # Coordinator switches to fast polling until the new state is confirmed
+        await self.coordinator.async_execute_command("start")
 
 class NFQWSStopButton(NFQWSButtonBase):
     """Representation of a NFQWS Stop Button."""
@@ -88,9 +90,8 @@ class NFQWSStopButton(NFQWSButtonBase):
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        success = await self.coordinator.async_execute_command("stop")
-        if success and self._entry.data.get(CONF_STATUS_MONITORING, False):
-            await self.coordinator.async_request_refresh()
+        # Coordinator switches to fast polling until the new state is confirmed
+        await self.coordinator.async_execute_command("stop")
 
 class NFQWSRestartButton(NFQWSButtonBase):
     """Representation of a NFQWS Restart Button."""
@@ -109,6 +110,36 @@ class NFQWSRestartButton(NFQWSButtonBase):
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        success = await self.coordinator.async_execute_command("restart")
-        if success and self._entry.data.get(CONF_STATUS_MONITORING, False):
-            await self.coordinator.async_request_refresh()
\ No newline at end of file
+        # Coordinator switches to fast polling until the new state is confirmed
+        await self.coordinator.async_execute_command("restart")
+
+class NFQWSReloadButton(NFQWSButtonBase):
+    """Button that makes nfqws re-read its lists without a restart."""
+
+    def __init__(self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the button."""
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{entry.entry_id}_reload"
+        self._attr_icon = "mdi:file-refresh"
+        self.entity_id = f"button.nfqws_{entry.entry_id}_reload"
+
+    @property
+    def translation_key(self) -> str:
+        """Return the translation key for this entity."""
+        return "nfqws_reload_button"
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return reload statistics."""
+        return {
+            "supported": self.coordinator.supports_reload,
+            "reloads": self.coordinator.reloads,
+            "fallbacks": self.coordinator.reload_fallbacks,
+            "downtime_avoided": round(self.coordinator.downtime_avoided, 1),
+        }
+
+    async def async_press(self) -> None:
+        """Handle the button press."""
+        # Falls back to restart if the installed nfqws does not handle SIGHUP
+        await self.coordinator.async_execute_command("reload")
+        self.async_write_ha_state()
\ No newline at end of file
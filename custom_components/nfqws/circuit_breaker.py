@@ -0,0 +1,105 @@
+"""Circuit breaker for SSH connections of NFQWS HA integration."""
+from __future__ import annotations
+
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from .const import (
+    BREAKER_BASE_DELAY,
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_JITTER,
+    BREAKER_MAX_DELAY,
+    BREAKER_OPEN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Fail fast while a router is unreachable and probe it with exponential backoff."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_delay: float = BREAKER_BASE_DELAY,
+        max_delay: float = BREAKER_MAX_DELAY,
+        jitter: float = BREAKER_JITTER,
+    ) -> None:
+        """Initialize the breaker."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.failures = 0
+        self._trips = 0
+        self._opened = False
+        self._probing = False
+        self._next_probe = 0.0
+        self._next_probe_at: datetime | None = None
+
+    @property
+    def state(self) -> str:
+        """Return closed, open or half_open."""
+        if not self._opened:
+            return BREAKER_CLOSED
+        if self._probing or time.monotonic() >= self._next_probe:
+            return BREAKER_HALF_OPEN
+        return BREAKER_OPEN
+
+    @property
+    def next_probe(self) -> datetime | None:
+        """Return when the next connection attempt is allowed while open."""
+        if not self._opened:
+            return None
+        return self._next_probe_at
+
+    def allow(self) -> bool:
+        """Return True if a connection attempt may go to the router now."""
+        state = self.state
+        if state == BREAKER_CLOSED:
+            return True
+        if state == BREAKER_HALF_OPEN and not self._probing:
+            # Пропускаем ровно одну пробную попытку
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Give back the half-open slot of a probe that ended without a result."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful operation."""
+        if self._opened:
+            _LOGGER.info("Router %s is reachable again, closing circuit", self.name)
+        self.failures = 0
+        self._trips = 0
+        self._opened = False
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failed operation and open the breaker when needed."""
+        self.failures += 1
+        if not self._opened and self.failures < self.failure_threshold:
+            return
+        self._trips += 1
+        self._probing = False
+        delay = min(self.base_delay * 2 ** (self._trips - 1), self.max_delay)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self._next_probe = time.monotonic() + delay
+        self._next_probe_at = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(
+            seconds=round(delay)
+        )
+        if not self._opened:
+            _LOGGER.warning(
+                "Router %s failed %s times in a row, pausing SSH attempts for %.0f s",
+                self.name, self.failures, delay,
+            )
+        else:
+            _LOGGER.debug("Probe of %s failed, next attempt in %.0f s", self.name, delay)
+        self._opened = True
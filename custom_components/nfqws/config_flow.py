@@ -21,8 +21,21 @@ from .const import (
     CONF_STATUS_MONITORING, 
     DEFAULT_SCAN_INTERVAL, 
     CONF_OPENWRT_MODE,
-    CONF_USE_OLD_VERSION
+    CONF_USE_OLD_VERSION,
+    CONF_SSH_BACKEND,
+    DEFAULT_SSH_BACKEND,
+    SSH_BACKEND_PARAMIKO,
+    SSH_BACKEND_ASYNCSSH,
+    CONF_PUSH_MODE,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_LOG_TAIL,
+    CONF_PROBE_TARGETS,
+    CONF_PROBE_INTERVAL,
+    DEFAULT_PROBE_INTERVAL,
 )
+from .reachability import parse_probe_targets
 from .ssh_helper import SSHHelper
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,6 +52,9 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         # Новая опция: False по умолчанию означает использование nfqws2
         vol.Required(CONF_USE_OLD_VERSION, default=False): bool,
         vol.Required(CONF_STATUS_MONITORING, default=False): bool,
+        vol.Required(CONF_SSH_BACKEND, default=DEFAULT_SSH_BACKEND): vol.In(
+            [SSH_BACKEND_PARAMIKO, SSH_BACKEND_ASYNCSSH]
+        ),
     }
 )
 
@@ -47,6 +63,17 @@ STEP_STATUS_MONITORING_SCHEMA = vol.Schema(
         vol.Required(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.All(
             vol.Coerce(int), vol.Range(min=10, max=3600)
         ),
+        vol.Required(CONF_PUSH_MODE, default=False): bool,
+        vol.Required(CONF_ADAPTIVE_POLLING, default=False): bool,
+        vol.Required(CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=10, max=3600)
+        ),
+        vol.Required(CONF_LOG_TAIL, default=False): bool,
+        # Сайты через запятую; пусто — проверка обхода выключена
+        vol.Optional(CONF_PROBE_TARGETS, default=""): cv.string,
+        vol.Required(CONF_PROBE_INTERVAL, default=DEFAULT_PROBE_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=60, max=86400)
+        ),
     }
 )
 
@@ -57,14 +84,14 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         data[CONF_SSH_PORT],
         data[CONF_USERNAME],
         data[CONF_PASSWORD],
+        backend=data.get(CONF_SSH_BACKEND, DEFAULT_SSH_BACKEND),
     )
     
-    # Пытаемся подключиться в отдельном потоке, чтобы не блокировать HA
-    result = await hass.async_add_executor_job(ssh_helper.connect)
-    if not result:
+    # Бэкенд сам решает, нужен ли поток исполнителя, цикл HA не блокируется
+    stdout, _ = await ssh_helper.async_execute_command("echo connected", 10)
+    await ssh_helper.async_disconnect()
+    if stdout != "connected":
         raise Exception("cannot_connect")
-    
-    ssh_helper.disconnect()
     return {"title": f"NFQWS - {data[CONF_HOST]}"}
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -112,12 +139,17 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            # Объединяем данные из первого шага с интервалом сканирования
-            data = {**self._user_input, **user_input}
-            return self.async_create_entry(
-                title=f"NFQWS HA - {data[CONF_HOST]}", 
-                data=data
-            )
+            try:
+                parse_probe_targets(user_input.get(CONF_PROBE_TARGETS, ""))
+            except ValueError:
+                errors[CONF_PROBE_TARGETS] = "invalid_probe_targets"
+            else:
+                # Объединяем данные из первого шага с интервалом сканирования
+                data = {**self._user_input, **user_input}
+                return self.async_create_entry(
+                    title=f"NFQWS HA - {data[CONF_HOST]}", 
+                    data=data
+                )
 
         return self.async_show_form(
             step_id="status_monitoring",
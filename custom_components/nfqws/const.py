@@ -33,4 +33,265 @@ CMD_RESTART_KEENETIC_V2 = "/opt/etc/init.d/S51nfqws2 restart"
 CMD_STATUS_OPENWRT = "service nfqws-keenetic status"
 CMD_START_OPENWRT = "service nfqws-keenetic start"
 CMD_STOP_OPENWRT = "service nfqws-keenetic stop"
-CMD_RESTART_OPENWRT = "service nfqws-keenetic restart"
\ No newline at end of file
+CMD_RESTART_OPENWRT = "service nfqws-keenetic restart"
+
+# Горячая перезагрузка: nfqws перечитывает списки по SIGHUP без пересоздания очереди
+CMD_RELOAD_TEMPLATE = "pids=$(pidof {process}) || exit 3; kill -HUP $pids"
+RELOAD_NOT_RUNNING_STATUS = 3
+# Первая версия пакета, в которой демон обрабатывает SIGHUP
+RELOAD_MIN_VERSION = {
+    "nfqws-keenetic": (2, 0),
+    "nfqws2": (0,),
+}
+# Оценка простоя при restart, пока он ни разу не замерен
+RESTART_DOWNTIME_ESTIMATE = 2.0
+
+# После start/stop/restart в той же сессии ждем появления/исчезновения pid демона
+CONVERGE_MARKER = "converge:"
+CONTROL_COMMAND_TIMEOUT = 30
+# Ожидание ограничено по времени, а не числом попыток: там, где BusyBox не
+# понимает дробный sleep, каждая попытка длится целую секунду
+CONVERGE_TIMEOUT = CONTROL_COMMAND_TIMEOUT - 10
+CONVERGE_CONDITIONS = {
+    "start": '[ -n "$p" ]',
+    "stop": '[ -z "$p" ]',
+    # Новый процесс после перезапуска, а не старый, еще не успевший завершиться
+    "restart": '[ -n "$p" ] && [ "$p" != "$old" ]',
+}
+CMD_CONVERGE_TEMPLATE = (
+    "old=$(pidof {process}); read t0 _ < /proc/uptime; {command}; rc=$?; "
+    "deadline=$((${{t0%.*}} + {wait})); "
+    "while p=$(pidof {process}); ! {{ {condition}; }}; do "
+    "read t _ < /proc/uptime; [ ${{t%.*}} -lt $deadline ] || break; "
+    "usleep 200000 2>/dev/null || sleep 0.2 2>/dev/null || sleep 1; done; "
+    "c=0; {condition} && c=1; read t1 _ < /proc/uptime; "
+    "echo \"{marker}$c:$t0:$t1:$p\"; exit $rc"
+)
+# Промежуточные статусы до подтверждения с роутера
+COMMAND_PENDING_STATUS = {"start": "starting", "stop": "stopping", "restart": "restarting"}
+
+# Пул SSH-соединений (общий для всех записей с одинаковым host/port/user)
+DATA_SSH_POOL = f"{DOMAIN}_ssh_pool"
+SSH_KEEPALIVE_INTERVAL = 15
+SSH_POOL_IDLE_TIMEOUT = 300
+SSH_POOL_EVICT_INTERVAL = 60
+
+# SSH-бэкенды
+CONF_SSH_BACKEND = "ssh_backend"
+SSH_BACKEND_PARAMIKO = "paramiko"
+SSH_BACKEND_ASYNCSSH = "asyncssh"
+DEFAULT_SSH_BACKEND = SSH_BACKEND_PARAMIKO
+
+# Общий планировщик опросов всех роутеров
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+FLEET_MAX_CONCURRENT_POLLS = 8
+FLEET_POLL_JITTER = 0.1
+FLEET_STARTUP_STAGGER = 0.5
+
+# Имена процессов демона для pidof
+PROCESS_NFQWS = "nfqws"
+PROCESS_NFQWS_V2 = "nfqws2"
+
+# Push-режим: долгоживущий SSH-канал с циклом наблюдения на роутере
+CONF_PUSH_MODE = "push_mode"
+PUSH_WATCH_PERIOD = 1
+PUSH_HEARTBEAT_INTERVAL = 30
+PUSH_RETRY_INTERVAL = 60
+# Пока канал жив, опрос остается только страховочным
+PUSH_SAFETY_INTERVAL = 3600
+CMD_WATCH_TEMPLATE = (
+    "o=-; n=0; while :; do p=$(pidof {process}); "
+    "if [ \"$p\" != \"$o\" ]; then echo \"pid:$p\"; o=$p; n=0; "
+    "elif [ $n -ge {heartbeat} ]; then echo hb; n=0; fi; "
+    "n=$((n+{period})); sleep {period}; done"
+)
+
+# Адаптивный интервал опроса
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MAX_SCAN_INTERVAL = 300
+ADAPTIVE_FAST_INTERVAL = 5
+ADAPTIVE_BACKOFF_FACTOR = 2
+
+# Circuit breaker для недоступных роутеров
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_DELAY = 30
+BREAKER_MAX_DELAY = 900
+BREAKER_JITTER = 0.2
+
+# Выделенный пул потоков для блокирующих SSH-вызовов (paramiko)
+SSH_WORKER_THREADS = 8
+# Сколько exec-каналов одно соединение держит одновременно (OpenSSH MaxSessions = 10)
+SSH_MAX_CHANNELS = 4
+
+# Замеры задержек по фазам SSH (скользящее окно на роутер)
+LATENCY_PHASES = ("tcp_connect", "kex", "auth", "channel_open", "command", "poll", "converge")
+LATENCY_WINDOW = 200
+
+# Поля, по которым координатор уведомляет сущности, кроме ключей NFQWSData
+FIELD_CIRCUIT = "circuit"
+FIELD_LOG_ERRORS = "log_errors"
+# Сущность статуса обновляется только при изменении этих полей
+STATUS_FIELDS = frozenset({"status", "is_running", FIELD_CIRCUIT, FIELD_LOG_ERRORS})
+
+# Кэш метаданных пакета в хранилище HA; opkg вызывается только при смене control-файла
+DATA_PACKAGE_CACHE = f"{DOMAIN}_package_cache"
+PACKAGE_CACHE_STORAGE_KEY = f"{DOMAIN}.package_cache"
+PACKAGE_CACHE_STORAGE_VERSION = 1
+PACKAGE_CACHE_SAVE_DELAY = 10
+
+# Последнее известное состояние роутеров: сущности поднимаются с ним до первого опроса
+DATA_STATE_CACHE = f"{DOMAIN}_state_cache"
+STATE_CACHE_STORAGE_KEY = f"{DOMAIN}.state"
+STATE_CACHE_STORAGE_VERSION = 1
+STATE_CACHE_SAVE_DELAY = 60
+OPKG_INFO_DIR_KEENETIC = "/opt/lib/opkg/info"
+OPKG_INFO_DIR_OPENWRT = "/usr/lib/opkg/info"
+PACKAGE_FINGERPRINT_PREFIX = "fp:"
+CMD_PACKAGE_INFO_TEMPLATE = (
+    "f=$(stat -c '%Y %s' {control} 2>/dev/null); echo \"{prefix}$f\"; "
+    "[ \"$f\" = {fingerprint} ] || opkg info {package}"
+)
+
+# Ресурсы процесса nfqws из /proc, собираются в том же опросе, что и статус
+PROC_CLOCK_TICKS = 100
+CMD_PROCESS_STATS_TEMPLATE = (
+    "echo \"uptime $(cut -d' ' -f1 /proc/uptime) $(grep -c ^processor /proc/cpuinfo)\"; "
+    "for p in $(pidof {process}); do "
+    "echo \"pid $p fds=$(ls /proc/$p/fd 2>/dev/null | wc -l) "
+    "$(awk '/^(VmRSS|Threads):/ {{sub(\":\", \"=\", $1); printf \"%s%s \", $1, $2}}' /proc/$p/status)"
+    "stat=$(cat /proc/$p/stat)\"; done"
+)
+
+# Счетчики NFQUEUE ядра и правил файрвола, ведущих в очередь
+CMD_QUEUE_STATS = (
+    "echo \"uptime $(cut -d' ' -f1 /proc/uptime)\"; "
+    "sed 's/^ */nfq /' /proc/net/netfilter/nfnetlink_queue 2>/dev/null; "
+    # iptables-nft видны и в nft, поэтому nft читаем, только если iptables пуст
+    "r=$(for t in iptables ip6tables; do $t -w -t mangle -vxnL 2>/dev/null "
+    "| awk '$3 == \"NFQUEUE\" {print \"rule\", $1, $2}'; done); "
+    "if [ -n \"$r\" ]; then echo \"$r\"; else nft list ruleset 2>/dev/null "
+    "| sed -n 's/.*counter packets \\([0-9]*\\) bytes \\([0-9]*\\).*queue.*/rule \\1 \\2/p'; fi"
+)
+
+# Пробы опроса независимы и идут параллельными каналами, у каждой свой таймаут
+POLL_PROBE_TIMEOUTS = {"status": 15, "package": 30, "process": 10, "queue": 10}
+
+# Агент снимка состояния (agent.sh): загружается на роутер, только если изменился его хеш.
+# На Keenetic каталог в хранилище Entware (флеш/USB): запись — только при новой версии
+# скрипта, после перезагрузки роутера агент остается на месте. На OpenWrt /var/run — tmpfs,
+# после перезагрузки агент загрузится снова
+AGENT_SCRIPT = "agent.sh"
+# Скрипт выполняется от root, поэтому лежит не в общем /tmp, а в своем каталоге 0700
+# (STATE_DIR_*), общем с синхронизацией хостлистов
+AGENT_NAME_TEMPLATE = "agent_{digest}.sh"
+AGENT_FORMAT_VERSION = 1
+AGENT_MISSING_STATUS = 127
+# Содержимое не совпало с хешем — скрипт переустанавливается
+AGENT_MISMATCH_STATUS = 125
+AGENT_TIMEOUT = 30
+# После стольких сбоев подряд опрос возвращается к отдельным пробам
+AGENT_MAX_FAILURES = 3
+CMD_AGENT_RUN_TEMPLATE = (
+    "[ -f {path} ] || exit {missing}; "
+    "sum=$(sha256sum {path}) && [ \"${{sum%% *}}\" = {digest} ] || exit {mismatch}; "
+    "sh {path} {args}"
+)
+CMD_AGENT_INSTALL_TEMPLATE = "chmod 700 {staging} && mv -f {staging} {path}"
+
+# Свой каталог на роутере для агента и промежуточных файлов синхронизации.
+# Должен принадлежать нам: чужой, созданный заранее, не используем
+STATE_DIR_KEENETIC = "/opt/var/run/nfqws-ha"
+STATE_DIR_OPENWRT = "/var/run/nfqws-ha"
+CMD_STATE_DIR_PREPARE_TEMPLATE = (
+    "umask 077; mkdir -p {dir} && [ \"$(stat -c %u {dir})\" = \"$(id -u)\" ] "
+    "&& chmod 700 {dir}"
+)
+
+# Инкрементальное чтение журнала nfqws: смещение и inode на роутер
+CONF_LOG_TAIL = "log_tail"
+LOG_PATH_KEENETIC = "/opt/var/log/nfqws.log"
+LOG_PATH_KEENETIC_V2 = "/opt/var/log/nfqws2.log"
+LOG_PATH_OPENWRT = "/var/log/nfqws.log"
+LOG_TAIL_MAX_BYTES = 65536
+LOG_TAIL_INITIAL_BYTES = 4096
+LOG_TAIL_TIMEOUT = 15
+LOG_TAIL_RECENT_ERRORS = 10
+LOG_ERROR_PATTERN = r"\b(error|fatal|fail(ed|ure)?|cannot|unable)\b"
+EVENT_LOG_ERROR = f"{DOMAIN}_log_error"
+CMD_LOG_TAIL_TEMPLATE = (
+    "s=$(stat -c '%i %s' {path} 2>/dev/null) || exit 0; set -- $s; o={offset}; "
+    "if [ $o -lt 0 ]; then o=$(($2-{initial})); [ $o -lt 0 ] && o=0; "
+    "elif [ \"$1\" != {inode} ] || [ $2 -lt $o ]; then o=0; fi; "
+    "echo \"$1 $o\"; tail -c +$((o+1)) {path} | head -c {limit}"
+)
+
+# Синхронизация хостлистов: чанки строк с границами по содержимому
+LIST_DIR_KEENETIC = "/opt/etc/nfqws"
+LIST_DIR_KEENETIC_V2 = "/opt/etc/nfqws2/lists"
+LIST_DIR_OPENWRT = "/etc/nfqws"
+# Чанки раскладываются в каталоге состояния (STATE_DIR_*), а не в общем /tmp
+HOSTLIST_SYNC_NAME_TEMPLATE = "sync_{name}.{token}"
+HOSTLIST_CHUNK_DIVISOR = 32
+HOSTLIST_CHUNK_MAX_LINES = 256
+# При изменении большей доли файла выгоднее залить его целиком
+HOSTLIST_FULL_UPLOAD_RATIO = 0.5
+HOSTLIST_BOUNDARY_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789.-"
+CMD_HOSTLIST_HASH_TEMPLATE = (
+    "mkdir -p {dir} && ({prepare}) || exit 1; d={tmp}; rm -rf $d; mkdir $d || exit 1; "
+    "[ -f {path} ] || exit 0; "
+    "echo \"file $(md5sum < {path} | cut -d' ' -f1)\"; "
+    "awk -v d=$d -v k={divisor} -v m={max_lines} -v a={alphabet} "
+    "'BEGIN {{ n = 0; c = 0; f = sprintf(\"%s/%06d\", d, n) }} "
+    "{{ print > f; c++; l = length($0); h = l; if (l > 1) h += index(a, substr($0, 2, 1)); "
+    "if (h % k == 0 || c >= m) {{ close(f); n++; c = 0; f = sprintf(\"%s/%06d\", d, n) }} }}' {path} "
+    # У пустого файла нет чанков: глоб остается буквальным, md5sum не вызываем
+    "&& cd $d && {{ set -- [0-9]*; [ ! -e \"$1\" ] || md5sum \"$@\"; }}"
+)
+CMD_HOSTLIST_ASSEMBLE_TEMPLATE = (
+    "d={tmp}; cd $d && awk 'BEGIN {{ while ((getline e < \"manifest\") > 0) {{ "
+    "if (e ~ /^\\+/) {{ for (i = substr(e, 2) + 0; i > 0; i--) {{ getline l < \"new\"; print l }} }} "
+    "else {{ split(e, r, \"-\"); if (!(2 in r)) r[2] = r[1]; "
+    "for (n = r[1] + 0; n <= r[2] + 0; n++) {{ f = sprintf(\"%06d\", n); "
+    "while ((getline l < f) > 0) print l; close(f) }} }} }} }}' > {staging} "
+    "&& [ \"$(md5sum < {staging} | cut -d' ' -f1)\" = {md5} ] && mv {staging} {path}; "
+    "r=$?; rm -rf $d {staging}; exit $r"
+)
+CMD_HOSTLIST_COMMIT_TEMPLATE = (
+    "d={tmp}; [ \"$(md5sum < {staging} | cut -d' ' -f1)\" = {md5} ] && mv {staging} {path}; "
+    "r=$?; rm -rf $d {staging}; exit $r"
+)
+CMD_HOSTLIST_CLEANUP_TEMPLATE = "rm -rf {tmp} {staging}"
+
+# Правка хостлистов: правки в пределах окна пишутся на роутер одним пакетом
+HOSTLIST_DEFAULT_NAME = "user.list"
+HOSTLIST_EDIT_WINDOW = 2.0
+CMD_HOSTLIST_STAT_TEMPLATE = "stat -c '%Y %s' {path} 2>/dev/null"
+CMD_HOSTLIST_LOAD_TEMPLATE = "stat -c '%Y %s' {path} 2>/dev/null && cat {path}"
+
+# Проверка обхода: HTTPS-запросы к заблокированным сайтам с самого роутера, своим расписанием
+CONF_PROBE_TARGETS = "probe_targets"
+CONF_PROBE_INTERVAL = "probe_interval"
+DEFAULT_PROBE_INTERVAL = 300
+# Первый круг — вскоре после запуска, не дожидаясь полного интервала
+PROBE_FIRST_DELAY = 30
+PROBE_PARALLEL = 4
+PROBE_TIMEOUT = 10
+# Окно попыток для доли успешных и процентилей
+PROBE_WINDOW = 100
+PROBE_PHASES = ("connect", "tls", "first_byte")
+PROBE_MAX_OUTPUT = 65536
+FIELD_PROBES = "probes"
+# Не больше {parallel} curl одновременно; time_* у curl отсчитываются от начала запроса
+CMD_PROBE_TEMPLATE = (
+    "command -v curl >/dev/null 2>&1 || {{ echo 'probe-error curl not found'; exit 0; }}; "
+    "i=0; for t in {targets}; do "
+    "(r=$(curl -sI -o /dev/null --max-time {timeout} "
+    "-w '%{{http_code}} %{{time_connect}} %{{time_appconnect}} %{{time_starttransfer}}' "
+    "\"https://$t/\"); echo \"probe $t $? $r\") & "
+    "i=$((i + 1)); [ $((i % {parallel})) -eq 0 ] && wait; "
+    "done; wait"
+)
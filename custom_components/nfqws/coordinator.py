@@ -1,13 +1,16 @@
 """Data coordinator for NFQWS HA integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from datetime import timedelta
-from typing import TypedDict
+from typing import Any, TypedDict
 import re
+import shlex
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import (
@@ -19,12 +22,60 @@ from .const import (
     CMD_STOP_KEENETIC, CMD_STOP_OPENWRT,
     CMD_RESTART_KEENETIC, CMD_RESTART_OPENWRT,
     CMD_STATUS_KEENETIC_V2, CMD_START_KEENETIC_V2,
-    CMD_STOP_KEENETIC_V2, CMD_RESTART_KEENETIC_V2
+    CMD_STOP_KEENETIC_V2, CMD_RESTART_KEENETIC_V2,
+    CONF_PUSH_MODE, PROCESS_NFQWS, PROCESS_NFQWS_V2, CMD_WATCH_TEMPLATE,
+    PUSH_WATCH_PERIOD, PUSH_HEARTBEAT_INTERVAL, PUSH_RETRY_INTERVAL,
+    PUSH_SAFETY_INTERVAL,
+    CONF_ADAPTIVE_POLLING, CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL,
+    ADAPTIVE_FAST_INTERVAL, ADAPTIVE_BACKOFF_FACTOR,
+    BREAKER_OPEN,
+    OPKG_INFO_DIR_KEENETIC, OPKG_INFO_DIR_OPENWRT,
+    STATE_DIR_KEENETIC, STATE_DIR_OPENWRT,
+    PACKAGE_FINGERPRINT_PREFIX, CMD_PACKAGE_INFO_TEMPLATE,
+    CMD_PROCESS_STATS_TEMPLATE, CMD_QUEUE_STATS, POLL_PROBE_TIMEOUTS,
+    CONF_LOG_TAIL, LOG_PATH_KEENETIC, LOG_PATH_KEENETIC_V2, LOG_PATH_OPENWRT,
+    EVENT_LOG_ERROR,
+    LIST_DIR_KEENETIC, LIST_DIR_KEENETIC_V2, LIST_DIR_OPENWRT,
+    CMD_RELOAD_TEMPLATE, RELOAD_NOT_RUNNING_STATUS, RELOAD_MIN_VERSION,
+    RESTART_DOWNTIME_ESTIMATE,
+    CMD_CONVERGE_TEMPLATE, CONVERGE_CONDITIONS, CONVERGE_TIMEOUT, CONVERGE_MARKER,
+    CONTROL_COMMAND_TIMEOUT,
+    COMMAND_PENDING_STATUS,
+    FIELD_CIRCUIT, FIELD_LOG_ERRORS, FIELD_PROBES,
+    CONF_PROBE_TARGETS, CONF_PROBE_INTERVAL, DEFAULT_PROBE_INTERVAL,
 )
+from .agent import AgentError, NFQWSAgent
+from .hostlist_index import NFQWSHostlistIndex
+from .log_tail import NFQWSLogTail
+from .package_cache import NFQWSPackageCache, PackageRecord, parse_opkg_info
+from .process_stats import (
+    EMPTY_PROCESS_STATS,
+    ProcessSample,
+    parse_process_sample,
+    process_stats,
+)
+from .queue_stats import EMPTY_QUEUE_STATS, QueueSample, parse_queue_sample, queue_stats
+from .reachability import NFQWSReachabilityProbe, parse_probe_targets
+from .scheduler import NFQWSFleetScheduler
+from .state_cache import NFQWSStateCache
 from .ssh_helper import SSHHelper
+from .transport import SSHStream
+from .workers import CommandCoalescer
 
 _LOGGER = logging.getLogger(__name__)
 
+# Слияние команды, еще ждущей выполнения, с новой: (ожидающая, новая) -> итоговая
+_COMMAND_MERGE: dict[tuple[str, str], str] = {
+    ("stop", "start"): "restart",
+    ("stop", "restart"): "restart",
+    ("start", "restart"): "restart",
+    ("restart", "start"): "restart",
+    ("restart", "reload"): "restart",
+    ("start", "reload"): "restart",
+    ("reload", "start"): "restart",
+    ("stop", "reload"): "stop",
+}
+
 class NFQWSData(TypedDict):
     """Data structure for NFQWS coordinator."""
     status: str
@@ -33,11 +84,29 @@ class NFQWSData(TypedDict):
     nfqws_version: str
     manufacturer: str
     model: str
+    cpu_percent: float | None
+    memory_rss: int | None
+    threads: int | None
+    open_fds: int | None
+    process_uptime: int | None
+    queue_packets_rate: float | None
+    queue_bytes_rate: float | None
+    queue_length: int | None
+    queue_drop_rate: float | None
+    queue_overflow_rate: float | None
 
 class NFQWSDataUpdateCoordinator(DataUpdateCoordinator[NFQWSData]):
     """Class to manage fetching NFQWS data."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        ssh: SSHHelper,
+        scheduler: NFQWSFleetScheduler,
+        package_cache: NFQWSPackageCache,
+        state_cache: NFQWSStateCache,
+    ) -> None:
         """Initialize."""
         # Используем интервал обновления, если включен мониторинг статуса
         update_interval = timedelta(seconds=3600)  # 1 час по умолчанию
@@ -45,23 +114,229 @@ class NFQWSDataUpdateCoordinator(DataUpdateCoordinator[NFQWSData]):
         if entry.data.get(CONF_STATUS_MONITORING, False):
             update_interval = timedelta(seconds=entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
         
+        # Собственный таймер не нужен: опросами всех записей управляет планировщик
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}_{entry.entry_id}",
-            update_interval=update_interval,
+            update_interval=None,
         )
+        self.scheduler = scheduler
+        # Верхняя граница интервала: при адаптивном опросе — настроенный потолок
+        ceiling = update_interval.total_seconds()
+        self.adaptive_polling = entry.data.get(CONF_ADAPTIVE_POLLING, False)
+        if self.adaptive_polling:
+            ceiling = max(ceiling, entry.data.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL))
+        self._max_interval = ceiling
+        self._current_interval = update_interval.total_seconds()
+        self.push_mode = entry.data.get(CONF_PUSH_MODE, False)
+        self.push_active = False
         self.entry = entry
-        self.nfqws_version = "unknown"
+        # Соединение берется из общего пула и живет между опросами
+        self.ssh = ssh
         self.is_openwrt = entry.data.get(CONF_OPENWRT_MODE, False)
         # Настройка версии: если True — используем старый скрипт, если False (по умолчанию) — nfqws2
         self.use_old_version = entry.data.get(CONF_USE_OLD_VERSION, False)
+        # Версия известна сразу после рестарта HA, opkg на роутере не трогаем
+        self.package_cache = package_cache
+        self._package_key = f"{ssh.host}:{ssh.port}:{self.package_name}"
+        self.package: PackageRecord | None = package_cache.get(self._package_key)
+        self.nfqws_version = self.package["version"] if self.package else "unknown"
+        # Предыдущий замер /proc для расчета загрузки CPU
+        self._process_sample: ProcessSample | None = None
+        # Предыдущий замер счетчиков NFQUEUE для расчета скоростей
+        self._queue_sample: QueueSample | None = None
+        # Снимок состояния одним вызовом скрипта на роутере; при сбоях — отдельные пробы
+        self.agent = NFQWSAgent(hass, ssh, self.state_dir)
+        self.log_tail: NFQWSLogTail | None = None
+        if entry.data.get(CONF_LOG_TAIL, False):
+            self.log_tail = NFQWSLogTail(ssh, self.log_path)
+        # Перезагрузки по SIGHUP и сэкономленный ими простой
+        self.reloads = 0
+        self.reload_fallbacks = 0
+        self.downtime_avoided = 0.0
+        self._restart_downtime: float | None = None
+        # Время от команды до появления/исчезновения pid, секунды
+        self.last_converge_time: float | None = None
+        # Команды управления выполняются по одной, ожидающие сливаются;
+        # задача очереди принадлежит записи и отменяется при ее выгрузке
+        self.commands = CommandCoalescer(
+            self._async_run_control,
+            _COMMAND_MERGE,
+            lambda coro: entry.async_create_background_task(hass, coro, f"{self.name} commands"),
+        )
+        # Индексы хостлистов по полному пути, загружаются при первой правке
+        self.hostlists: dict[str, NFQWSHostlistIndex] = {}
+        # Проверка доступности заблокированных сайтов с роутера, своим расписанием
+        self.reachability: NFQWSReachabilityProbe | None = None
+        if targets := parse_probe_targets(entry.data.get(CONF_PROBE_TARGETS, "")):
+            self.reachability = NFQWSReachabilityProbe(
+                hass,
+                entry,
+                ssh,
+                targets,
+                entry.data.get(CONF_PROBE_INTERVAL, DEFAULT_PROBE_INTERVAL),
+                self.async_update_listeners,
+            )
         
         self.manufacturer = "OpenWRT" if self.is_openwrt else "Keenetic"
         self.model = "NFQWS2" if not self.use_old_version and not self.is_openwrt else "NFQWS"
+        # Сущности сразу получают последнее известное состояние, первый опрос идет в фоне
+        self.state_cache = state_cache
+        restored = state_cache.get(entry.entry_id)
+        self.restored = restored is not None
+        self.data = self._initial_data(restored)
+        self._polled = False
+        # Поля, с которыми сущности уведомлялись в последний раз; None — еще не уведомлялись
+        self._notified_fields: dict[str, Any] | None = None
+        self._notified_success = True
+        self.notifications = 0
+        self.suppressed_notifications = 0
+        self.async_add_listener(self._async_save_state)
+
+    def _tracked_fields(self) -> dict[str, Any]:
+        """Return every value entities are drawn from, by field name."""
+        breaker = self.ssh.breaker
+        return {
+            **(self.data or {}),
+            FIELD_CIRCUIT: (breaker.state, breaker.next_probe),
+            FIELD_LOG_ERRORS: tuple(self.log_tail.recent_errors) if self.log_tail else (),
+            FIELD_PROBES: self.reachability.rounds if self.reachability else 0,
+        }
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only listeners whose fields changed since the previous notification.
+
+        Entities list their fields as the coordinator context; listeners
+        without one are notified every time.
+        """
+        fields = self._tracked_fields()
+        previous, self._notified_fields = self._notified_fields, fields
+        changed: set[str] | None = None
+        # Смена last_update_success меняет доступность всех сущностей
+        if previous is not None and self.last_update_success == self._notified_success:
+            changed = {
+                key for key in fields.keys() | previous.keys()
+                if fields.get(key) != previous.get(key)
+            }
+        self._notified_success = self.last_update_success
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or not changed.isdisjoint(context):
+                self.notifications += 1
+                update_callback()
+            else:
+                self.suppressed_notifications += 1
+
+    @property
+    def suppression_ratio(self) -> float | None:
+        """Return the share of listener notifications skipped as unchanged."""
+        total = self.notifications + self.suppressed_notifications
+        return round(self.suppressed_notifications / total, 3) if total else None
+
+    @property
+    def poll_interval(self) -> timedelta:
+        """Return the interval the scheduler should poll this router at."""
+        if self.push_active:
+            return timedelta(seconds=PUSH_SAFETY_INTERVAL)
+        return timedelta(seconds=self._current_interval)
+
+    def _adapt_interval(self, data: NFQWSData) -> None:
+        """Poll fast while the state is changing and back off while it is stable."""
+        previous = self.data
+        if not self._polled:
+            # Восстановленное состояние не считается изменением
+            self._polled = True
+            self.restored = False
+            return
+        if not self.adaptive_polling:
+            # Без адаптивного опроса интервал всегда равен настроенному
+            return
+        if any(previous.get(key) != data.get(key) for key in ("status", "available", "is_running")):
+            self._current_interval = ADAPTIVE_FAST_INTERVAL
+        else:
+            self._current_interval = min(
+                self._current_interval * ADAPTIVE_BACKOFF_FACTOR, self._max_interval
+            )
+
+    @callback
+    def async_expect_change(self) -> None:
+        """Switch to fast polling until the state converges after a command."""
+        if self.adaptive_polling:
+            self._current_interval = ADAPTIVE_FAST_INTERVAL
+        # Без адаптивного опроса — одна внеочередная проверка, интервал не меняется
+        self.scheduler.async_schedule(self, ADAPTIVE_FAST_INTERVAL)
+
+    @property
+    def process_name(self) -> str:
+        """Return the daemon process name for the selected version."""
+        return PROCESS_NFQWS if self.use_old_version or self.is_openwrt else PROCESS_NFQWS_V2
+
+    @property
+    def package_name(self) -> str:
+        """Return the opkg package name for the selected version."""
+        return "nfqws-keenetic" if self.use_old_version or self.is_openwrt else "nfqws2"
+
+    @property
+    def log_path(self) -> str:
+        """Return the nfqws log file path for the selected platform and version."""
+        if self.is_openwrt:
+            return LOG_PATH_OPENWRT
+        return LOG_PATH_KEENETIC if self.use_old_version else LOG_PATH_KEENETIC_V2
+
+    @property
+    def state_dir(self) -> str:
+        """Return the private directory for the agent and hostlist sync files."""
+        return STATE_DIR_OPENWRT if self.is_openwrt else STATE_DIR_KEENETIC
+
+    @property
+    def list_dir(self) -> str:
+        """Return the directory nfqws reads its hostlists from."""
+        if self.is_openwrt:
+            return LIST_DIR_OPENWRT
+        return LIST_DIR_KEENETIC if self.use_old_version else LIST_DIR_KEENETIC_V2
+
+    @property
+    def supports_reload(self) -> bool:
+        """Return True if the installed daemon re-reads its lists on SIGHUP."""
+        try:
+            version = tuple(int(part) for part in self.nfqws_version.split("."))
+        except ValueError:
+            return False
+        return version >= RELOAD_MIN_VERSION.get(self.package_name, (0,))
+
+    @property
+    def restart_downtime(self) -> float:
+        """Return how long the last restart kept the daemon down."""
+        if self._restart_downtime is None:
+            return RESTART_DOWNTIME_ESTIMATE
+        return self._restart_downtime
+
+    def hostlist(self, name: str) -> NFQWSHostlistIndex:
+        """Return the index of a hostlist in the nfqws list directory."""
+        path = f"{self.list_dir}/{name}"
+        if path not in self.hostlists:
+            self.hostlists[path] = NFQWSHostlistIndex(
+                self.hass, self.ssh, path, self.state_dir, self.async_apply_hostlists
+            )
+        return self.hostlists[path]
+
+    async def async_apply_hostlists(self) -> bool:
+        """Make the running daemon pick up edited hostlists."""
+        if self.data and not self.data.get("is_running"):
+            # Остановленный демон прочитает списки при запуске
+            return False
+        return await self.async_execute_command("reload")
+
+    async def async_flush_hostlists(self) -> None:
+        """Write hostlist edits that are still waiting for their batch window."""
+        for index in self.hostlists.values():
+            await index.async_flush()
 
     def _get_command(self, command_type: str) -> str:
         """Get the appropriate command based on platform and version."""
+        if command_type == "reload":
+            return CMD_RELOAD_TEMPLATE.format(process=self.process_name)
         if self.is_openwrt:
             commands = {
                 "status": CMD_STATUS_OPENWRT,
@@ -87,66 +362,180 @@ class NFQWSDataUpdateCoordinator(DataUpdateCoordinator[NFQWSData]):
                 }
         return commands.get(command_type, "")
 
+    def _initial_data(self, restored: dict | None) -> NFQWSData:
+        """Return the data entities show until the first poll completes."""
+        data = self._unavailable_data("unknown")
+        if restored:
+            # Загрузка CPU и скорости очереди устарели вместе с прошлым запуском HA
+            data.update({
+                key: restored[key]
+                for key in ("status", "available", "is_running")
+                if key in restored
+            })
+        return data
+
+    @callback
+    def _async_save_state(self) -> None:
+        """Remember confirmed router state for the next Home Assistant start."""
+        data = self.data
+        if data is None or not data.get("available"):
+            return
+        if data["status"] in COMMAND_PENDING_STATUS.values():
+            return
+        self.state_cache.set(self.entry.entry_id, dict(data))
+
+    def _unavailable_data(self, status: str) -> NFQWSData:
+        """Return data for a router that could not be polled."""
+        return {
+            "status": status,
+            "available": False,
+            "is_running": False,
+            "nfqws_version": self.nfqws_version,
+            "manufacturer": self.manufacturer,
+            "model": self.model,
+            **EMPTY_PROCESS_STATS,
+            **EMPTY_QUEUE_STATS,
+        }
+
     async def _async_update_data(self) -> NFQWSData:
         """Fetch data from router via SSH."""
+        started = time.monotonic()
         try:
-            return await self.hass.async_add_executor_job(self._get_status)
+            data = await self._async_get_status()
+            # Полное время опроса, включая ожидание в очереди роутера
+            self.ssh.stats.record_since("poll", started)
+            if self.log_tail is not None and data["available"]:
+                await self._async_tail_log()
         except Exception as err:
             self.logger.error("Error fetching NFQWS status: %s", err)
-            return {
-                "status": "error", 
-                "available": False, 
-                "is_running": False,
-                "nfqws_version": self.nfqws_version,
-                "manufacturer": self.manufacturer,
-                "model": self.model
-            }
+            data = self._unavailable_data("error")
+        self._adapt_interval(data)
+        return data
 
-    def _get_status(self) -> NFQWSData:
-        """Get NFQWS status and version via SSH."""
-        ssh_helper = SSHHelper(
-            self.entry.data["host"],
-            self.entry.data.get(CONF_SSH_PORT, DEFAULT_SSH_PORT),
-            self.entry.data["username"],
-            self.entry.data["password"]
+    async def _async_tail_log(self) -> None:
+        """Read new log lines and fire an event for every error among them."""
+        for line in await self.log_tail.async_fetch():
+            self.hass.bus.async_fire(EVENT_LOG_ERROR, {
+                "entry_id": self.entry.entry_id,
+                "host": self.entry.data["host"],
+                "path": self.log_tail.path,
+                "line": line,
+            })
+
+    @property
+    def _package_control(self) -> str:
+        """Return the path of the opkg control file of the nfqws package."""
+        info_dir = OPKG_INFO_DIR_OPENWRT if self.is_openwrt else OPKG_INFO_DIR_KEENETIC
+        return f"{info_dir}/{self.package_name}.control"
+
+    @property
+    def _package_fingerprint(self) -> str:
+        """Return the control file fingerprint the cached package metadata belongs to."""
+        return self.package["fingerprint"] if self.package else "none"
+
+    def _build_poll_probes(self) -> dict[str, str]:
+        """Return the independent probes run on parallel channels every poll."""
+        # opkg запускается на роутере, только если control-файл пакета изменился
+        return {
+            "status": self._get_command("status"),
+            "package": CMD_PACKAGE_INFO_TEMPLATE.format(
+                control=shlex.quote(self._package_control),
+                prefix=PACKAGE_FINGERPRINT_PREFIX,
+                fingerprint=shlex.quote(self._package_fingerprint),
+                package=shlex.quote(self.package_name),
+            ),
+            "process": CMD_PROCESS_STATS_TEMPLATE.format(process=self.process_name),
+            "queue": CMD_QUEUE_STATS,
+        }
+
+    def _update_package(self, output: str) -> None:
+        """Refresh cached package metadata if the router reported a change."""
+        fingerprint_line, _, info = output.partition("\n")
+        if not fingerprint_line.startswith(PACKAGE_FINGERPRINT_PREFIX):
+            return
+        fingerprint = fingerprint_line[len(PACKAGE_FINGERPRINT_PREFIX):].strip()
+        if self.package and self.package["fingerprint"] == fingerprint:
+            return
+        fields = parse_opkg_info(info)
+        # Пустой ответ opkg при существующем control-файле — сбой, повторим в следующий раз
+        if not fields and fingerprint:
+            return
+        version = "unknown"
+        version_match = re.search(r'^([\d.]+)', fields.get("Version", ""))
+        if version_match:
+            version = version_match.group(1)
+        self.package = {"fingerprint": fingerprint, "version": version, "fields": fields}
+        self.package_cache.set(self._package_key, self.package)
+        self.nfqws_version = version
+
+    async def _async_collect(self) -> dict[str, str] | None:
+        """Return poll outputs by name; None if the router did not answer."""
+        if self.agent.enabled:
+            try:
+                snapshot = await self.agent.async_snapshot(
+                    self.process_name,
+                    self.package_name,
+                    self._package_control,
+                    self._package_fingerprint,
+                )
+            except AgentError as err:
+                self.logger.debug("Snapshot agent failed, polling with separate commands: %s", err)
+            else:
+                if snapshot is None:
+                    return None
+                return {
+                    name: "\n".join(snapshot.get(name, ()))
+                    for name in ("running", "package", "process", "queue")
+                }
+
+        # Пробы независимы: каждая в своем канале того же соединения, со своим таймаутом
+        results = await self.ssh.async_execute_parallel(
+            self._build_poll_probes(), POLL_PROBE_TIMEOUTS
         )
+        stdout = results["status"].stdout
+        if results["status"].exit_status is None:
+            self.logger.warning("Status command did not run: %s", results["status"].stderr)
+            return None
+        
+        # В nfqws2 проверка статуса возвращает строку, ищем "is running"
+        is_running = False
+        if stdout:
+            if self.is_openwrt:
+                is_running = "running" in stdout.lower()
+            else:
+                is_running = "is running" in stdout.lower()
+        return {
+            "running": "1" if is_running else "0",
+            **{name: results[name].stdout for name in ("package", "process", "queue")},
+        }
+
+    async def _async_get_status(self) -> NFQWSData:
+        """Get NFQWS status and version via SSH."""
+        ssh_helper = self.ssh
         
         try:
-            if not ssh_helper.connect():
-                self.logger.warning("Failed to connect to router")
-                return {
-                    "status": "connection_error", 
-                    "available": False, 
-                    "is_running": False,
-                    "nfqws_version": self.nfqws_version,
-                    "manufacturer": self.manufacturer,
-                    "model": self.model
-                }
-            
-            # Получаем статус через выбранную команду
-            status_cmd = self._get_command("status")
-            stdout, stderr = ssh_helper.execute_command(status_cmd)
-            
-            # В nfqws2 проверка статуса возвращает строку, ищем "is running"
-            is_running = False
-            if stdout:
-                if self.is_openwrt:
-                    is_running = "running" in stdout.lower()
+            if not await ssh_helper.async_connect():
+                if ssh_helper.breaker.state == BREAKER_OPEN:
+                    self.logger.debug("Router is marked unreachable, next probe at %s",
+                                      ssh_helper.breaker.next_probe)
                 else:
-                    is_running = "is running" in stdout.lower()
-                
+                    self.logger.warning("Failed to connect to router")
+                return self._unavailable_data("connection_error")
+            
+            outputs = await self._async_collect()
+            if outputs is None:
+                return self._unavailable_data("connection_error")
+            is_running = outputs["running"] == "1"
             status = "running" if is_running else "stopped"
             
-            # Получаем версию пакета (выполняется один раз)
-            if self.nfqws_version == "unknown":
-                # Определяем имя пакета для opkg
-                pkg_name = "nfqws-keenetic" if self.use_old_version or self.is_openwrt else "nfqws2"
-                stdout_v, _ = ssh_helper.execute_command(f"opkg info {pkg_name}")
-                
-                if stdout_v:
-                    version_match = re.search(r'Version:\s*([\d.]+)', stdout_v)
-                    if version_match:
-                        self.nfqws_version = version_match.group(1)
+            self._update_package(outputs["package"])
+            
+            sample = parse_process_sample(outputs["process"])
+            resources = process_stats(sample, self._process_sample)
+            self._process_sample = sample
+            queue_sample = parse_queue_sample(outputs["queue"])
+            resources.update(queue_stats(queue_sample, self._queue_sample))
+            self._queue_sample = queue_sample
             
             return {
                 "status": status, 
@@ -154,49 +543,192 @@ class NFQWSDataUpdateCoordinator(DataUpdateCoordinator[NFQWSData]):
                 "is_running": is_running,
                 "nfqws_version": self.nfqws_version,
                 "manufacturer": self.manufacturer,
-                "model": self.model
+                "model": self.model,
+                **resources,
             }
                 
         except Exception as err:
             self.logger.error("Unexpected error in coordinator: %s", err)
-            return {
-                "status": "error", 
-                "available": False, 
-                "is_running": False,
-                "nfqws_version": self.nfqws_version,
-                "manufacturer": self.manufacturer,
-                "model": self.model
-            }
-        finally:
-            ssh_helper.disconnect()
+            return self._unavailable_data("error")
 
     async def async_execute_command(self, command_type: str) -> bool:
-        """Execute a command (start/stop/restart) via SSH."""
-        ssh_helper = SSHHelper(
-            self.entry.data["host"],
-            self.entry.data.get(CONF_SSH_PORT, DEFAULT_SSH_PORT),
-            self.entry.data["username"],
-            self.entry.data["password"]
-        )
+        """Execute a command (start/stop/restart/reload), merged with concurrent ones."""
+        return await self.commands.async_submit(command_type)
+
+    async def _async_run_control(self, command_type: str) -> bool:
+        """Run a control command on the router via SSH."""
+        ssh_helper = self.ssh
         
+        if command_type == "reload" and not self.supports_reload:
+            # Старый демон не умеет перечитывать списки — только полный перезапуск
+            self.logger.debug("nfqws %s does not support reload, restarting", self.nfqws_version)
+            self.reload_fallbacks += 1
+            command_type = "restart"
         command = self._get_command(command_type)
         if not command:
             return False
+        if command_type in CONVERGE_CONDITIONS:
+            # Ожидание результата — в той же сессии, без отдельного опроса
+            command = CMD_CONVERGE_TEMPLATE.format(
+                process=self.process_name,
+                command=command,
+                condition=CONVERGE_CONDITIONS[command_type],
+                wait=CONVERGE_TIMEOUT,
+                marker=CONVERGE_MARKER,
+            )
+        previous = self.data
+        if previous is not None and command_type in COMMAND_PENDING_STATUS:
+            self.async_set_updated_data({
+                **previous,
+                "status": COMMAND_PENDING_STATUS[command_type],
+                "is_running": command_type != "stop",
+            })
         
         try:
-            # Для запуска/остановки используем исполнителя HA, чтобы не блокировать цикл
-            await self.hass.async_add_executor_job(ssh_helper.connect)
-            _, stderr = await self.hass.async_add_executor_job(
-                ssh_helper.execute_command, command, 30
-            )
+            started = time.monotonic()
+            result = await ssh_helper.async_run_command(command, CONTROL_COMMAND_TIMEOUT)
+            elapsed = time.monotonic() - started
+            stderr = result.stderr
             
+            # Команда не дошла до роутера (нет связи или открыт circuit breaker)
+            if result.exit_status is None:
+                self.logger.error("Error executing %s: %s", command, stderr)
+                self._async_rollback(previous)
+                return False
+            if command_type == "reload":
+                if result.exit_status == RELOAD_NOT_RUNNING_STATUS:
+                    self.logger.error("Cannot reload %s: daemon is not running", self.process_name)
+                    return False
+                if result.exit_status != 0:
+                    self.logger.error("Error executing %s: %s", command, stderr)
+                    return False
+                # Очередь и правила firewall остались на месте — простоя не было
+                self.reloads += 1
+                self.downtime_avoided += self.restart_downtime
+                return True
             if stderr and "error" in stderr.lower():
                 self.logger.error("Error executing %s: %s", command, stderr)
+                self._async_rollback(previous)
+                self.async_expect_change()
                 return False
+            converged = self._async_publish_converged(command_type, result.stdout)
+            if command_type == "restart":
+                self._restart_downtime = converged if converged is not None else elapsed
+            if converged is None:
+                # Роутер не дождался нужного состояния — досматриваем частым опросом
+                self.async_expect_change()
             return True
             
         except Exception as err:
             self.logger.error("Error executing command: %s", err)
+            self._async_rollback(previous)
             return False
-        finally:
-            ssh_helper.disconnect()
\ No newline at end of file
+
+    @callback
+    def _async_rollback(self, previous: NFQWSData | None) -> None:
+        """Undo the optimistic state of a command that did not run."""
+        if previous is not None and self.data is not previous:
+            self.async_set_updated_data(previous)
+
+    @callback
+    def _async_publish_converged(self, command_type: str, output: str) -> float | None:
+        """Publish the state confirmed after a command; return the time it took."""
+        marker_line = next(
+            (line for line in reversed(output.splitlines()) if line.startswith(CONVERGE_MARKER)),
+            None,
+        )
+        if marker_line is None:
+            return None
+        try:
+            ok, start, end, pids = marker_line[len(CONVERGE_MARKER):].split(":", 3)
+            seconds = max(float(end) - float(start), 0.0)
+        except ValueError:
+            return None
+        is_running = bool(pids.strip())
+        base = self.data or self._unavailable_data("stopped")
+        self.async_set_updated_data({
+            **base,
+            # Ресурсы нового процесса снимет внеочередной опрос
+            **EMPTY_PROCESS_STATS,
+            **EMPTY_QUEUE_STATS,
+            "status": "running" if is_running else "stopped",
+            "available": True,
+            "is_running": is_running,
+        })
+        if ok != "1":
+            self.logger.warning(
+                "nfqws did not reach the expected state after %s within %.1f s",
+                command_type, seconds,
+            )
+            return None
+        self.ssh.stats.record("converge", seconds)
+        self.last_converge_time = seconds
+        if is_running:
+            # Ресурсы нового процесса снимаем сразу, не дожидаясь планового опроса
+            self.scheduler.async_schedule(self, 0)
+        return seconds
+
+    async def async_watch(self) -> None:
+        """Keep a watch channel open and push state changes; poll while it is down."""
+        command = CMD_WATCH_TEMPLATE.format(
+            process=self.process_name,
+            heartbeat=PUSH_HEARTBEAT_INTERVAL,
+            period=PUSH_WATCH_PERIOD,
+        )
+        while True:
+            stream = await self.ssh.async_open_stream(command)
+            if stream is not None:
+                try:
+                    await self._async_consume_watch(stream)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:
+                    self.logger.debug("Watch channel error: %s", err)
+                finally:
+                    await self._async_stop_push(stream)
+            await asyncio.sleep(PUSH_RETRY_INTERVAL)
+
+    async def _async_consume_watch(self, stream: SSHStream) -> None:
+        """Publish state transitions reported by the watch loop until it drops."""
+        while True:
+            # Сердцебиение приходит регулярно — его отсутствие значит, что канал умер
+            line = await asyncio.wait_for(
+                stream.async_readline(), PUSH_HEARTBEAT_INTERVAL * 2
+            )
+            if line is None:
+                return
+            if not line.startswith("pid:"):
+                continue
+            if not self.push_active:
+                self.push_active = True
+                self.logger.debug("Push channel to %s is up", self.entry.data["host"])
+                self.scheduler.async_schedule(self)
+            is_running = bool(line[4:].strip())
+            if self.data and self.data.get("is_running") == is_running and self.data.get("available"):
+                continue
+            base = self.data or self._unavailable_data("stopped")
+            # У остановленного демона нет ресурсов, у запущенного их снимет внеочередной опрос
+            self.async_set_updated_data({
+                **base,
+                **EMPTY_PROCESS_STATS,
+                **EMPTY_QUEUE_STATS,
+                "status": "running" if is_running else "stopped",
+                "available": True,
+                "is_running": is_running,
+            })
+            if is_running:
+                self.scheduler.async_schedule(self, 0)
+
+    async def _async_stop_push(self, stream: SSHStream) -> None:
+        """Close the watch channel and fall back to polling."""
+        try:
+            await stream.async_close()
+        except Exception as err:
+            self.logger.debug("Error closing watch channel: %s", err)
+        if self.push_active:
+            self.push_active = False
+            self.logger.warning(
+                "Push channel to %s dropped, falling back to polling", self.entry.data["host"]
+            )
+            # Сразу сверяем состояние обычным опросом
+            self.scheduler.async_schedule(self, 0)
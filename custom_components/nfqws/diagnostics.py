@@ -0,0 +1,62 @@
+"""Diagnostics support for NFQWS HA integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import NFQWSDataUpdateCoordinator
+
+TO_REDACT = {CONF_PASSWORD}
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: NFQWSDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    ssh = coordinator.ssh
+    breaker = ssh.breaker
+    next_probe = breaker.next_probe
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "data": coordinator.data,
+        "restored": coordinator.restored,
+        "poll_interval": coordinator.poll_interval.total_seconds(),
+        "package": coordinator.package,
+        "agent": coordinator.agent.as_dict(),
+        "reachability": coordinator.reachability.as_dict() if coordinator.reachability else None,
+        "commands": coordinator.commands.as_dict(),
+        "listeners": {
+            "notified": coordinator.notifications,
+            "suppressed": coordinator.suppressed_notifications,
+            "suppression_ratio": coordinator.suppression_ratio,
+        },
+        "reload": {
+            "supported": coordinator.supports_reload,
+            "reloads": coordinator.reloads,
+            "fallbacks": coordinator.reload_fallbacks,
+            "restart_downtime": coordinator.restart_downtime,
+            "downtime_avoided": coordinator.downtime_avoided,
+        },
+        "ssh": {
+            "backend": ssh.backend,
+            "connected": ssh.is_connected,
+            "latency": ssh.stats.as_dict(),
+            "queue": ssh.queue.as_dict(),
+            "circuit": {
+                "state": breaker.state,
+                "failures": breaker.failures,
+                "next_probe": next_probe.isoformat() if next_probe else None,
+            },
+        },
+        "scheduler": {
+            "queue_depth": coordinator.scheduler.queue_depth,
+            "in_flight": coordinator.scheduler.in_flight,
+            "max_concurrent": coordinator.scheduler.max_concurrent,
+            "routers": coordinator.scheduler.registered,
+        },
+    }
@@ -0,0 +1,182 @@
+"""In-memory hostlist index with batched edits for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import shlex
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime
+from typing import TypedDict
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import CMD_HOSTLIST_LOAD_TEMPLATE, CMD_HOSTLIST_STAT_TEMPLATE, HOSTLIST_EDIT_WINDOW
+from .hostlist_sync import HostlistSyncError, NFQWSHostlistSync, prepare_hostlist
+from .ssh_helper import SSHHelper
+
+_LOGGER = logging.getLogger(__name__)
+
+class HostlistEditResult(TypedDict):
+    """Outcome of one batch of edits, shared by every caller in the batch."""
+    path: str
+    added: int
+    removed: int
+    entries: int
+    bytes_sent: int
+    reloaded: bool
+
+def normalize_entry(value: str) -> str:
+    """Return a hostlist entry in the form nfqws matches it."""
+    return value.strip().lower().rstrip(".")
+
+def index_entries(content: str) -> dict[str, str]:
+    """Map normalized entries to the file lines they came from, in file order."""
+    entries: dict[str, str] = {}
+    for line in filter(None, map(str.strip, content.splitlines())):
+        # Комментарии — не домены, их не нормализуем
+        key = line if line.startswith("#") else normalize_entry(line) or line
+        entries.setdefault(key, line)
+    return entries
+
+class NFQWSHostlistIndex:
+    """Router hostlist kept in memory; edits within a window become one write."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        ssh: SSHHelper,
+        path: str,
+        state_dir: str,
+        apply_changes: Callable[[], Awaitable[bool]],
+    ) -> None:
+        """Initialize the index; the file is loaded on the first edit."""
+        self.hass = hass
+        self.ssh = ssh
+        self.path = path
+        self.state_dir = state_dir
+        self._apply_changes = apply_changes
+        # Нормализованная запись -> строка файла, в исходном порядке; None — еще не загружен
+        self._entries: dict[str, str] | None = None
+        # «mtime размер» файла на момент загрузки или нашей записи
+        self._fingerprint = ""
+        self._adds: dict[str, None] = {}
+        self._removes: set[str] = set()
+        self._batch: asyncio.Future[HostlistEditResult] | None = None
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._lock = asyncio.Lock()
+
+    def __contains__(self, entry: str) -> bool:
+        """Return True if the loaded list contains the entry."""
+        return self._entries is not None and normalize_entry(entry) in self._entries
+
+    def __len__(self) -> int:
+        """Return the number of entries in the loaded list."""
+        return len(self._entries or ())
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Forget the cached list after the file was replaced by other means."""
+        self._entries = None
+
+    async def async_edit(self, add: Iterable[str], remove: Iterable[str]) -> HostlistEditResult:
+        """Queue edits and wait for the batch they end up in to be written."""
+        for entry in filter(None, map(normalize_entry, add)):
+            self._removes.discard(entry)
+            self._adds[entry] = None
+        for entry in filter(None, map(normalize_entry, remove)):
+            self._adds.pop(entry, None)
+            self._removes.add(entry)
+        if self._batch is None:
+            self._batch = self.hass.loop.create_future()
+            self._cancel_flush = async_call_later(
+                self.hass, HOSTLIST_EDIT_WINDOW, self._async_flush_later
+            )
+        return await asyncio.shield(self._batch)
+
+    @callback
+    def _async_flush_later(self, _now: datetime) -> None:
+        """Write the batch once the edit window has closed."""
+        self._cancel_flush = None
+        self.hass.async_create_background_task(self.async_flush(), f"hostlist {self.path} flush")
+
+    async def async_flush(self) -> None:
+        """Write pending edits now."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        batch, self._batch = self._batch, None
+        if batch is None:
+            return
+        adds, self._adds = self._adds, {}
+        removes, self._removes = self._removes, set()
+        try:
+            async with self._lock:
+                result = await self._async_write(adds, removes)
+        except Exception as err:
+            batch.set_exception(err)
+            # Ошибку получат вызывающие; без них не оставляем ее неполученной
+            batch.exception()
+        else:
+            batch.set_result(result)
+
+    async def _async_run(self, template: str) -> str | None:
+        """Run a command against the list file; None if the router did not answer."""
+        result = await self.ssh.async_run_command(template.format(path=shlex.quote(self.path)))
+        return None if result.exit_status is None else result.stdout
+
+    async def _async_load(self) -> None:
+        """Read the list from the router unless the cached copy is still current."""
+        if self._entries is not None:
+            fingerprint = await self._async_run(CMD_HOSTLIST_STAT_TEMPLATE)
+            if fingerprint is None:
+                raise HostlistSyncError(f"Router {self.ssh.host} is unreachable")
+            if fingerprint.strip() == self._fingerprint:
+                return
+            _LOGGER.debug("%s on %s changed outside the integration", self.path, self.ssh.host)
+        output = await self._async_run(CMD_HOSTLIST_LOAD_TEMPLATE)
+        if output is None:
+            raise HostlistSyncError(f"Router {self.ssh.host} is unreachable")
+        fingerprint, _, content = output.partition("\n")
+        self._fingerprint = fingerprint.strip()
+        self._entries = index_entries(content)
+
+    async def _async_write(
+        self, adds: dict[str, None], removes: set[str]
+    ) -> HostlistEditResult:
+        """Apply edits to the index and upload the list if it changed."""
+        await self._async_load()
+        entries = self._entries
+        added = [entry for entry in adds if entry not in entries]
+        removed = [entry for entry in removes if entry in entries]
+        result: HostlistEditResult = {
+            "path": self.path,
+            "added": len(added),
+            "removed": len(removed),
+            "entries": len(entries),
+            "bytes_sent": 0,
+            "reloaded": False,
+        }
+        if not added and not removed:
+            return result
+
+        # Сравниваем по нормализованным записям, а в файл пишем строки как были
+        updated = {key: line for key, line in entries.items() if key not in removes}
+        updated.update((entry, entry) for entry in added)
+        data = "".join(f"{line}\n" for line in updated.values()).encode()
+        hostlist = await self.hass.async_add_executor_job(prepare_hostlist, data)
+        try:
+            sync = await NFQWSHostlistSync(self.ssh, self.path, self.state_dir).async_sync(
+                hostlist
+            )
+        except HostlistSyncError:
+            # Состояние файла на роутере неизвестно — перечитаем при следующей правке
+            self._entries = None
+            raise
+        self._entries = updated
+        self._fingerprint = (await self._async_run(CMD_HOSTLIST_STAT_TEMPLATE) or "").strip()
+        result["entries"] = len(updated)
+        result["bytes_sent"] = sync["bytes_sent"]
+        # Один перезапуск на весь пакет правок
+        result["reloaded"] = await self._apply_changes()
+        return result
@@ -0,0 +1,206 @@
+"""Delta synchronization of nfqws hostlists for NFQWS HA integration."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import posixpath
+import re
+import secrets
+import shlex
+from dataclasses import dataclass
+from typing import TypedDict
+
+from .const import (
+    CMD_HOSTLIST_ASSEMBLE_TEMPLATE,
+    CMD_HOSTLIST_CLEANUP_TEMPLATE,
+    CMD_HOSTLIST_COMMIT_TEMPLATE,
+    CMD_HOSTLIST_HASH_TEMPLATE,
+    CMD_STATE_DIR_PREPARE_TEMPLATE,
+    HOSTLIST_BOUNDARY_ALPHABET,
+    HOSTLIST_CHUNK_DIVISOR,
+    HOSTLIST_CHUNK_MAX_LINES,
+    HOSTLIST_FULL_UPLOAD_RATIO,
+    HOSTLIST_SYNC_NAME_TEMPLATE,
+)
+from .ssh_helper import SSHHelper
+
+_LOGGER = logging.getLogger(__name__)
+
+_CHUNK_LINE_RE = re.compile(r"^([0-9a-f]{32})\s+(\d{6})$")
+
+HOSTLIST_SYNC_TIMEOUT = 120
+
+class HostlistSyncError(Exception):
+    """Raised when a hostlist could not be written to the router."""
+
+class HostlistSyncResult(TypedDict):
+    """Outcome of one synchronization, returned to the service caller."""
+    mode: str
+    file_size: int
+    bytes_sent: int
+    chunks: int
+    changed_chunks: int
+
+@dataclass(frozen=True)
+class HostlistChunk:
+    """A run of lines cut at a content-defined boundary."""
+    md5: str
+    lines: int
+    data: bytes
+
+@dataclass(frozen=True)
+class PreparedHostlist:
+    """Local hostlist normalized and split the same way the router splits it."""
+    md5: str
+    data: bytes
+    chunks: tuple[HostlistChunk, ...]
+
+def _is_boundary(line: bytes, count: int) -> bool:
+    """Return True if a chunk ends after this line; mirrors the awk splitter."""
+    value = len(line)
+    if value > 1:
+        # index() в awk: позиция с единицы, 0 — символ не найден
+        value += HOSTLIST_BOUNDARY_ALPHABET.find(line[1:2].decode("latin-1")) + 1
+    return value % HOSTLIST_CHUNK_DIVISOR == 0 or count >= HOSTLIST_CHUNK_MAX_LINES
+
+def prepare_hostlist(data: bytes) -> PreparedHostlist:
+    """Split a hostlist into chunks (blocking, run in the executor)."""
+    # awk дописывает перевод строки к последней строке — делаем так же
+    if data and not data.endswith(b"\n"):
+        data += b"\n"
+    chunks: list[HostlistChunk] = []
+    current: list[bytes] = []
+    for line in data.split(b"\n")[:-1]:
+        current.append(line + b"\n")
+        if _is_boundary(line, len(current)):
+            chunks.append(_make_chunk(current))
+            current = []
+    if current:
+        chunks.append(_make_chunk(current))
+    return PreparedHostlist(hashlib.md5(data).hexdigest(), data, tuple(chunks))
+
+def _make_chunk(lines: list[bytes]) -> HostlistChunk:
+    """Build a chunk from its lines."""
+    data = b"".join(lines)
+    return HostlistChunk(hashlib.md5(data).hexdigest(), len(lines), data)
+
+def parse_remote_chunks(output: str) -> tuple[str | None, dict[str, str]]:
+    """Parse the router's file hash and chunk hashes into (md5, {md5: chunk name})."""
+    file_md5: str | None = None
+    chunks: dict[str, str] = {}
+    for line in output.splitlines():
+        if line.startswith("file "):
+            file_md5 = line[5:].strip() or None
+        elif match := _CHUNK_LINE_RE.match(line.strip()):
+            chunks.setdefault(match.group(1), match.group(2))
+    return file_md5, chunks
+
+class NFQWSHostlistSync:
+    """Upload only the chunks of a hostlist that the router does not have yet."""
+
+    def __init__(self, ssh: SSHHelper, path: str, state_dir: str) -> None:
+        """Initialize the synchronizer for one remote file, staging chunks under state_dir."""
+        self.ssh = ssh
+        self.path = path
+        self.state_dir = state_dir
+        # Свой временный каталог: параллельные синхронизации не мешают друг другу
+        token = secrets.token_hex(4)
+        self.tmp = posixpath.join(
+            state_dir,
+            HOSTLIST_SYNC_NAME_TEMPLATE.format(name=posixpath.basename(path), token=token),
+        )
+        # Файл собирается рядом с целевым, чтобы mv был атомарным
+        self.staging = f"{path}.{token}.tmp"
+
+    async def _async_run(self, template: str, **kwargs: str) -> str:
+        """Run one of the sync commands, raising if it failed."""
+        command = template.format(
+            tmp=shlex.quote(self.tmp),
+            path=shlex.quote(self.path),
+            staging=shlex.quote(self.staging),
+            dir=shlex.quote(posixpath.dirname(self.path)),
+            **kwargs,
+        )
+        result = await self.ssh.async_run_command(command, HOSTLIST_SYNC_TIMEOUT)
+        if result.exit_status != 0:
+            raise HostlistSyncError(
+                f"Command failed on {self.ssh.host}: {result.stderr or result.exit_status}"
+            )
+        return result.stdout
+
+    async def _async_upload(self, path: str, data: bytes) -> int:
+        """Write a file on the router and return the number of bytes sent."""
+        if not await self.ssh.async_write_file(path, data):
+            raise HostlistSyncError(f"Failed to upload {path} to {self.ssh.host}")
+        return len(data)
+
+    async def async_sync(self, hostlist: PreparedHostlist) -> HostlistSyncResult:
+        """Compare chunk hashes and upload only the difference."""
+        try:
+            return await self._async_sync(hostlist)
+        except HostlistSyncError:
+            # Не оставляем обрывки чанков в каталоге состояния
+            await self.ssh.async_run_command(
+                CMD_HOSTLIST_CLEANUP_TEMPLATE.format(
+                    tmp=shlex.quote(self.tmp), staging=shlex.quote(self.staging)
+                )
+            )
+            raise
+
+    async def _async_sync(self, hostlist: PreparedHostlist) -> HostlistSyncResult:
+        """Run the hash, upload and assemble steps."""
+        output = await self._async_run(
+            CMD_HOSTLIST_HASH_TEMPLATE,
+            prepare=CMD_STATE_DIR_PREPARE_TEMPLATE.format(dir=shlex.quote(self.state_dir)),
+            divisor=str(HOSTLIST_CHUNK_DIVISOR),
+            max_lines=str(HOSTLIST_CHUNK_MAX_LINES),
+            alphabet=shlex.quote(HOSTLIST_BOUNDARY_ALPHABET),
+        )
+        remote_md5, remote_chunks = parse_remote_chunks(output)
+        result: HostlistSyncResult = {
+            "mode": "unchanged",
+            "file_size": len(hostlist.data),
+            "bytes_sent": 0,
+            "chunks": len(hostlist.chunks),
+            "changed_chunks": 0,
+        }
+        if remote_md5 == hostlist.md5:
+            await self._async_run(CMD_HOSTLIST_CLEANUP_TEMPLATE)
+            return result
+
+        # Манифест сборки: «a-b» — диапазон чанков роутера, «+n» — n строк из файла new
+        manifest: list[str] = []
+        changed: list[HostlistChunk] = []
+        for chunk in hostlist.chunks:
+            last = manifest[-1] if manifest else ""
+            if (name := remote_chunks.get(chunk.md5)) is not None:
+                first, _, end = last.partition("-")
+                if last and not last.startswith("+") and int(end or first) + 1 == int(name):
+                    manifest[-1] = f"{first}-{name}"
+                else:
+                    manifest.append(name)
+                continue
+            changed.append(chunk)
+            if last.startswith("+"):
+                manifest[-1] = f"+{int(last[1:]) + chunk.lines}"
+            else:
+                manifest.append(f"+{chunk.lines}")
+        new_data = b"".join(chunk.data for chunk in changed)
+        result["changed_chunks"] = len(changed)
+
+        if remote_md5 is None or len(new_data) > len(hostlist.data) * HOSTLIST_FULL_UPLOAD_RATIO:
+            result["mode"] = "full"
+            result["bytes_sent"] = await self._async_upload(self.staging, hostlist.data)
+            await self._async_run(CMD_HOSTLIST_COMMIT_TEMPLATE, md5=hostlist.md5)
+        else:
+            result["mode"] = "delta"
+            result["bytes_sent"] = await self._async_upload(f"{self.tmp}/new", new_data)
+            result["bytes_sent"] += await self._async_upload(
+                f"{self.tmp}/manifest", "".join(f"{entry}\n" for entry in manifest).encode()
+            )
+            await self._async_run(CMD_HOSTLIST_ASSEMBLE_TEMPLATE, md5=hostlist.md5)
+        _LOGGER.debug(
+            "Synced %s on %s: %s, %d of %d bytes sent",
+            self.path, self.ssh.host, result["mode"], result["bytes_sent"], result["file_size"],
+        )
+        return result
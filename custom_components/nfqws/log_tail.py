@@ -0,0 +1,102 @@
+"""Incremental nfqws log reader for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import shlex
+from collections import deque
+
+from .const import (
+    CMD_LOG_TAIL_TEMPLATE,
+    LOG_ERROR_PATTERN,
+    LOG_TAIL_INITIAL_BYTES,
+    LOG_TAIL_MAX_BYTES,
+    LOG_TAIL_RECENT_ERRORS,
+    LOG_TAIL_TIMEOUT,
+)
+from .ssh_helper import SSHHelper
+from .transport import SSHError
+
+_LOGGER = logging.getLogger(__name__)
+
+_ERROR_RE = re.compile(LOG_ERROR_PATTERN, re.IGNORECASE)
+
+class NFQWSLogTail:
+    """Fetch only the bytes appended to the router log since the previous poll."""
+
+    def __init__(
+        self, ssh: SSHHelper, path: str, max_bytes: int = LOG_TAIL_MAX_BYTES
+    ) -> None:
+        """Initialize the reader."""
+        self.ssh = ssh
+        self.path = path
+        self.max_bytes = max_bytes
+        self.inode: str | None = None
+        # -1 — позиция неизвестна, первый запрос читает только хвост файла
+        self.offset = -1
+        # Смещение указывает в середину строки — ее остаток отбрасываем
+        self._skip_partial = False
+        self.recent_errors: deque[str] = deque(maxlen=LOG_TAIL_RECENT_ERRORS)
+
+    async def async_fetch(self) -> list[str]:
+        """Read new log lines and return the error lines among them."""
+        command = CMD_LOG_TAIL_TEMPLATE.format(
+            path=shlex.quote(self.path),
+            offset=self.offset,
+            inode=shlex.quote(self.inode or "none"),
+            initial=LOG_TAIL_INITIAL_BYTES,
+            limit=self.max_bytes,
+        )
+        return await self.ssh.queue.async_run(
+            f"log_tail:{self.path}", lambda: self._async_read(command)
+        )
+
+    async def _async_read(self, command: str) -> list[str]:
+        """Stream the command output and advance the offset by complete lines."""
+        first_read = self.offset < 0
+        # Заголовок «inode смещение» плюс не более max_bytes журнала
+        stream = await self.ssh.async_open_stream(command, self.max_bytes + 64)
+        if stream is None:
+            return []
+        errors: list[str] = []
+        try:
+            header = await asyncio.wait_for(stream.async_readline(), LOG_TAIL_TIMEOUT)
+            if not header:
+                # Файла нет — начнем с начала, когда он появится
+                self.inode, self.offset = None, 0
+                return []
+            inode, _, start = header.partition(" ")
+            if inode != self.inode and self.inode is not None:
+                _LOGGER.debug("Log %s on %s was rotated", self.path, self.ssh.host)
+            self.inode, offset = inode, int(start)
+            if offset != self.offset:
+                # Первое чтение с хвоста начинается с обрывка строки, после ротации — с начала файла
+                self._skip_partial = first_read and offset > 0
+            consumed = 0
+            while True:
+                line = await asyncio.wait_for(stream.async_readline_bytes(), LOG_TAIL_TIMEOUT)
+                if line is None:
+                    break
+                if not line.endswith(b"\n"):
+                    # Незавершенную строку дочитаем в следующий раз целиком,
+                    # а не помещающуюся в лимит пропустим
+                    if not consumed and len(line) >= self.max_bytes:
+                        offset += len(line)
+                        self._skip_partial = True
+                    break
+                offset += len(line)
+                consumed += 1
+                if self._skip_partial:
+                    self._skip_partial = False
+                    continue
+                text = line.decode(errors="replace").rstrip("\r\n")
+                if _ERROR_RE.search(text):
+                    errors.append(text)
+            self.offset = offset
+        except (asyncio.TimeoutError, SSHError, ValueError) as err:
+            _LOGGER.debug("Failed to read log %s on %s: %r", self.path, self.ssh.host, err)
+        finally:
+            await stream.async_close()
+        self.recent_errors.extend(errors)
+        return errors
@@ -0,0 +1,51 @@
+"""Persistent package metadata cache for NFQWS HA integration."""
+from __future__ import annotations
+
+from typing import Any, TypedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import PACKAGE_CACHE_SAVE_DELAY, PACKAGE_CACHE_STORAGE_KEY, PACKAGE_CACHE_STORAGE_VERSION
+
+class PackageRecord(TypedDict):
+    """Cached opkg metadata of the nfqws package on one router."""
+    fingerprint: str
+    version: str
+    fields: dict[str, str]
+
+def parse_opkg_info(output: str) -> dict[str, str]:
+    """Parse `opkg info` output into a field dictionary."""
+    fields: dict[str, str] = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key and not key.startswith(" "):
+            fields.setdefault(key.strip(), value.strip())
+    return fields
+
+class NFQWSPackageCache:
+    """Package metadata of all routers, kept in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, PackageRecord]] = Store(
+            hass, PACKAGE_CACHE_STORAGE_VERSION, PACKAGE_CACHE_STORAGE_KEY
+        )
+        self._records: dict[str, PackageRecord] = {}
+
+    async def async_load(self) -> None:
+        """Load cached records from storage."""
+        self._records = await self._store.async_load() or {}
+
+    def get(self, key: str) -> PackageRecord | None:
+        """Return the cached record for a router package."""
+        return self._records.get(key)
+
+    def set(self, key: str, record: PackageRecord) -> None:
+        """Store a record and schedule writing it to disk."""
+        self._records[key] = record
+        self._store.async_delay_save(self._data_to_save, PACKAGE_CACHE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data for storage."""
+        return self._records
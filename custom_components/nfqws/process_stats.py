@@ -0,0 +1,87 @@
+"""nfqws process resource statistics for NFQWS HA integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TypedDict
+
+from .const import PROC_CLOCK_TICKS
+
+class ProcessStats(TypedDict):
+    """Resource usage of the nfqws processes published to entities."""
+    cpu_percent: float | None
+    memory_rss: int | None
+    threads: int | None
+    open_fds: int | None
+    process_uptime: int | None
+
+EMPTY_PROCESS_STATS: ProcessStats = {
+    "cpu_percent": None,
+    "memory_rss": None,
+    "threads": None,
+    "open_fds": None,
+    "process_uptime": None,
+}
+
+@dataclass(frozen=True)
+class ProcessSample:
+    """One reading of /proc for all nfqws processes on a router."""
+    pids: tuple[int, ...]
+    uptime: float
+    cpus: int
+    cpu_ticks: int
+    rss_kb: int
+    threads: int
+    open_fds: int
+    started_ticks: int
+
+def parse_process_sample(output: str) -> ProcessSample | None:
+    """Parse the output of the /proc collection script."""
+    uptime, cpus = 0.0, 1
+    pids: list[int] = []
+    cpu_ticks = rss_kb = threads = open_fds = 0
+    started_ticks: int | None = None
+    for line in output.splitlines():
+        kind, _, rest = line.partition(" ")
+        try:
+            if kind == "uptime":
+                values = rest.split()
+                uptime = float(values[0])
+                cpus = max(int(values[1]), 1) if len(values) > 1 else 1
+            elif kind == "pid":
+                head, _, stat = rest.partition(" stat=")
+                values = dict(item.split("=", 1) for item in head.split()[1:] if "=" in item)
+                # Имя процесса в скобках может содержать пробелы — режем по последней скобке
+                fields = stat.rpartition(")")[2].split()
+                cpu_ticks += int(fields[11]) + int(fields[12])
+                start = int(fields[19])
+                started_ticks = start if started_ticks is None else min(started_ticks, start)
+                rss_kb += int(values.get("VmRSS", 0))
+                threads += int(values.get("Threads", 0))
+                open_fds += int(values.get("fds", 0))
+                pids.append(int(head.split()[0]))
+        except (IndexError, ValueError):
+            continue
+    if not pids or not uptime:
+        return None
+    return ProcessSample(
+        tuple(sorted(pids)), uptime, cpus, cpu_ticks, rss_kb, threads, open_fds, started_ticks or 0
+    )
+
+def process_stats(current: ProcessSample | None, previous: ProcessSample | None) -> ProcessStats:
+    """Return entity values, with CPU usage from the delta to the previous sample."""
+    if current is None:
+        return dict(EMPTY_PROCESS_STATS)
+    cpu_percent = None
+    # После перезапуска демона счетчики начинаются заново — ждем следующего опроса
+    if previous is not None and previous.pids == current.pids and current.uptime > previous.uptime:
+        busy = (current.cpu_ticks - previous.cpu_ticks) / PROC_CLOCK_TICKS
+        cpu_percent = round(
+            max(busy, 0) / ((current.uptime - previous.uptime) * current.cpus) * 100, 1
+        )
+    return {
+        "cpu_percent": cpu_percent,
+        "memory_rss": current.rss_kb * 1024,
+        "threads": current.threads,
+        "open_fds": current.open_fds,
+        "process_uptime": max(int(current.uptime - current.started_ticks / PROC_CLOCK_TICKS), 0),
+    }
@@ -0,0 +1,85 @@
+"""NFQUEUE throughput and drop statistics for NFQWS HA integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TypedDict
+
+class QueueStats(TypedDict):
+    """NFQUEUE load published to entities."""
+    queue_packets_rate: float | None
+    queue_bytes_rate: float | None
+    queue_length: int | None
+    queue_drop_rate: float | None
+    queue_overflow_rate: float | None
+
+EMPTY_QUEUE_STATS: QueueStats = {
+    "queue_packets_rate": None,
+    "queue_bytes_rate": None,
+    "queue_length": None,
+    "queue_drop_rate": None,
+    "queue_overflow_rate": None,
+}
+
+@dataclass(frozen=True)
+class QueueSample:
+    """One reading of the kernel NFQUEUE and firewall counters on a router."""
+    uptime: float
+    queues: tuple[int, ...]
+    length: int
+    packets: int
+    overflows: int
+    drops: int
+    rule_packets: int | None
+    rule_bytes: int | None
+
+def parse_queue_sample(output: str) -> QueueSample | None:
+    """Parse the output of the NFQUEUE collection script."""
+    uptime = 0.0
+    queues: list[int] = []
+    length = packets = overflows = drops = 0
+    rule_packets: int | None = None
+    rule_bytes: int | None = None
+    for line in output.splitlines():
+        kind, _, rest = line.partition(" ")
+        values = rest.split()
+        try:
+            if kind == "uptime":
+                uptime = float(values[0])
+            elif kind == "nfq":
+                # queue portid queue_total copy_mode copy_range queue_dropped user_dropped id_sequence 1
+                queues.append(int(values[0]))
+                length += int(values[2])
+                overflows += int(values[5])
+                drops += int(values[6])
+                packets += int(values[7])
+            elif kind == "rule":
+                rule_packets = (rule_packets or 0) + int(values[0])
+                rule_bytes = (rule_bytes or 0) + int(values[1])
+        except (IndexError, ValueError):
+            continue
+    if not queues or not uptime:
+        return None
+    return QueueSample(
+        uptime, tuple(sorted(queues)), length, packets, overflows, drops, rule_packets, rule_bytes
+    )
+
+def _rate(current: int | None, previous: int | None, elapsed: float) -> float | None:
+    """Return a per-second rate, or None if a counter is missing or was reset."""
+    if current is None or previous is None or current < previous:
+        return None
+    return round((current - previous) / elapsed, 1)
+
+def queue_stats(current: QueueSample | None, previous: QueueSample | None) -> QueueStats:
+    """Return entity values, with rates from the delta to the previous sample."""
+    if current is None:
+        return dict(EMPTY_QUEUE_STATS)
+    stats: QueueStats = {**EMPTY_QUEUE_STATS, "queue_length": current.length}
+    # Очереди пересоздаются при перезапуске nfqws, счетчики начинаются с нуля
+    if previous is None or previous.queues != current.queues or current.uptime <= previous.uptime:
+        return stats
+    elapsed = current.uptime - previous.uptime
+    stats["queue_packets_rate"] = _rate(current.packets, previous.packets, elapsed)
+    stats["queue_bytes_rate"] = _rate(current.rule_bytes, previous.rule_bytes, elapsed)
+    stats["queue_drop_rate"] = _rate(current.drops, previous.drops, elapsed)
+    stats["queue_overflow_rate"] = _rate(current.overflows, previous.overflows, elapsed)
+    return stats
@@ -0,0 +1,203 @@
+"""Bypass effectiveness probes run from the router for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import re
+import shlex
+import time
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any, TypedDict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CMD_PROBE_TEMPLATE,
+    PROBE_FIRST_DELAY,
+    PROBE_MAX_OUTPUT,
+    PROBE_PARALLEL,
+    PROBE_PHASES,
+    PROBE_TIMEOUT,
+    PROBE_WINDOW,
+)
+from .ssh_helper import SSHHelper
+from .stats import LatencyStats
+from .transport import SSHError
+
+_LOGGER = logging.getLogger(__name__)
+
+_TARGET_RE = re.compile(r"^[A-Za-z0-9]([A-Za-z0-9.-]*[A-Za-z0-9])?(:\d{1,5})?$")
+
+class ProbeResult(TypedDict):
+    """Outcome of one HTTPS request to a target in the last round."""
+    ok: bool
+    exit_code: int
+    http_code: int
+    first_byte_ms: float | None
+
+def parse_probe_targets(value: str) -> list[str]:
+    """Split a comma or space separated list of host[:port] targets."""
+    targets = list(dict.fromkeys(filter(None, re.split(r"[\s,]+", value or ""))))
+    for target in targets:
+        if not _TARGET_RE.match(target):
+            raise ValueError(f"Invalid probe target: {target}")
+    return targets
+
+def parse_probe_line(line: str) -> tuple[str, ProbeResult, dict[str, float]] | None:
+    """Parse one "probe" line into the result and phase durations in seconds."""
+    # probe <цель> <код curl> <http> <time_connect> <time_appconnect> <time_starttransfer>
+    fields = line.split()
+    if len(fields) != 7 or fields[0] != "probe":
+        return None
+    try:
+        exit_code, http_code = int(fields[2]), int(fields[3])
+        connect, appconnect, first_byte = map(float, fields[4:])
+    except ValueError:
+        return None
+    ok = exit_code == 0
+    result: ProbeResult = {
+        "ok": ok,
+        "exit_code": exit_code,
+        "http_code": http_code,
+        "first_byte_ms": round(first_byte * 1000, 1) if ok else None,
+    }
+    phases = {
+        "connect": connect,
+        "tls": max(appconnect - connect, 0.0),
+        "first_byte": first_byte,
+    } if ok else {}
+    return fields[1], result, phases
+
+class NFQWSReachabilityProbe:
+    """HTTPS handshakes to configured sites, run from the router on their own cadence."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        ssh: SSHHelper,
+        targets: list[str],
+        interval: int,
+        on_round: Callable[[], None],
+    ) -> None:
+        """Initialize the probe; nothing runs until async_start."""
+        self.hass = hass
+        self.entry = entry
+        self.ssh = ssh
+        self.targets = targets
+        self.interval = timedelta(seconds=interval)
+        self._on_round = on_round
+        self.stats = LatencyStats(PROBE_WINDOW, PROBE_PHASES)
+        # Успех последних попыток по всем целям
+        self._outcomes: deque[bool] = deque(maxlen=PROBE_WINDOW)
+        self.results: dict[str, ProbeResult] = {}
+        self.rounds = 0
+        self.last_round: datetime | None = None
+        self.last_error: str | None = None
+        self._running = False
+
+    @property
+    def success_rate(self) -> float | None:
+        """Return the share of successful attempts in the window, in percent."""
+        if not self._outcomes:
+            return None
+        return round(100 * sum(self._outcomes) / len(self._outcomes), 1)
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start probing; returns a callback that stops it."""
+        cancel_first = async_call_later(self.hass, PROBE_FIRST_DELAY, self._async_tick)
+        cancel_interval = async_track_time_interval(self.hass, self._async_tick, self.interval)
+
+        @callback
+        def _async_stop() -> None:
+            cancel_first()
+            cancel_interval()
+
+        return _async_stop
+
+    @callback
+    def _async_tick(self, _now: datetime) -> None:
+        """Start a round unless the previous one is still running."""
+        if self._running:
+            return
+        self.entry.async_create_background_task(
+            self.hass, self.async_run(), f"{self.ssh.host} reachability probe"
+        )
+
+    async def async_run(self) -> None:
+        """Run one round: every target once, a few in parallel, in one SSH session."""
+        self._running = True
+        try:
+            await self._async_run()
+        finally:
+            self._running = False
+        self.rounds += 1
+        self.last_round = dt_util.utcnow()
+        self._on_round()
+
+    async def _async_run(self) -> None:
+        """Stream the results of one round from the router."""
+        command = CMD_PROBE_TEMPLATE.format(
+            targets=" ".join(map(shlex.quote, self.targets)),
+            timeout=PROBE_TIMEOUT,
+            parallel=PROBE_PARALLEL,
+        )
+        # Отдельная сессия вне очереди роутера: долгий круг не задерживает опросы
+        stream = await self.ssh.async_open_stream(command, PROBE_MAX_OUTPUT)
+        if stream is None:
+            self.last_error = "SSH connection failed"
+            return
+        # Цели идут пачками по PROBE_PARALLEL, каждая пачка — не дольше PROBE_TIMEOUT
+        batches = math.ceil(len(self.targets) / PROBE_PARALLEL)
+        deadline = time.monotonic() + PROBE_TIMEOUT * (batches + 1)
+        results: dict[str, ProbeResult] = {}
+        try:
+            while (line := await asyncio.wait_for(
+                stream.async_readline(), max(deadline - time.monotonic(), 0)
+            )) is not None:
+                if line.startswith("probe-error "):
+                    self.last_error = line[len("probe-error "):]
+                    return
+                if (parsed := parse_probe_line(line)) is None:
+                    continue
+                target, result, phases = parsed
+                results[target] = result
+                self._outcomes.append(result["ok"])
+                for phase, seconds in phases.items():
+                    self.stats.record(phase, seconds)
+        except SSHError as err:
+            self.last_error = str(err)
+            return
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Reachability probe on %s did not finish in time", self.ssh.host)
+        finally:
+            await stream.async_close()
+        # Цели без ответа (круг оборвался) считаются неудачными
+        for target in self.targets:
+            if target not in results:
+                results[target] = {
+                    "ok": False, "exit_code": -1, "http_code": 0, "first_byte_ms": None
+                }
+                self._outcomes.append(False)
+        self.results = results
+        self.last_error = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return probe state for diagnostics."""
+        return {
+            "targets": self.targets,
+            "interval": self.interval.total_seconds(),
+            "rounds": self.rounds,
+            "last_round": self.last_round.isoformat() if self.last_round else None,
+            "last_error": self.last_error,
+            "success_rate": self.success_rate,
+            "results": self.results,
+            "latency": self.stats.as_dict()["phases"],
+        }
@@ -0,0 +1,144 @@
+"""Fleet scheduler for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import FLEET_MAX_CONCURRENT_POLLS, FLEET_POLL_JITTER, FLEET_STARTUP_STAGGER
+
+if TYPE_CHECKING:
+    from .coordinator import NFQWSDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+class NFQWSFleetScheduler:
+    """Own the polls of all config entries and cap concurrent SSH sessions."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int = FLEET_MAX_CONCURRENT_POLLS,
+        jitter: float = FLEET_POLL_JITTER,
+        stagger: float = FLEET_STARTUP_STAGGER,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.max_concurrent = max_concurrent
+        self.jitter = jitter
+        self.stagger = stagger
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._timers: dict[str, Callable[[], None]] = {}
+        # Время срабатывания запланированных опросов (по часам цикла событий)
+        self._deadlines: dict[str, float] = {}
+        self._coordinators: dict[str, NFQWSDataUpdateCoordinator] = {}
+        self._warming_up = 0
+        self._waiting = 0
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of polls waiting for a free SSH slot."""
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of polls currently talking to routers."""
+        return self._in_flight
+
+    @property
+    def registered(self) -> int:
+        """Return the number of coordinators owned by the scheduler."""
+        return len(self._coordinators)
+
+    async def async_warm_up(self, coordinator: NFQWSDataUpdateCoordinator) -> None:
+        """Register a coordinator and run its first poll in a staggered slot."""
+        key = coordinator.entry.entry_id
+        self._coordinators[key] = coordinator
+        # Записи, поднимающиеся одновременно после рестарта HA, расходятся по слотам
+        delay = self._warming_up * self.stagger
+        self._warming_up += 1
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            await self._async_poll(coordinator, reschedule=False)
+        finally:
+            self._warming_up -= 1
+        if key in self._coordinators:
+            self.async_schedule(coordinator, keep_earlier=True)
+
+    @callback
+    def async_schedule(
+        self,
+        coordinator: NFQWSDataUpdateCoordinator,
+        delay: float | None = None,
+        keep_earlier: bool = False,
+    ) -> None:
+        """Plan the next poll of a coordinator; keep_earlier keeps a pending one due sooner."""
+        key = coordinator.entry.entry_id
+        if key not in self._coordinators:
+            return
+        if delay is None:
+            interval = coordinator.poll_interval.total_seconds()
+            # Разброс в пределах интервала, чтобы опросы не сбивались в кучу
+            delay = interval * (1 + random.uniform(-self.jitter, self.jitter))
+        deadline = self.hass.loop.time() + max(delay, 0)
+        if keep_earlier and self._deadlines.get(key, deadline) < deadline:
+            return
+        if cancel := self._timers.pop(key, None):
+            cancel()
+
+        @callback
+        def _async_fire(_now: datetime) -> None:
+            self._timers.pop(key, None)
+            self._deadlines.pop(key, None)
+            self.hass.async_create_background_task(
+                self._async_poll(coordinator), f"{coordinator.name} poll"
+            )
+
+        self._timers[key] = async_call_later(self.hass, max(delay, 0), _async_fire)
+        self._deadlines[key] = deadline
+
+    @callback
+    def async_unregister(self, coordinator: NFQWSDataUpdateCoordinator) -> None:
+        """Stop polling a coordinator."""
+        key = coordinator.entry.entry_id
+        self._coordinators.pop(key, None)
+        self._deadlines.pop(key, None)
+        if cancel := self._timers.pop(key, None):
+            cancel()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel all pending polls."""
+        for cancel in self._timers.values():
+            cancel()
+        self._timers.clear()
+        self._deadlines.clear()
+        self._coordinators.clear()
+
+    async def _async_poll(
+        self, coordinator: NFQWSDataUpdateCoordinator, reschedule: bool = True
+    ) -> None:
+        """Run one poll once a concurrency slot is free."""
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        try:
+            await coordinator.async_refresh()
+        except Exception as err:
+            _LOGGER.error("Scheduled poll of %s failed: %s", coordinator.name, err)
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+        if reschedule:
+            # Внеочередная проверка, назначенная во время опроса (после команды), остается
+            self.async_schedule(coordinator, keep_earlier=True)
@@ -1,15 +1,42 @@
 """Sensor platform for NFQWS HA."""
 from __future__ import annotations
 
-from homeassistant.components.sensor import SensorEntity
+from typing import Any
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfDataRate,
+    UnitOfInformation,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, FIELD_PROBES, LATENCY_PHASES, PROBE_PHASES, STATUS_FIELDS
 from .coordinator import NFQWSDataUpdateCoordinator
 
+# Ключ данных координатора: (единица, класс устройства, иконка)
+METRIC_SENSORS: dict[str, tuple[str | None, SensorDeviceClass | None, str]] = {
+    # Процесс nfqws
+    "cpu_percent": (PERCENTAGE, None, "mdi:cpu-64-bit"),
+    "memory_rss": (UnitOfInformation.BYTES, SensorDeviceClass.DATA_SIZE, "mdi:memory"),
+    "threads": (None, None, "mdi:source-branch"),
+    "open_fds": (None, None, "mdi:file-multiple-outline"),
+    "process_uptime": (UnitOfTime.SECONDS, SensorDeviceClass.DURATION, "mdi:timer-sand"),
+    # Очередь NFQUEUE
+    "queue_packets_rate": ("packets/s", None, "mdi:speedometer"),
+    "queue_bytes_rate": (
+        UnitOfDataRate.BYTES_PER_SECOND, SensorDeviceClass.DATA_RATE, "mdi:transfer"
+    ),
+    "queue_length": ("packets", None, "mdi:tray-full"),
+    "queue_drop_rate": ("packets/s", None, "mdi:package-variant-remove"),
+    "queue_overflow_rate": ("packets/s", None, "mdi:tray-alert"),
+}
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -18,14 +45,25 @@ async def async_setup_entry(
     """Set up the sensor platform."""
     coordinator: NFQWSDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    async_add_entities([NFQWSSensor(coordinator, entry)])
+    async_add_entities([
+        NFQWSSensor(coordinator, entry),
+        *(NFQWSMetricSensor(coordinator, entry, key) for key in METRIC_SENSORS),
+        NFQWSPollQueueSensor(coordinator, entry),
+        NFQWSTrafficSensor(coordinator, entry),
+        *(NFQWSLatencySensor(coordinator, entry, phase) for phase in LATENCY_PHASES),
+    ])
+    if coordinator.reachability is not None:
+        async_add_entities([
+            NFQWSProbeSuccessSensor(coordinator, entry),
+            *(NFQWSProbeLatencySensor(coordinator, entry, phase) for phase in PROBE_PHASES),
+        ])
 
 class NFQWSSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
     """Representation of an NFQWS Status Sensor."""
 
     def __init__(self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=STATUS_FIELDS)
         self._entry = entry
         self._attr_unique_id = f"{entry.entry_id}_status"
         self._attr_has_entity_name = True
@@ -36,6 +74,19 @@ class NFQWSSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
         """Return the state of the sensor."""
         return self.coordinator.data.get("status")
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return SSH circuit breaker diagnostics and recent log errors."""
+        breaker = self.coordinator.ssh.breaker
+        next_probe = breaker.next_probe
+        attributes: dict[str, Any] = {
+            "circuit_state": breaker.state,
+            "next_probe": next_probe.isoformat() if next_probe else None,
+        }
+        if (log_tail := self.coordinator.log_tail) is not None:
+            attributes["recent_errors"] = list(log_tail.recent_errors)
+        return attributes
+
     @property
     def icon(self) -> str:
         """Return the icon based on status."""
@@ -49,3 +100,224 @@ class NFQWSSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
         return {
             "identifiers": {(DOMAIN, self._entry.entry_id)},
         }
+
+class NFQWSMetricSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
+    """Numeric value collected from the router by the poll."""
+
+    def __init__(
+        self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry, key: str
+    ) -> None:
+        """Initialize the sensor."""
+        # Обновляется, только когда изменилось его значение
+        super().__init__(coordinator, context=frozenset({key}))
+        self._entry = entry
+        self._key = key
+        unit, device_class, icon = METRIC_SENSORS[key]
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = f"nfqws_{key}"
+        self._attr_device_class = device_class
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = unit
+        if device_class == SensorDeviceClass.DATA_SIZE:
+            self._attr_suggested_unit_of_measurement = UnitOfInformation.MEBIBYTES
+        elif device_class == SensorDeviceClass.DATA_RATE:
+            self._attr_suggested_unit_of_measurement = UnitOfDataRate.KIBIBYTES_PER_SECOND
+        self._attr_icon = icon
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the value from the last poll."""
+        return self.coordinator.data.get(self._key)
+
+    @property
+    def device_info(self):
+        """Return device information to link with buttons."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+        }
+
+class NFQWSPollQueueSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
+    """Diagnostic sensor with the depth of the fleet poll queue."""
+
+    def __init__(self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_poll_queue"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = "nfqws_poll_queue"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_icon = "mdi:tray-full"
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of polls waiting for a free SSH slot."""
+        return self.coordinator.scheduler.queue_depth
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return scheduler load details."""
+        scheduler = self.coordinator.scheduler
+        attributes: dict[str, Any] = {
+            "in_flight": scheduler.in_flight,
+            "max_concurrent": scheduler.max_concurrent,
+            "routers": scheduler.registered,
+        }
+        # Очередь операций этого роутера: ожидание против выполнения
+        for key, value in self.coordinator.ssh.queue.as_dict().items():
+            attributes[f"host_{key}"] = value
+        return attributes
+
+    @property
+    def device_info(self):
+        """Return device information to link with buttons."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+        }
+
+class NFQWSLatencySensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
+    """Diagnostic sensor with the p95 latency of one SSH phase."""
+
+    def __init__(
+        self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry, phase: str
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._phase = phase
+        self._attr_unique_id = f"{entry.entry_id}_latency_{phase}"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = f"nfqws_latency_{phase}"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_icon = "mdi:timer-outline"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the 95th percentile of the phase duration."""
+        percentiles = self.coordinator.ssh.stats.percentiles(self._phase)
+        return percentiles["p95"] if percentiles else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the other percentiles."""
+        return self.coordinator.ssh.stats.percentiles(self._phase) or {}
+
+    @property
+    def device_info(self):
+        """Return device information to link with buttons."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+        }
+
+class NFQWSTrafficSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
+    """Diagnostic sensor with the bytes exchanged with the router over SSH."""
+
+    def __init__(self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_ssh_traffic"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = "nfqws_ssh_traffic"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.DATA_SIZE
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfInformation.BYTES
+        self._attr_icon = "mdi:swap-vertical"
+
+    @property
+    def native_value(self) -> int:
+        """Return the total of bytes sent and received."""
+        stats = self.coordinator.ssh.stats
+        return stats.bytes_sent + stats.bytes_received
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the split between sent and received bytes."""
+        stats = self.coordinator.ssh.stats
+        return {"sent": stats.bytes_sent, "received": stats.bytes_received}
+
+    @property
+    def device_info(self):
+        """Return device information to link with buttons."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+        }
+
+class NFQWSProbeSuccessSensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
+    """Share of HTTPS requests to the probe targets that went through."""
+
+    def __init__(self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        # Обновляется только по окончании круга проверок
+        super().__init__(coordinator, context=frozenset({FIELD_PROBES}))
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_probe_success_rate"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = "nfqws_probe_success_rate"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_icon = "mdi:web-check"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the success rate over the recent attempts."""
+        return self.coordinator.reachability.success_rate
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the outcome of the last round per target."""
+        reachability = self.coordinator.reachability
+        return {
+            "targets": reachability.results,
+            "last_round": reachability.last_round.isoformat() if reachability.last_round else None,
+            "last_error": reachability.last_error,
+        }
+
+    @property
+    def device_info(self):
+        """Return device information to link with buttons."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+        }
+
+class NFQWSProbeLatencySensor(CoordinatorEntity[NFQWSDataUpdateCoordinator], SensorEntity):
+    """The p95 duration of one phase of the HTTPS probe requests."""
+
+    def __init__(
+        self, coordinator: NFQWSDataUpdateCoordinator, entry: ConfigEntry, phase: str
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, context=frozenset({FIELD_PROBES}))
+        self._entry = entry
+        self._phase = phase
+        self._attr_unique_id = f"{entry.entry_id}_probe_{phase}"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = f"nfqws_probe_{phase}"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_icon = "mdi:web-clock"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the 95th percentile of the phase duration."""
+        percentiles = self.coordinator.reachability.stats.percentiles(self._phase)
+        return percentiles["p95"] if percentiles else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the other percentiles."""
+        return self.coordinator.reachability.stats.percentiles(self._phase) or {}
+
+    @property
+    def device_info(self):
+        """Return device information to link with buttons."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+        }
@@ -0,0 +1,153 @@
+"""Services for NFQWS HA integration."""
+from __future__ import annotations
+
+import logging
+from functools import partial
+from pathlib import Path
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, HOSTLIST_DEFAULT_NAME
+from .coordinator import NFQWSDataUpdateCoordinator
+from .hostlist_sync import (
+    HostlistSyncError,
+    NFQWSHostlistSync,
+    PreparedHostlist,
+    prepare_hostlist,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_START = "start"
+SERVICE_STOP = "stop"
+SERVICE_RESTART = "restart"
+SERVICE_RELOAD = "reload"
+SERVICE_SYNC_HOSTLIST = "sync_hostlist"
+SERVICE_HOSTLIST_ADD = "hostlist_add"
+SERVICE_HOSTLIST_REMOVE = "hostlist_remove"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_SOURCE = "source"
+ATTR_TARGET = "target"
+ATTR_DOMAINS = "domains"
+ATTR_HOSTLIST = "hostlist"
+
+def _valid_target(value: str) -> str:
+    """Allow only a bare file name inside the nfqws list directory."""
+    value = cv.string(value)
+    if not value or "/" in value or value in (".", ".."):
+        raise vol.Invalid("target must be a file name without a path")
+    return value
+
+COMMAND_SCHEMA = vol.Schema({vol.Required(ATTR_ENTRY_ID): cv.string})
+
+SYNC_HOSTLIST_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_SOURCE): cv.string,
+        vol.Optional(ATTR_TARGET): _valid_target,
+    }
+)
+
+HOSTLIST_EDIT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_HOSTLIST, default=HOSTLIST_DEFAULT_NAME): _valid_target,
+    }
+)
+
+def _get_coordinator(hass: HomeAssistant, entry_id: str) -> NFQWSDataUpdateCoordinator:
+    """Return the coordinator of a loaded config entry."""
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+    if coordinator is None:
+        raise HomeAssistantError(f"NFQWS config entry {entry_id} is not loaded")
+    return coordinator
+
+def _load_hostlist(source: str) -> PreparedHostlist:
+    """Read and split a local hostlist (blocking)."""
+    return prepare_hostlist(Path(source).read_bytes())
+
+async def _async_run_command(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Start, stop, restart or reload nfqws on the router."""
+    coordinator = _get_coordinator(hass, call.data[ATTR_ENTRY_ID])
+    if not await coordinator.async_execute_command(call.service):
+        raise HomeAssistantError(f"Failed to {call.service} nfqws on {coordinator.ssh.host}")
+
+async def _async_sync_hostlist(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Upload a local hostlist to the router, sending only changed chunks."""
+    coordinator = _get_coordinator(hass, call.data[ATTR_ENTRY_ID])
+    source: str = call.data[ATTR_SOURCE]
+    if not hass.config.is_allowed_path(source):
+        raise HomeAssistantError(f"Access to {source} is not allowed, see allowlist_external_dirs")
+    try:
+        hostlist = await hass.async_add_executor_job(_load_hostlist, source)
+    except OSError as err:
+        raise HomeAssistantError(f"Cannot read {source}: {err}") from err
+
+    target = call.data.get(ATTR_TARGET) or Path(source).name
+    path = f"{coordinator.list_dir}/{target}"
+    try:
+        result = await NFQWSHostlistSync(
+            coordinator.ssh, path, coordinator.state_dir
+        ).async_sync(hostlist)
+    except HostlistSyncError as err:
+        raise HomeAssistantError(str(err)) from err
+    if (index := coordinator.hostlists.get(path)) is not None:
+        index.async_invalidate()
+    _LOGGER.info(
+        "Hostlist %s synced to %s (%s): %d of %d bytes sent",
+        source, path, result["mode"], result["bytes_sent"], result["file_size"],
+    )
+    return {"path": path, **result}
+
+async def _async_edit_hostlist(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Add or remove hostlist entries; edits from concurrent calls share one write."""
+    coordinator = _get_coordinator(hass, call.data[ATTR_ENTRY_ID])
+    index = coordinator.hostlist(call.data[ATTR_HOSTLIST])
+    domains: list[str] = call.data[ATTR_DOMAINS]
+    if call.service == SERVICE_HOSTLIST_ADD:
+        edit = index.async_edit(domains, ())
+    else:
+        edit = index.async_edit((), domains)
+    try:
+        result = await edit
+    except HostlistSyncError as err:
+        raise HomeAssistantError(str(err)) from err
+    return dict(result)
+
+_SERVICES = {
+    SERVICE_START: (_async_run_command, COMMAND_SCHEMA, SupportsResponse.NONE),
+    SERVICE_STOP: (_async_run_command, COMMAND_SCHEMA, SupportsResponse.NONE),
+    SERVICE_RESTART: (_async_run_command, COMMAND_SCHEMA, SupportsResponse.NONE),
+    SERVICE_RELOAD: (_async_run_command, COMMAND_SCHEMA, SupportsResponse.NONE),
+    SERVICE_SYNC_HOSTLIST: (
+        _async_sync_hostlist, SYNC_HOSTLIST_SCHEMA, SupportsResponse.OPTIONAL
+    ),
+    SERVICE_HOSTLIST_ADD: (_async_edit_hostlist, HOSTLIST_EDIT_SCHEMA, SupportsResponse.OPTIONAL),
+    SERVICE_HOSTLIST_REMOVE: (
+        _async_edit_hostlist, HOSTLIST_EDIT_SCHEMA, SupportsResponse.OPTIONAL
+    ),
+}
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+    for service, (handler, schema, supports_response) in _SERVICES.items():
+        if hass.services.has_service(DOMAIN, service):
+            continue
+        hass.services.async_register(
+            DOMAIN,
+            service,
+            partial(handler, hass),
+            schema=schema,
+            supports_response=supports_response,
+        )
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the integration services."""
+    for service in _SERVICES:
+        hass.services.async_remove(DOMAIN, service)
@@ -1,121 +1,502 @@
 """SSH helper for NFQWS Keenetic integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
-import paramiko
-import socket
+import re
+import secrets
+import time
+from concurrent.futures import Executor
+from collections.abc import Mapping
 from typing import Tuple
 
+from .circuit_breaker import CircuitBreaker
+from .const import (
+    BREAKER_OPEN,
+    DEFAULT_SSH_BACKEND,
+    SSH_KEEPALIVE_INTERVAL,
+    SSH_MAX_CHANNELS,
+    SSH_POOL_IDLE_TIMEOUT,
+    SSH_WORKER_THREADS,
+)
+from .transport import (
+    CommandResult,
+    SSHAuthenticationError,
+    SSHError,
+    SSHStream,
+    SSHTimeoutError,
+    SSHTransport,
+    async_load_transport,
+)
+from .stats import LatencyStats
+from .workers import HostOperationQueue, create_ssh_executor
+
 _LOGGER = logging.getLogger(__name__)
 
+_BATCH_NAME_RE = re.compile(r"^\w+$")
+
+def build_batch_script(commands: dict[str, str], marker: str) -> str:
+    """Wrap named commands into one shell script with framed output."""
+    parts = []
+    for name, command in commands.items():
+        if not _BATCH_NAME_RE.match(name):
+            raise ValueError(f"Invalid batch command name: {name}")
+        # Каждая команда — в своем подшелле, чтобы exit не оборвал весь пакет
+        parts.append(
+            f"echo '{marker} begin {name}'; echo '{marker} begin {name}' >&2\n"
+            f"( {command}\n)\n"
+            f"printf '\\n{marker} end {name} %s\\n' $?; printf '\\n{marker} end {name}\\n' >&2"
+        )
+    return "\n".join(parts)
+
+def _split_framed(output: str, marker: str) -> dict[str, tuple[str, int | None]]:
+    """Split framed output into per-command text and exit status."""
+    sections: dict[str, tuple[str, int | None]] = {}
+    name: str | None = None
+    lines: list[str] = []
+    for line in output.splitlines():
+        if line.startswith(f"{marker} begin "):
+            name, lines = line[len(marker) + 7:], []
+        elif line.startswith(f"{marker} end ") and name is not None:
+            status = line[len(marker) + 5:].partition(" ")[2]
+            sections[name] = ("\n".join(lines).strip(), int(status) if status.isdigit() else None)
+            name = None
+        elif name is not None:
+            lines.append(line)
+    return sections
+
+def parse_batch_output(
+    commands: dict[str, str], marker: str, result: CommandResult
+) -> dict[str, CommandResult]:
+    """Turn the output of a framed batch back into per-command results."""
+    stdout = _split_framed(result.stdout, marker)
+    stderr = _split_framed(result.stderr, marker)
+    results: dict[str, CommandResult] = {}
+    for name in commands:
+        out, exit_status = stdout.get(name, ("", None))
+        err = stderr.get(name, ("", None))[0]
+        if exit_status is None and not err:
+            # Пакет оборвался до этой команды
+            err = result.stderr or "Command did not run"
+        results[name] = CommandResult(out, err, exit_status)
+    return results
+
 class SSHHelper:
     """SSH connection helper class."""
 
-    def __init__(self, host: str, port: int, username: str, password: str) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        keepalive: int = 0,
+        backend: str = DEFAULT_SSH_BACKEND,
+        executor: Executor | None = None,
+    ) -> None:
         """Initialize SSH helper."""
         self.host = host
         self.port = port
         self.username = username
-        self.password = password
-        self._ssh = None
+        self.backend = backend
+        self.last_used = time.monotonic()
+        self._password = password
+        self._keepalive = keepalive
+        self._executor = executor
+        # Создается при первом подключении вместе с импортом бэкенда
+        self._transport: SSHTransport | None = None
+        # Все операции с роутером идут по очереди, одинаковые — склеиваются
+        self.queue = HostOperationQueue()
+        self.stats = LatencyStats()
+        self._lock = asyncio.Lock()
+        # Параллельные каналы одного соединения (см. async_execute_parallel)
+        self._channels = asyncio.Semaphore(SSH_MAX_CHANNELS)
+        self._in_use = 0
+        self.breaker = CircuitBreaker(f"{host}:{port}")
 
-    def connect(self) -> bool:
-        """Establish SSH connection."""
-        try:
-            self._ssh = paramiko.SSHClient()
-            self._ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            _LOGGER.debug("Connecting to %s:%s as %s", self.host, self.port, self.username)
-            
-            self._ssh.connect(
-                hostname=self.host,
-                port=self.port,
-                username=self.username,
-                password=self.password,
-                timeout=15,
-                banner_timeout=30,
-                auth_timeout=15,
+    @property
+    def password(self) -> str:
+        """Return the password used for the next connection."""
+        return self._password
+
+    @password.setter
+    def password(self, value: str) -> None:
+        """Update the password used for the next connection."""
+        self._password = value
+        if self._transport is not None:
+            self._transport.password = value
+
+    async def _async_get_transport(self) -> SSHTransport:
+        """Return the transport, importing the backend on first use (called under the lock)."""
+        if self._transport is None:
+            transport_class = await async_load_transport(self.backend)
+            self._transport = transport_class(
+                self.host,
+                self.port,
+                self.username,
+                self._password,
+                keepalive=self._keepalive,
+                executor=self._executor,
             )
-            
-            # Test connection with a simple command
-            stdin, stdout, stderr = self._ssh.exec_command("echo connected", timeout=10)
-            output = stdout.read().decode().strip()
-            
-            if output == "connected":
-                _LOGGER.debug("SSH connection established successfully")
+            self._transport.stats = self.stats
+        return self._transport
+
+    async def async_connect(self) -> bool:
+        """Establish SSH connection (reuses the current one if it is still alive)."""
+        async with self._lock:
+            if self.is_connected:
                 return True
-            else:
-                _LOGGER.error("SSH connection test failed")
+            if not self.breaker.allow():
+                _LOGGER.debug("Circuit for %s is open, skipping connection attempt", self.host)
                 return False
-                
-        except paramiko.AuthenticationException:
-            _LOGGER.error("SSH authentication failed for user %s", self.username)
+            try:
+                # Мертвый транспорт закрываем перед переподключением
+                await self._async_close_transport()
+                connected = await self._async_connect()
+            except BaseException:
+                # Отмененная попытка ничего не сказала о роутере — следующая может пройти
+                self.breaker.release_probe()
+                raise
+            if connected:
+                self.breaker.record_success()
+                return True
+            self.breaker.record_failure()
             return False
-        except paramiko.SSHException as err:
-            _LOGGER.error("SSH error: %s", err)
+
+    async def _async_connect(self) -> bool:
+        """Open a new SSH connection."""
+        try:
+            _LOGGER.debug(
+                "Connecting to %s:%s as %s (%s)",
+                self.host, self.port, self.username, self.backend,
+            )
+            transport = await self._async_get_transport()
+            await transport.async_connect()
+            _LOGGER.debug("SSH connection established successfully")
+            return True
+
+        except SSHAuthenticationError:
+            _LOGGER.error("SSH authentication failed for user %s", self.username)
             return False
-        except socket.timeout:
+        except SSHTimeoutError:
             _LOGGER.error("SSH connection timeout to %s:%s", self.host, self.port)
             return False
-        except socket.error as err:
-            _LOGGER.error("Socket error connecting to %s:%s: %s", self.host, self.port, err)
+        except SSHError as err:
+            _LOGGER.error("SSH error connecting to %s:%s: %s", self.host, self.port, err)
             return False
         except Exception as err:
             _LOGGER.error("Unexpected SSH error: %s", err)
             return False
 
-    def execute_command(self, command: str, timeout: int = 30) -> Tuple[str, str]:
+    async def async_execute_command(self, command: str, timeout: int = 30) -> Tuple[str, str]:
         """Execute command via SSH."""
-        stdout_data, stderr_data = "", ""
-        
-        if not self._ssh or not self.is_connected:
-            if not self.connect():
-                return "", "SSH connection failed"
-        
+        result = await self.async_run_command(command, timeout)
+        return result.stdout, result.stderr
+
+    async def async_execute_batch(
+        self, commands: dict[str, str], timeout: int = 30
+    ) -> dict[str, CommandResult]:
+        """Execute several named commands in a single remote shell invocation."""
+        async def _async_run_batch() -> dict[str, CommandResult]:
+            marker = f"__nfqws_{secrets.token_hex(8)}__"
+            result = await self._async_run_tracked(build_batch_script(commands, marker), timeout)
+            return parse_batch_output(commands, marker, result)
+
+        # Одинаковые пакеты от разных записей выполняются один раз
+        key = "batch:" + "\n".join(f"{name}={cmd}" for name, cmd in commands.items())
+        return await self.queue.async_run(key, _async_run_batch)
+
+    async def async_execute_parallel(
+        self,
+        commands: dict[str, str],
+        timeouts: Mapping[str, int] | None = None,
+        timeout: int = 30,
+    ) -> dict[str, CommandResult]:
+        """Run independent named commands on parallel channels of one connection.
+
+        Every command gets its own exec channel and timeout (``timeouts`` by
+        name, ``timeout`` otherwise), so a slow command neither delays nor
+        fails the others.
+        """
+        limits = {name: (timeouts or {}).get(name, timeout) for name in commands}
+
+        async def _async_run_parallel() -> dict[str, CommandResult]:
+            self._in_use += 1
+            self.last_used = time.monotonic()
+            try:
+                return await self._async_run_parallel(commands, limits)
+            finally:
+                self._in_use -= 1
+                self.last_used = time.monotonic()
+
+        # Одинаковые наборы от разных записей выполняются один раз
+        key = "parallel:" + "\n".join(f"{name}={cmd}" for name, cmd in commands.items())
+        return await self.queue.async_run(key, _async_run_parallel)
+
+    async def _async_run_parallel(
+        self, commands: dict[str, str], limits: dict[str, int], retry: bool = True
+    ) -> dict[str, CommandResult]:
+        """Gather commands over the current transport, reconnecting once if it died."""
+        if not await self.async_connect():
+            error = (
+                "SSH circuit open" if self.breaker.state == BREAKER_OPEN
+                else "SSH connection failed"
+            )
+            return {name: CommandResult("", error, None) for name in commands}
+
+        results = dict(zip(commands, await asyncio.gather(*(
+            self._async_exec_channel(command, limits[name])
+            for name, command in commands.items()
+        ))))
+        failed = {name: commands[name] for name, result in results.items()
+                  if result.exit_status is None}
+        if failed and retry and not self.is_connected:
+            # Роутер мог перезагрузиться — повторяем только то, что не выполнилось
+            _LOGGER.debug("SSH transport to %s is dead, reconnecting", self.host)
+            results.update(await self._async_run_parallel(failed, limits, retry=False))
+        elif failed and len(failed) == len(results):
+            # Один отказ на весь набор, как у одиночной команды
+            await self._async_record_failure()
+        else:
+            self.breaker.record_success()
+        return results
+
+    async def _async_exec_channel(self, command: str, timeout: int) -> CommandResult:
+        """Run one command on its own channel; errors become a result without status."""
+        async with self._channels:
+            try:
+                _LOGGER.debug("Executing command on a parallel channel: %s", command)
+                return await self._transport.async_exec(command, timeout)
+            except SSHTimeoutError:
+                _LOGGER.warning("SSH command timeout after %s s: %s", timeout, command)
+                return CommandResult("", "Command timeout", None)
+            except SSHError as err:
+                _LOGGER.debug("SSH command error: %s", err)
+                return CommandResult("", str(err), None)
+            except Exception as err:
+                _LOGGER.error("Unexpected command error: %s", err)
+                return CommandResult("", str(err), None)
+
+    async def async_run_command(
+        self, command: str, timeout: int = 30, coalesce_key: str | None = None
+    ) -> CommandResult:
+        """Execute command via SSH and return its output and exit status."""
+        return await self.queue.async_run(
+            coalesce_key, lambda: self._async_run_tracked(command, timeout)
+        )
+
+    async def _async_run_tracked(self, command: str, timeout: int) -> CommandResult:
+        """Run a command while marking the connection as busy."""
+        self._in_use += 1
+        self.last_used = time.monotonic()
+        try:
+            return await self._async_run_command(command, timeout)
+        finally:
+            self._in_use -= 1
+            self.last_used = time.monotonic()
+
+    async def _async_run_command(
+        self, command: str, timeout: int, retry: bool = True
+    ) -> CommandResult:
+        """Run a command, reconnecting once if the pooled transport turned out to be dead."""
+        if not await self.async_connect():
+            if self.breaker.state == BREAKER_OPEN:
+                return CommandResult("", "SSH circuit open", None)
+            return CommandResult("", "SSH connection failed", None)
+
         try:
             _LOGGER.debug("Executing command: %s", command)
-            stdin, stdout, stderr = self._ssh.exec_command(command, timeout=timeout)
-            stdout_data = stdout.read().decode().strip()
-            stderr_data = stderr.read().decode().strip()
-            
-            if stderr_data:
-                _LOGGER.debug("Command stderr: %s", stderr_data)
-            if stdout_data:
-                _LOGGER.debug("Command stdout: %s", stdout_data)
-                
-        except paramiko.SSHException as err:
-            _LOGGER.error("SSH command error: %s", err)
-            stderr_data = str(err)
-        except socket.timeout:
+            result = await self._transport.async_exec(command, timeout)
+
+            if result.stderr:
+                _LOGGER.debug("Command stderr: %s", result.stderr)
+            if result.stdout:
+                _LOGGER.debug("Command stdout: %s", result.stdout)
+            self.breaker.record_success()
+            return result
+
+        except SSHTimeoutError:
             _LOGGER.error("SSH command timeout")
-            stderr_data = "Command timeout"
+            await self._async_record_failure()
+            return CommandResult("", "Command timeout", None)
+        except SSHError as err:
+            # Роутер мог перезагрузиться, а транспорт еще не заметил этого
+            if retry and not self.is_connected:
+                _LOGGER.debug("SSH transport to %s is dead, reconnecting", self.host)
+                return await self._async_run_command(command, timeout, retry=False)
+            _LOGGER.error("SSH command error: %s", err)
+            await self._async_record_failure()
+            return CommandResult("", str(err), None)
         except Exception as err:
             _LOGGER.error("Unexpected command error: %s", err)
-            stderr_data = str(err)
-        
-        return stdout_data, stderr_data
+            return CommandResult("", str(err), None)
 
-    @property
-    def is_connected(self) -> bool:
-        """Check if SSH connection is active."""
-        if not self._ssh:
+    async def _async_record_failure(self) -> None:
+        """Count a failed command; drop the connection once the circuit opens."""
+        self.breaker.record_failure()
+        if self.breaker.state != BREAKER_OPEN:
+            return
+        # Следующие попытки пойдут через проверку breaker в async_connect
+        async with self._lock:
+            await self._async_close_transport()
+
+    async def async_open_stream(
+        self, command: str, max_bytes: int | None = None
+    ) -> SSHStream | None:
+        """Start a command on the pooled connection and iterate over its output lines.
+
+        max_bytes bounds the output kept in memory; the stream ends early and
+        sets ``truncated`` once the cap is reached. Streams bypass the host
+        queue: the watch channel and probe rounds live for minutes and would
+        block every poll. Callers that read a short stream in turn with other
+        work (like the log tail) open it from inside ``queue.async_run``.
+        """
+        # Открытый поток держит соединение занятым, пока не дочитан или не закрыт
+        self._in_use += 1
+        self.last_used = time.monotonic()
+        stream: SSHStream | None = None
+        try:
+            if await self.async_connect():
+                _LOGGER.debug("Opening stream: %s", command)
+                stream = await self._transport.async_open_stream(command, max_bytes)
+        except SSHError as err:
+            _LOGGER.warning("Failed to open SSH stream to %s: %s", self.host, err)
+        finally:
+            if stream is None:
+                self._release()
+        if stream is not None:
+            stream.on_release = self._release
+        return stream
+
+    def _release(self) -> None:
+        """Mark the end of an operation that kept the connection busy."""
+        self._in_use -= 1
+        self.last_used = time.monotonic()
+
+    async def async_write_file(self, path: str, data: bytes) -> bool:
+        """Upload data to a file on the router over the pooled connection."""
+        # Загрузка идет в общей очереди роутера, как и команды
+        return await self.queue.async_run(None, lambda: self._async_write_file(path, data))
+
+    async def _async_write_file(self, path: str, data: bytes) -> bool:
+        """Upload a file while marking the connection as busy."""
+        if not await self.async_connect():
             return False
+        self._in_use += 1
+        self.last_used = time.monotonic()
         try:
-            transport = self._ssh.get_transport()
-            return transport and transport.is_active()
-        except Exception:
+            _LOGGER.debug("Writing %d bytes to %s", len(data), path)
+            await self._transport.async_write_file(path, data)
+            self.breaker.record_success()
+            return True
+        except SSHError as err:
+            _LOGGER.warning("Failed to write %s on %s: %s", path, self.host, err)
+            await self._async_record_failure()
             return False
+        finally:
+            self._in_use -= 1
+            self.last_used = time.monotonic()
+
+    @property
+    def is_connected(self) -> bool:
+        """Check if SSH connection is active."""
+        return self._transport is not None and self._transport.is_connected
+
+    @property
+    def is_idle(self) -> bool:
+        """Return True if no command is running on this connection."""
+        return self._in_use == 0
 
-    def disconnect(self) -> None:
+    async def async_disconnect(self) -> None:
         """Close SSH connection."""
-        if self._ssh:
-            try:
-                self._ssh.close()
-            except Exception as err:
-                _LOGGER.debug("Error closing SSH connection: %s", err)
-            finally:
-                self._ssh = None
+        async with self._lock:
+            await self._async_close_transport()
+
+    async def _async_close_transport(self) -> None:
+        """Close the transport, ignoring errors."""
+        if self._transport is None:
+            return
+        try:
+            await self._transport.async_close()
+        except Exception as err:
+            _LOGGER.debug("Error closing SSH connection: %s", err)
+
+class SSHConnectionPool:
+    """Pool of persistent SSH connections shared by host/port/user."""
+
+    def __init__(
+        self,
+        keepalive: int = SSH_KEEPALIVE_INTERVAL,
+        idle_timeout: int = SSH_POOL_IDLE_TIMEOUT,
+        max_workers: int = SSH_WORKER_THREADS,
+    ) -> None:
+        """Initialize the pool."""
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        # Собственный пул потоков, чтобы не конкурировать с остальным HA
+        self.executor = create_ssh_executor(max_workers)
+        self._helpers: dict[tuple[str, int, str, str], SSHHelper] = {}
+        self._refs: dict[tuple[str, int, str, str], int] = {}
+
+    def acquire(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        backend: str = DEFAULT_SSH_BACKEND,
+    ) -> SSHHelper:
+        """Return the shared helper for a router, creating it on first use."""
+        key = (host, port, username, backend)
+        helper = self._helpers.get(key)
+        if helper is None:
+            helper = SSHHelper(
+                host,
+                port,
+                username,
+                password,
+                keepalive=self.keepalive,
+                backend=backend,
+                executor=self.executor,
+            )
+            self._helpers[key] = helper
+        elif helper.password != password:
+            # Пароль поменяли в другой записи — используем его при следующем подключении
+            helper.password = password
+        self._refs[key] = self._refs.get(key, 0) + 1
+        return helper
+
+    async def async_release(self, helper: SSHHelper) -> None:
+        """Drop a reference; the connection is closed when nobody uses it anymore."""
+        key = (helper.host, helper.port, helper.username, helper.backend)
+        refs = self._refs.get(key, 0) - 1
+        if refs > 0:
+            self._refs[key] = refs
+            return
+        self._refs.pop(key, None)
+        self._helpers.pop(key, None)
+        await helper.async_disconnect()
+
+    async def async_evict_idle(self) -> int:
+        """Close connections that were not used for longer than the idle timeout."""
+        now = time.monotonic()
+        evicted = 0
+        for helper in list(self._helpers.values()):
+            if (
+                helper.is_connected
+                and helper.is_idle
+                and now - helper.last_used > self.idle_timeout
+            ):
+                _LOGGER.debug("Closing idle SSH connection to %s:%s", helper.host, helper.port)
+                await helper.async_disconnect()
+                evicted += 1
+        return evicted
 
-    def __del__(self) -> None:
-        """Destructor to ensure connection is closed."""
-        self.disconnect()
\ No newline at end of file
+    async def async_close(self) -> None:
+        """Close all pooled connections."""
+        helpers = list(self._helpers.values())
+        self._helpers.clear()
+        self._refs.clear()
+        for helper in helpers:
+            await helper.async_disconnect()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,42 @@
+"""Persistent last-known router state for NFQWS HA integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import STATE_CACHE_SAVE_DELAY, STATE_CACHE_STORAGE_KEY, STATE_CACHE_STORAGE_VERSION
+
+class NFQWSStateCache:
+    """Last polled data of every config entry, kept in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STATE_CACHE_STORAGE_VERSION, STATE_CACHE_STORAGE_KEY
+        )
+        self._states: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load saved states from storage."""
+        self._states = await self._store.async_load() or {}
+
+    def get(self, entry_id: str) -> dict[str, Any] | None:
+        """Return the saved state of a config entry."""
+        return self._states.get(entry_id)
+
+    def set(self, entry_id: str, state: dict[str, Any]) -> None:
+        """Remember a state and schedule writing it to disk."""
+        self._states[entry_id] = state
+        # Частые опросы сливаются в одну запись на диск
+        self._store.async_delay_save(self._data_to_save, STATE_CACHE_SAVE_DELAY)
+
+    def remove(self, entry_id: str) -> None:
+        """Forget the state of a removed config entry."""
+        if self._states.pop(entry_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, STATE_CACHE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data for storage."""
+        return self._states
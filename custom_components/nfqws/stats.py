@@ -0,0 +1,72 @@
+"""Latency statistics for NFQWS HA integration."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from .const import LATENCY_PHASES, LATENCY_WINDOW
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of already sorted samples."""
+    index = max(int(round(pct / 100 * len(samples) + 0.5)) - 1, 0)
+    return samples[min(index, len(samples) - 1)]
+
+class LatencyStats:
+    """Rolling per-phase latency samples and byte counters for one router."""
+
+    def __init__(
+        self, window: int = LATENCY_WINDOW, phases: tuple[str, ...] = LATENCY_PHASES
+    ) -> None:
+        """Initialize the statistics."""
+        self.phases = phases
+        self._samples: dict[str, deque[float]] = {
+            phase: deque(maxlen=window) for phase in phases
+        }
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # Замеры paramiko приходят из потоков исполнителя
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Add one sample for a phase."""
+        with self._lock:
+            self._samples[phase].append(seconds)
+
+    def record_since(self, phase: str, started: float) -> float:
+        """Add a sample measured from a time.monotonic() start point."""
+        now = time.monotonic()
+        self.record(phase, now - started)
+        return now
+
+    def record_bytes(self, sent: int, received: int) -> None:
+        """Count bytes of commands sent and output received."""
+        with self._lock:
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def samples(self, phase: str) -> list[float]:
+        """Return a copy of the samples of a phase in seconds."""
+        with self._lock:
+            return list(self._samples[phase])
+
+    def percentiles(self, phase: str) -> dict[str, Any] | None:
+        """Return p50/p95/p99 in milliseconds, or None without samples."""
+        samples = sorted(self.samples(phase))
+        if not samples:
+            return None
+        return {
+            "p50": round(percentile(samples, 50) * 1000, 1),
+            "p95": round(percentile(samples, 95) * 1000, 1),
+            "p99": round(percentile(samples, 99) * 1000, 1),
+            "samples": len(samples),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all statistics."""
+        return {
+            "phases": {phase: self.percentiles(phase) for phase in self.phases},
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
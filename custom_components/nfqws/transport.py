@@ -0,0 +1,207 @@
+"""SSH transport backends for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+from .const import SSH_BACKEND_ASYNCSSH, SSH_BACKEND_PARAMIKO
+from .stats import LatencyStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Таймауты подключения одинаковы для всех бэкендов
+CONNECT_TIMEOUT = 15
+BANNER_TIMEOUT = 30
+AUTH_TIMEOUT = 15
+STREAM_CHUNK_SIZE = 4096
+FILE_WRITE_TIMEOUT = 120
+
+class SSHError(Exception):
+    """Base error raised by SSH transports."""
+
+class SSHAuthenticationError(SSHError):
+    """Raised when the router rejects the credentials."""
+
+class SSHTimeoutError(SSHError):
+    """Raised when connecting or running a command timed out."""
+
+@dataclass(frozen=True)
+class CommandResult:
+    """Output of a remote command."""
+
+    stdout: str
+    stderr: str
+    # None — команда не выполнялась (например, оборвалось соединение)
+    exit_status: int | None
+
+class SSHStream:
+    """Line-oriented reader for the output of a remote command."""
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        """Initialize the stream; max_bytes caps the output handed to the caller."""
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        # True, если вывод был обрезан по лимиту max_bytes
+        self.truncated = False
+        self._buffer = b""
+        self._eof = False
+        # Вызывается один раз, когда поток дочитан или закрыт (соединение освобождено)
+        self.on_release: Callable[[], None] | None = None
+
+    async def _async_read_chunk(self) -> bytes:
+        """Return the next piece of output, or b"" at end of stream."""
+        raise NotImplementedError
+
+    def _release(self) -> None:
+        """Tell the owner, once, that the stream no longer uses the connection."""
+        if self.on_release is not None:
+            on_release, self.on_release = self.on_release, None
+            on_release()
+
+    def _over_cap(self, size: int) -> bool:
+        """Return True if handing out size more bytes would exceed the cap."""
+        return self.max_bytes is not None and self.bytes_read + size > self.max_bytes
+
+    async def async_readline_bytes(self) -> bytes | None:
+        """Return the next raw line including its newline, or None at the end or the cap."""
+        # Буфер растет не дальше лимита, даже если строка без перевода строки
+        while b"\n" not in self._buffer and not self._eof and not self._over_cap(len(self._buffer)):
+            chunk = await self._async_read_chunk()
+            if chunk:
+                self._buffer += chunk
+            else:
+                self._eof = True
+        if b"\n" in self._buffer:
+            line, sep, self._buffer = self._buffer.partition(b"\n")
+            line += sep
+        else:
+            line, self._buffer = self._buffer, b""
+        if not line:
+            self._release()
+            return None
+        if self._over_cap(len(line)):
+            self.truncated = True
+            self._eof = True
+            self._buffer = b""
+            self._release()
+            return None
+        self.bytes_read += len(line)
+        return line
+
+    async def async_readline(self) -> str | None:
+        """Return the next line without the newline, or None at end of stream."""
+        line = await self.async_readline_bytes()
+        if line is None:
+            return None
+        return line.decode(errors="replace").rstrip("\r\n")
+
+    async def async_close(self) -> None:
+        """Stop the remote command and close the channel."""
+        try:
+            await self._async_close_channel()
+        finally:
+            self._release()
+
+    async def _async_close_channel(self) -> None:
+        """Close the backend channel."""
+        raise NotImplementedError
+
+    def __aiter__(self) -> SSHStream:
+        """Iterate over the lines of the stream."""
+        return self
+
+    async def __anext__(self) -> str:
+        """Return the next line."""
+        line = await self.async_readline()
+        if line is None:
+            raise StopAsyncIteration
+        return line
+
+class SSHTransport:
+    """Base class for SSH transport backends."""
+
+    name = ""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        keepalive: int = 0,
+        executor: Executor | None = None,
+    ) -> None:
+        """Initialize the transport."""
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        # Пул потоков для блокирующих бэкендов; None — исполнитель цикла по умолчанию
+        self.executor = executor
+        # Замеры фаз подключения и выполнения команд (задаются SSHHelper)
+        self.stats: LatencyStats | None = None
+
+    def _record(self, phase: str, started: float) -> float:
+        """Record the duration of a phase and return the current time."""
+        if self.stats is None:
+            return time.monotonic()
+        return self.stats.record_since(phase, started)
+
+    def _record_bytes(self, sent: int, received: int) -> None:
+        """Count bytes sent to and received from the router."""
+        if self.stats is not None:
+            self.stats.record_bytes(sent, received)
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if the underlying connection is alive."""
+        raise NotImplementedError
+
+    async def async_connect(self) -> None:
+        """Open the connection and authenticate."""
+        raise NotImplementedError
+
+    async def async_exec(self, command: str, timeout: int) -> CommandResult:
+        """Run a command and return its output and exit status."""
+        raise NotImplementedError
+
+    async def async_open_stream(self, command: str, max_bytes: int | None = None) -> SSHStream:
+        """Start a command and return a reader for its stdout."""
+        raise NotImplementedError
+
+    async def async_write_file(self, path: str, data: bytes) -> None:
+        """Write a remote file over SFTP, or through `cat` if the server has no SFTP."""
+        raise NotImplementedError
+
+    async def async_close(self) -> None:
+        """Close the connection."""
+        raise NotImplementedError
+
+# Бэкенды подгружаются при первом подключении: paramiko и asyncssh вместе с
+# cryptography заметно замедляют старт HA, даже если роутер еще не нужен
+TRANSPORTS: dict[str, str] = {
+    SSH_BACKEND_PARAMIKO: f"{__package__}.transport_paramiko",
+    SSH_BACKEND_ASYNCSSH: f"{__package__}.transport_asyncssh",
+}
+
+def load_transport(backend: str) -> type[SSHTransport]:
+    """Import a backend module and return its transport class (blocking)."""
+    return importlib.import_module(TRANSPORTS[backend]).TRANSPORT
+
+async def async_load_transport(backend: str) -> type[SSHTransport]:
+    """Return the transport class of a backend, importing it in the executor."""
+    # Модуль может быть еще не дочитан другим потоком — тогда ждем импорт как обычно
+    transport = getattr(sys.modules.get(TRANSPORTS[backend]), "TRANSPORT", None)
+    if transport is not None:
+        return transport
+    started = time.monotonic()
+    transport = await asyncio.get_running_loop().run_in_executor(None, load_transport, backend)
+    _LOGGER.debug("Loaded %s backend in %.3f s", backend, time.monotonic() - started)
+    return transport
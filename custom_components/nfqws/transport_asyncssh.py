@@ -0,0 +1,208 @@
+"""SSH transport built on asyncssh for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import shlex
+import socket
+import time
+from typing import Any
+
+import asyncssh
+
+from .const import SSH_BACKEND_ASYNCSSH
+from .transport import (
+    AUTH_TIMEOUT,
+    BANNER_TIMEOUT,
+    CONNECT_TIMEOUT,
+    FILE_WRITE_TIMEOUT,
+    STREAM_CHUNK_SIZE,
+    CommandResult,
+    SSHAuthenticationError,
+    SSHError,
+    SSHStream,
+    SSHTimeoutError,
+    SSHTransport,
+)
+
+class AsyncSSHStream(SSHStream):
+    """Stream over an asyncssh process."""
+
+    def __init__(
+        self, process: asyncssh.SSHClientProcess, max_bytes: int | None = None
+    ) -> None:
+        """Initialize the stream."""
+        super().__init__(max_bytes)
+        self._process = process
+
+    async def _async_read_chunk(self) -> bytes:
+        """Return the next piece of output, or b"" at end of stream."""
+        try:
+            return await self._process.stdout.read(STREAM_CHUNK_SIZE)
+        except (asyncssh.Error, OSError) as err:
+            raise SSHError(str(err)) from err
+
+    async def _async_close_channel(self) -> None:
+        """Stop the remote command and close the channel."""
+        self._process.close()
+        await self._process.wait_closed()
+
+class _AsyncSSHClient(asyncssh.SSHClient):
+    """asyncssh client callbacks: handshake phase timing and connection loss."""
+
+    def __init__(self, transport: AsyncSSHTransport, started: float) -> None:
+        """Initialize the client."""
+        self._transport = transport
+        self._started = started
+        self._asked = False
+
+    def password_auth_requested(self) -> str | None:
+        """Return the password once; the key exchange is over at this point."""
+        if self._asked:
+            return None
+        self._asked = True
+        self._started = self._transport._record("kex", self._started)
+        return self._transport.password
+
+    def auth_completed(self) -> None:
+        """Record the authentication phase."""
+        self._transport._record("auth", self._started)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Mark the transport as disconnected."""
+        self._transport.connection_lost()
+
+class AsyncSSHTransport(SSHTransport):
+    """Native asyncio transport built on asyncssh."""
+
+    name = SSH_BACKEND_ASYNCSSH
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the transport."""
+        super().__init__(*args, **kwargs)
+        self._conn: asyncssh.SSHClientConnection | None = None
+        self._closed = False
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if the asyncssh connection is open."""
+        return self._conn is not None and not self._closed
+
+    def connection_lost(self) -> None:
+        """Handle the connection being closed by either side."""
+        self._closed = True
+
+    async def _async_open_socket(self) -> socket.socket:
+        """Open the TCP connection ourselves so it can be timed separately."""
+        loop = asyncio.get_running_loop()
+        error: OSError = OSError(f"Cannot resolve {self.host}")
+        for family, type_, proto, _, address in await loop.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_STREAM
+        ):
+            sock = socket.socket(family, type_, proto)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, address)
+                return sock
+            except OSError as err:
+                sock.close()
+                error = err
+        raise error
+
+    async def async_connect(self) -> None:
+        """Open the connection and authenticate."""
+        started = time.monotonic()
+        try:
+            sock = await asyncio.wait_for(self._async_open_socket(), CONNECT_TIMEOUT)
+        except asyncio.TimeoutError as err:
+            raise SSHTimeoutError(f"Connection timeout to {self.host}:{self.port}") from err
+        except OSError as err:
+            raise SSHError(str(err)) from err
+        started = self._record("tcp_connect", started)
+        self._closed = False
+        try:
+            self._conn = await asyncssh.connect(
+                self.host,
+                port=self.port,
+                sock=sock,
+                username=self.username,
+                # Пароль отдает клиент из колбэка, чтобы отметить конец обмена ключами
+                client_factory=lambda: _AsyncSSHClient(self, started),
+                client_keys=None,
+                preferred_auth="password",
+                # Роутеры не публикуют ключи хоста, как и в paramiko (AutoAddPolicy)
+                known_hosts=None,
+                connect_timeout=BANNER_TIMEOUT + AUTH_TIMEOUT,
+                keepalive_interval=self.keepalive,
+            )
+        except asyncssh.PermissionDenied as err:
+            raise SSHAuthenticationError(str(err)) from err
+        except asyncio.TimeoutError as err:
+            sock.close()
+            raise SSHTimeoutError(f"Connection timeout to {self.host}:{self.port}") from err
+        except (asyncssh.Error, OSError) as err:
+            sock.close()
+            raise SSHError(str(err)) from err
+
+    async def async_exec(self, command: str, timeout: int) -> CommandResult:
+        """Run a command and return its output and exit status."""
+        if not self._conn:
+            raise SSHError("Not connected")
+        started = time.monotonic()
+        try:
+            process = await asyncio.wait_for(self._conn.create_process(command), timeout)
+            started = self._record("channel_open", started)
+            result = await process.wait(check=False, timeout=timeout)
+        except (asyncio.TimeoutError, asyncssh.TimeoutError) as err:
+            raise SSHTimeoutError("Command timeout") from err
+        except (asyncssh.Error, OSError) as err:
+            raise SSHError(str(err)) from err
+        self._record("command", started)
+        stdout, stderr = str(result.stdout or ""), str(result.stderr or "")
+        self._record_bytes(len(command.encode()), len(stdout.encode()) + len(stderr.encode()))
+        return CommandResult(stdout.strip(), stderr.strip(), result.exit_status)
+
+    async def async_open_stream(self, command: str, max_bytes: int | None = None) -> SSHStream:
+        """Start a command and return a reader for its stdout."""
+        if not self._conn:
+            raise SSHError("Not connected")
+        try:
+            # Байтовый режим: лимит и смещения считаются в байтах, а не символах
+            process = await self._conn.create_process(command, encoding=None)
+            return AsyncSSHStream(process, max_bytes)
+        except (asyncssh.Error, OSError) as err:
+            raise SSHError(str(err)) from err
+
+    async def async_write_file(self, path: str, data: bytes) -> None:
+        """Write a remote file over SFTP, or through `cat` if the server has no SFTP."""
+        if not self._conn:
+            raise SSHError("Not connected")
+        try:
+            try:
+                async with self._conn.start_sftp_client() as sftp:
+                    async with sftp.open(path, "wb") as remote:
+                        await remote.write(data)
+            except asyncssh.ChannelOpenError:
+                # Dropbear без sftp-server: передаем данные через stdin
+                result = await self._conn.run(
+                    f"cat > {shlex.quote(path)}",
+                    input=data,
+                    encoding=None,
+                    check=False,
+                    timeout=FILE_WRITE_TIMEOUT,
+                )
+                if result.exit_status != 0:
+                    raise SSHError(f"Writing {path} failed with status {result.exit_status}")
+        except (asyncio.TimeoutError, asyncssh.TimeoutError) as err:
+            raise SSHTimeoutError("File write timeout") from err
+        except (asyncssh.Error, OSError) as err:
+            raise SSHError(str(err)) from err
+        self._record_bytes(len(data), 0)
+
+    async def async_close(self) -> None:
+        """Close the connection."""
+        conn, self._conn = self._conn, None
+        if conn:
+            conn.close()
+            await conn.wait_closed()
+
+TRANSPORT = AsyncSSHTransport
@@ -0,0 +1,217 @@
+"""SSH transport built on paramiko for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import shlex
+import socket
+import time
+from typing import Any, Callable, TypeVar
+
+import paramiko
+
+from .const import SSH_BACKEND_PARAMIKO
+from .transport import (
+    AUTH_TIMEOUT,
+    BANNER_TIMEOUT,
+    CONNECT_TIMEOUT,
+    FILE_WRITE_TIMEOUT,
+    STREAM_CHUNK_SIZE,
+    CommandResult,
+    SSHAuthenticationError,
+    SSHError,
+    SSHStream,
+    SSHTimeoutError,
+    SSHTransport,
+)
+
+_T = TypeVar("_T")
+
+class ParamikoStream(SSHStream):
+    """Stream over a paramiko channel, woken up by the event loop instead of a thread."""
+
+    def __init__(self, channel: paramiko.Channel, max_bytes: int | None = None) -> None:
+        """Initialize the stream."""
+        super().__init__(max_bytes)
+        self._channel = channel
+
+    async def _async_wait_readable(self) -> None:
+        """Wait until the channel has data or is closed."""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        # Канал paramiko отдает pipe-дескриптор, который «взводится» при поступлении данных
+        fileno = self._channel.fileno()
+        loop.add_reader(fileno, ready.set)
+        try:
+            await ready.wait()
+        finally:
+            loop.remove_reader(fileno)
+
+    async def _async_read_chunk(self) -> bytes:
+        """Return the next piece of output, or b"" at end of stream."""
+        while True:
+            try:
+                if self._channel.recv_ready():
+                    return self._channel.recv(STREAM_CHUNK_SIZE)
+                if self._channel.closed or self._channel.eof_received:
+                    return b""
+            except (paramiko.SSHException, OSError) as err:
+                raise SSHError(str(err)) from err
+            await self._async_wait_readable()
+
+    async def _async_close_channel(self) -> None:
+        """Stop the remote command and close the channel."""
+        self._channel.close()
+
+class ParamikoTransport(SSHTransport):
+    """Blocking paramiko client driven from executor threads."""
+
+    name = SSH_BACKEND_PARAMIKO
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the transport."""
+        super().__init__(*args, **kwargs)
+        self._transport: paramiko.Transport | None = None
+
+    async def _async_run(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking paramiko call in the executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if the paramiko transport is active."""
+        return self._transport is not None and self._transport.is_active()
+
+    async def async_connect(self) -> None:
+        """Open the connection and authenticate."""
+        await self._async_run(self.connect)
+
+    async def async_exec(self, command: str, timeout: int) -> CommandResult:
+        """Run a command and return its output and exit status."""
+        return await self._async_run(self.execute, command, timeout)
+
+    async def async_close(self) -> None:
+        """Close the connection."""
+        if self._transport:
+            await self._async_run(self.close)
+
+    async def async_open_stream(self, command: str, max_bytes: int | None = None) -> SSHStream:
+        """Start a command and return a reader for its stdout."""
+        return ParamikoStream(await self._async_run(self.open_channel, command), max_bytes)
+
+    async def async_write_file(self, path: str, data: bytes) -> None:
+        """Write a remote file over SFTP, or through `cat` if the server has no SFTP."""
+        await self._async_run(self.write_file, path, data)
+
+    def connect(self) -> None:
+        """Open the connection (blocking), timing TCP, key exchange and auth separately."""
+        started = time.monotonic()
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        except socket.timeout as err:
+            raise SSHTimeoutError(f"Connection timeout to {self.host}:{self.port}") from err
+        except OSError as err:
+            raise SSHError(str(err)) from err
+        started = self._record("tcp_connect", started)
+
+        # Ключ хоста не проверяется, как и раньше с AutoAddPolicy
+        transport = paramiko.Transport(sock)
+        transport.banner_timeout = BANNER_TIMEOUT
+        transport.auth_timeout = AUTH_TIMEOUT
+        try:
+            transport.start_client(timeout=BANNER_TIMEOUT)
+            started = self._record("kex", started)
+            transport.auth_password(self.username, self.password)
+            self._record("auth", started)
+        except paramiko.AuthenticationException as err:
+            transport.close()
+            raise SSHAuthenticationError(str(err)) from err
+        except socket.timeout as err:
+            transport.close()
+            raise SSHTimeoutError(f"Connection timeout to {self.host}:{self.port}") from err
+        except (paramiko.SSHException, OSError, EOFError) as err:
+            transport.close()
+            raise SSHError(str(err)) from err
+
+        if self.keepalive:
+            transport.set_keepalive(self.keepalive)
+        self._transport = transport
+
+    def execute(self, command: str, timeout: int) -> CommandResult:
+        """Run a command (blocking)."""
+        channel = self.open_channel(command, timeout)
+        started = time.monotonic()
+        try:
+            stdout = channel.makefile("rb").read()
+            stderr = channel.makefile_stderr("rb").read()
+            exit_status = channel.recv_exit_status()
+        except socket.timeout as err:
+            raise SSHTimeoutError("Command timeout") from err
+        except (paramiko.SSHException, OSError) as err:
+            raise SSHError(str(err)) from err
+        finally:
+            channel.close()
+        self._record("command", started)
+        self._record_bytes(len(command.encode()), len(stdout) + len(stderr))
+        return CommandResult(
+            stdout.decode(errors="replace").strip(),
+            stderr.decode(errors="replace").strip(),
+            exit_status,
+        )
+
+    def write_file(self, path: str, data: bytes) -> None:
+        """Write a remote file (blocking)."""
+        if not self._transport:
+            raise SSHError("Not connected")
+        try:
+            sftp = paramiko.SFTPClient.from_transport(self._transport)
+        except (paramiko.SSHException, EOFError):
+            # Dropbear без sftp-server: передаем данные через stdin
+            sftp = None
+        try:
+            if sftp is not None:
+                with sftp.open(path, "wb") as remote:
+                    remote.set_pipelined(True)
+                    remote.write(data)
+                exit_status = 0
+            else:
+                channel = self.open_channel(f"cat > {shlex.quote(path)}", FILE_WRITE_TIMEOUT)
+                try:
+                    channel.sendall(data)
+                    channel.shutdown_write()
+                    exit_status = channel.recv_exit_status()
+                finally:
+                    channel.close()
+        except socket.timeout as err:
+            raise SSHTimeoutError("File write timeout") from err
+        except (paramiko.SSHException, OSError) as err:
+            raise SSHError(str(err)) from err
+        finally:
+            if sftp is not None:
+                sftp.close()
+        if exit_status != 0:
+            raise SSHError(f"Writing {path} failed with status {exit_status}")
+        self._record_bytes(len(data), 0)
+
+    def open_channel(self, command: str, timeout: float | None = None) -> paramiko.Channel:
+        """Open a session channel running a command (blocking)."""
+        if not self._transport:
+            raise SSHError("Not connected")
+        started = time.monotonic()
+        try:
+            channel = self._transport.open_session(timeout=timeout)
+            self._record("channel_open", started)
+            channel.settimeout(timeout)
+            channel.exec_command(command)
+        except socket.timeout as err:
+            raise SSHTimeoutError("Channel open timeout") from err
+        except (paramiko.SSHException, OSError) as err:
+            raise SSHError(str(err)) from err
+        return channel
+
+    def close(self) -> None:
+        """Close the connection (blocking)."""
+        transport, self._transport = self._transport, None
+        if transport:
+            transport.close()
+
+TRANSPORT = ParamikoTransport
@@ -0,0 +1,169 @@
+"""SSH worker pool, per-host operation queues and command coalescing for NFQWS HA integration."""
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Mapping, TypeVar
+
+from .const import SSH_WORKER_THREADS
+
+_T = TypeVar("_T")
+
+# Вес нового замера в скользящем среднем
+_EWMA_ALPHA = 0.2
+
+def create_ssh_executor(max_workers: int = SSH_WORKER_THREADS) -> ThreadPoolExecutor:
+    """Create the thread pool reserved for blocking SSH calls."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nfqws_ssh")
+
+class HostOperationQueue:
+    """Run SSH operations for one router one at a time, merging identical ones."""
+
+    def __init__(self) -> None:
+        """Initialize the queue."""
+        self._lock = asyncio.Lock()
+        self._pending: dict[str, asyncio.Task[Any]] = {}
+        self._waiting = 0
+        self.operations = 0
+        self.coalesced = 0
+        self.avg_wait = 0.0
+        self.avg_exec = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Return the number of operations waiting for the router."""
+        return self._waiting
+
+    async def async_run(
+        self, key: str | None, factory: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        """Run an operation after the ones already queued for this router.
+
+        Operations with the same key that are queued or running at the same
+        time are executed once and every caller gets the shared result.
+        """
+        if key is not None and (task := self._pending.get(key)) is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        task = asyncio.ensure_future(self._async_run(factory))
+        if key is not None:
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _async_run(self, factory: Callable[[], Awaitable[_T]]) -> _T:
+        """Wait for the router to be free, then run the operation."""
+        queued = time.monotonic()
+        self._waiting += 1
+        try:
+            await self._lock.acquire()
+        finally:
+            self._waiting -= 1
+        started = time.monotonic()
+        try:
+            return await factory()
+        finally:
+            self._lock.release()
+            self._record(started - queued, time.monotonic() - started)
+
+    def _record(self, wait: float, execution: float) -> None:
+        """Update wait and execution time statistics."""
+        self.operations += 1
+        if self.operations == 1:
+            self.avg_wait, self.avg_exec = wait, execution
+        else:
+            self.avg_wait += _EWMA_ALPHA * (wait - self.avg_wait)
+            self.avg_exec += _EWMA_ALPHA * (execution - self.avg_exec)
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue metrics."""
+        return {
+            "queue_depth": self.depth,
+            "operations": self.operations,
+            "coalesced": self.coalesced,
+            "avg_wait_ms": round(self.avg_wait * 1000, 1),
+            "avg_exec_ms": round(self.avg_exec * 1000, 1),
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class CommandCoalescer:
+    """Run control commands one at a time, merging the ones still waiting to run.
+
+    A command submitted while another one waits is folded into it using the
+    merge table (e.g. stop + start becomes restart); every caller of the
+    merged command gets its result. A running command is never merged into.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str], Awaitable[bool]],
+        merge: Mapping[tuple[str, str], str],
+        create_task: Callable[[Coroutine[Any, Any, None]], asyncio.Task[None]] | None = None,
+    ) -> None:
+        """Initialize the queue; create_task starts the drain task (e.g. tied to a config entry)."""
+        self._run = run
+        self._merge = merge
+        self._create_task = create_task or asyncio.ensure_future
+        self._pending: tuple[str, asyncio.Future[bool]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.running: str | None = None
+        self.submitted = 0
+        self.executed = 0
+
+    @property
+    def pending(self) -> str | None:
+        """Return the command waiting for the running one to finish."""
+        return self._pending[0] if self._pending else None
+
+    async def async_submit(self, command: str) -> bool:
+        """Queue a command and wait for the result of the command it ends up in."""
+        self.submitted += 1
+        if self._pending is not None:
+            current, future = self._pending
+            # Без правила слияния побеждает последняя команда
+            self._pending = (self._merge.get((current, command), command), future)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._pending = (command, future)
+        if self._task is None or self._task.done():
+            self._task = self._create_task(self._async_drain())
+            self._task.add_done_callback(self._drain_done)
+        return await asyncio.shield(future)
+
+    async def _async_drain(self) -> None:
+        """Execute queued commands until none are left."""
+        while self._pending is not None:
+            (command, future), self._pending = self._pending, None
+            self.running = command
+            self.executed += 1
+            try:
+                result = await self._run(command)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as err:
+                future.set_exception(err)
+            else:
+                future.set_result(result)
+            finally:
+                self.running = None
+
+    def _drain_done(self, task: asyncio.Task[None]) -> None:
+        """Cancel the waiting command if the drain task was cancelled (entry unloaded)."""
+        if task.cancelled() and self._pending is not None:
+            self._pending[1].cancel()
+            self._pending = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue metrics."""
+        return {
+            "running": self.running,
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "coalesced": self.submitted - self.executed - (1 if self._pending else 0),
+        }
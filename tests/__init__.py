@@ -0,0 +1 @@
+"""Tests for the NFQWS HA integration."""
@@ -0,0 +1,87 @@
+"""Test doubles shared by the NFQWS HA tests."""
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+from custom_components.nfqws.transport import CommandResult, SSHStream, SSHTransport
+from custom_components.nfqws.workers import HostOperationQueue
+
+class FakeStream(SSHStream):
+    """Stream that hands out prepared chunks."""
+
+    def __init__(self, chunks: list[bytes], max_bytes: int | None = None) -> None:
+        """Initialize the stream."""
+        super().__init__(max_bytes)
+        self._chunks = list(chunks)
+        self.closed = False
+
+    async def _async_read_chunk(self) -> bytes:
+        """Return the next prepared chunk."""
+        return self._chunks.pop(0) if self._chunks else b""
+
+    async def _async_close_channel(self) -> None:
+        """Mark the stream as closed."""
+        self.closed = True
+
+class FakeTransport(SSHTransport):
+    """Transport that is always connected and never talks to a router."""
+
+    def __init__(self, lines: list[bytes] | None = None) -> None:
+        """Initialize the transport."""
+        super().__init__("router", 22, "root", "secret")
+        self.lines = lines or []
+        self.closed = False
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True until the transport is closed."""
+        return not self.closed
+
+    async def async_connect(self) -> None:
+        """Connect."""
+        self.closed = False
+
+    async def async_exec(self, command: str, timeout: int) -> CommandResult:
+        """Echo the command."""
+        return CommandResult(command, "", 0)
+
+    async def async_open_stream(self, command: str, max_bytes: int | None = None) -> SSHStream:
+        """Return a stream over the prepared lines."""
+        return FakeStream(self.lines, max_bytes)
+
+    async def async_write_file(self, path: str, data: bytes) -> None:
+        """Accept any upload."""
+
+    async def async_close(self) -> None:
+        """Close the transport."""
+        self.closed = True
+
+class LocalShell:
+    """Stand-in for SSHHelper that runs router commands with the local sh."""
+
+    host = "localhost"
+
+    def __init__(self) -> None:
+        """Initialize the shell."""
+        self.queue = HostOperationQueue()
+        self.commands: list[str] = []
+
+    async def async_run_command(
+        self, command: str, timeout: int = 30, coalesce_key: str | None = None
+    ) -> CommandResult:
+        """Run the command with sh."""
+        self.commands.append(command)
+        done = subprocess.run(["sh", "-c", command], capture_output=True, text=True, check=False)
+        return CommandResult(done.stdout, done.stderr, done.returncode)
+
+    async def async_open_stream(self, command: str, max_bytes: int | None = None) -> SSHStream:
+        """Run the command to completion and stream its stdout in small chunks."""
+        self.commands.append(command)
+        output = subprocess.run(["sh", "-c", command], capture_output=True, check=False).stdout
+        return FakeStream([output[i:i + 7] for i in range(0, len(output), 7)], max_bytes)
+
+    async def async_write_file(self, path: str, data: bytes) -> bool:
+        """Write a local file, as SFTP would on the router."""
+        Path(path).write_bytes(data)
+        return True
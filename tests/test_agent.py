@@ -0,0 +1,41 @@
+"""Tests for the snapshot agent output parser."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.nfqws.agent import AgentError, parse_snapshot
+from custom_components.nfqws.const import AGENT_FORMAT_VERSION
+
+def test_parse_snapshot_groups_repeated_keys() -> None:
+    """Values of a repeated key are kept in output order."""
+    snapshot = parse_snapshot(
+        f"nfqws-agent {AGENT_FORMAT_VERSION}\n"
+        "running=1\n"
+        "process=uptime 100.0 2\n"
+        "process=pid 7 fds=3 stat=7 (nfqws) S\n"
+        "package=Version: 2.3.1\n"
+        "end=1\n"
+    )
+    assert snapshot["running"] == ["1"]
+    assert snapshot["process"] == ["uptime 100.0 2", "pid 7 fds=3 stat=7 (nfqws) S"]
+    assert snapshot["package"] == ["Version: 2.3.1"]
+
+def test_parse_snapshot_keeps_equal_signs_in_values() -> None:
+    """Only the first '=' separates the key."""
+    snapshot = parse_snapshot(f"nfqws-agent {AGENT_FORMAT_VERSION}\nqueue=a=b\nend=1")
+    assert snapshot["queue"] == ["a=b"]
+
+@pytest.mark.parametrize(
+    "output",
+    ["", "sh: agent.sh: not found\n", f"nfqws-agent {AGENT_FORMAT_VERSION + 1}\nend=1\n"],
+    ids=["empty", "foreign", "newer-format"],
+)
+def test_parse_snapshot_rejects_foreign_output(output: str) -> None:
+    """Output without the expected header is not a snapshot."""
+    with pytest.raises(AgentError):
+        parse_snapshot(output)
+
+def test_parse_snapshot_rejects_cut_off_output() -> None:
+    """A snapshot without the end marker was interrupted."""
+    with pytest.raises(AgentError):
+        parse_snapshot(f"nfqws-agent {AGENT_FORMAT_VERSION}\nrunning=1\n")
@@ -0,0 +1,104 @@
+"""Tests for the per-router SSH circuit breaker."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.nfqws import circuit_breaker
+from custom_components.nfqws.circuit_breaker import CircuitBreaker
+from custom_components.nfqws.const import BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        """Return the current time."""
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the breaker's clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+def _breaker() -> CircuitBreaker:
+    """Return a breaker without jitter: opens after 3 failures, 10 s base, 40 s max."""
+    return CircuitBreaker("router", failure_threshold=3, base_delay=10, max_delay=40, jitter=0)
+
+def _trip(breaker: CircuitBreaker) -> None:
+    """Fail until the breaker opens."""
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+def test_opens_after_threshold(clock: FakeClock) -> None:
+    """Failures below the threshold keep the circuit closed."""
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_CLOSED
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    assert not breaker.allow()
+    assert breaker.next_probe is not None
+
+def test_success_resets_failure_count(clock: FakeClock) -> None:
+    """Failures must be consecutive to open the circuit."""
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_CLOSED
+
+def test_half_open_lets_one_probe_through(clock: FakeClock) -> None:
+    """After the delay exactly one attempt may go to the router."""
+    breaker = _breaker()
+    _trip(breaker)
+    clock.now = 10
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_successful_probe_closes(clock: FakeClock) -> None:
+    """A successful probe closes the circuit."""
+    breaker = _breaker()
+    _trip(breaker)
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.next_probe is None
+    assert breaker.failures == 0
+
+def test_failed_probes_back_off_exponentially(clock: FakeClock) -> None:
+    """Each failed probe doubles the delay up to the maximum."""
+    breaker = _breaker()
+    _trip(breaker)
+    delays = []
+    opened_at = clock.now
+    for _ in range(4):
+        # Ждем ровно до следующей пробы
+        while breaker.state == BREAKER_OPEN:
+            clock.now += 1
+        delays.append(clock.now - opened_at)
+        assert breaker.allow()
+        breaker.record_failure()
+        opened_at = clock.now
+    assert delays == [10, 20, 40, 40]
+
+def test_released_probe_lets_next_attempt_through(clock: FakeClock) -> None:
+    """A probe that ended without a result does not block the half-open state."""
+    breaker = _breaker()
+    _trip(breaker)
+    clock.now = 10
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert breaker.allow()
@@ -0,0 +1,78 @@
+"""Tests for the in-memory hostlist index."""
+from __future__ import annotations
+
+import asyncio
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.nfqws.hostlist_index import (
+    NFQWSHostlistIndex,
+    index_entries,
+    normalize_entry,
+)
+
+from .common import LocalShell
+
+def test_normalize_entry() -> None:
+    """Entries are compared case-insensitively and without the root dot."""
+    assert normalize_entry("  Example.COM. ") == "example.com"
+
+def test_index_entries_keys_are_normalized() -> None:
+    """Edits match file lines regardless of how the file spells them."""
+    entries = index_entries("Example.com\nfoo.net.\n\n  bar.org  \n")
+    assert list(entries) == ["example.com", "foo.net", "bar.org"]
+    assert normalize_entry("example.com") in entries
+    assert normalize_entry("FOO.net") in entries
+
+def test_index_entries_keep_raw_lines() -> None:
+    """The original spelling is what gets written back."""
+    entries = index_entries("Example.com\nfoo.net.\n")
+    assert list(entries.values()) == ["Example.com", "foo.net."]
+
+def test_index_entries_merge_duplicates() -> None:
+    """Lines that differ only in case count once; the first spelling wins."""
+    entries = index_entries("Example.com\nexample.com\nEXAMPLE.COM.\n")
+    assert entries == {"example.com": "Example.com"}
+
+def test_index_entries_keep_comments_verbatim() -> None:
+    """Comments are not domains and are kept as they are."""
+    entries = index_entries("# Blocked Sites\n# blocked sites\nexample.com\n")
+    assert list(entries.values()) == ["# Blocked Sites", "# blocked sites", "example.com"]
+
+@pytest.mark.skipif(
+    not all(map(shutil.which, ("awk", "md5sum", "stat"))), reason="needs awk, md5sum and stat"
+)
+def test_remove_all_then_add(tmp_path: Path) -> None:
+    """Emptying a list through the index does not break the next edit."""
+    path = tmp_path / "user.list"
+    path.write_text("Example.com\nfoo.net\n")
+
+    async def _run() -> None:
+        async def _executor_job(func, *args):
+            return func(*args)
+
+        async def _apply_changes() -> bool:
+            return True
+
+        hass = SimpleNamespace(
+            loop=asyncio.get_running_loop(), async_add_executor_job=_executor_job
+        )
+        index = NFQWSHostlistIndex(
+            hass, LocalShell(), str(path), str(tmp_path / "state"), _apply_changes
+        )
+
+        async def _edit(add: list[str], remove: list[str]):
+            edit = asyncio.ensure_future(index.async_edit(add, remove))
+            await asyncio.sleep(0)
+            await index.async_flush()
+            return await edit
+
+        assert (await _edit([], ["example.com", "FOO.net"]))["entries"] == 0
+        assert path.read_text() == ""
+        assert (await _edit(["example.com"], []))["entries"] == 1
+        assert path.read_text() == "example.com\n"
+
+    asyncio.run(_run())
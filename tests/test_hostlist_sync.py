@@ -0,0 +1,148 @@
+"""Tests for hostlist chunking, checked against the awk splitter run on the router."""
+from __future__ import annotations
+
+import asyncio
+import random
+import shlex
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from custom_components.nfqws.const import (
+    CMD_HOSTLIST_HASH_TEMPLATE,
+    CMD_STATE_DIR_PREPARE_TEMPLATE,
+    HOSTLIST_BOUNDARY_ALPHABET,
+    HOSTLIST_CHUNK_DIVISOR,
+    HOSTLIST_CHUNK_MAX_LINES,
+)
+from custom_components.nfqws.hostlist_sync import (
+    NFQWSHostlistSync,
+    parse_remote_chunks,
+    prepare_hostlist,
+)
+
+from .common import LocalShell
+
+needs_tools = pytest.mark.skipif(
+    not all(map(shutil.which, ("awk", "md5sum"))), reason="needs awk and md5sum"
+)
+
+def _domains(count: int, seed: int) -> bytes:
+    """Return a pseudo-random hostlist."""
+    rnd = random.Random(seed)
+    alphabet = HOSTLIST_BOUNDARY_ALPHABET[:36]
+    return "".join(
+        "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 20))) + ".com\n"
+        for _ in range(count)
+    ).encode()
+
+def _remote_chunks(tmp_path: Path, data: bytes) -> tuple[str | None, list[str]]:
+    """Split a file with the router's hash command; return the file md5 and chunk md5s in order."""
+    path = tmp_path / "user.list"
+    path.write_bytes(data)
+    state = tmp_path / "state"
+    command = CMD_HOSTLIST_HASH_TEMPLATE.format(
+        prepare=CMD_STATE_DIR_PREPARE_TEMPLATE.format(dir=shlex.quote(str(state))),
+        tmp=shlex.quote(str(state / "chunks")),
+        path=shlex.quote(str(path)),
+        dir=shlex.quote(str(tmp_path)),
+        divisor=HOSTLIST_CHUNK_DIVISOR,
+        max_lines=HOSTLIST_CHUNK_MAX_LINES,
+        alphabet=shlex.quote(HOSTLIST_BOUNDARY_ALPHABET),
+    )
+    output = subprocess.run(
+        ["sh", "-c", command], capture_output=True, text=True, check=True
+    ).stdout
+    file_md5, _ = parse_remote_chunks(output)
+    # Имена чанков по порядку; дубликаты md5 parse_remote_chunks схлопывает
+    chunks = sorted(line.split() for line in output.splitlines()[1:])
+    return file_md5, [md5 for md5, _ in sorted(chunks, key=lambda item: item[1])]
+
+@needs_tools
+@pytest.mark.parametrize(
+    "data",
+    [
+        _domains(1000, 1),
+        _domains(3, 2),
+        # Одинаковые строки: граница только по лимиту строк
+        b"aaaa.com\n" * (HOSTLIST_CHUNK_MAX_LINES * 2 + 5),
+        # Без перевода строки в конце, с пустыми строками и комментарием
+        b"# list\n\nexample.com\n\nb.org",
+        b"x\n",
+    ],
+    ids=["random", "short", "max-lines", "no-newline", "single-char"],
+)
+def test_chunks_match_awk_splitter(tmp_path: Path, data: bytes) -> None:
+    """Local chunks have the same boundaries and hashes as the router's."""
+    hostlist = prepare_hostlist(data)
+    file_md5, remote = _remote_chunks(tmp_path, data)
+    # Без перевода строки в конце файл на роутере отличается от выгружаемого —
+    # и будет перезаписан, но чанки awk дополняет так же
+    assert (hostlist.md5 == file_md5) == data.endswith(b"\n")
+    assert [chunk.md5 for chunk in hostlist.chunks] == remote
+
+def test_chunks_reassemble_the_file() -> None:
+    """Chunks cover the whole file in order."""
+    data = _domains(500, 3)
+    hostlist = prepare_hostlist(data)
+    assert b"".join(chunk.data for chunk in hostlist.chunks) == data
+    assert sum(chunk.lines for chunk in hostlist.chunks) == 500
+    assert all(chunk.lines <= HOSTLIST_CHUNK_MAX_LINES for chunk in hostlist.chunks)
+
+def test_edit_changes_few_chunks() -> None:
+    """Content-defined boundaries keep most chunks after an insertion."""
+    data = _domains(2000, 4)
+    lines = data.splitlines(keepends=True)
+    edited = b"".join(lines[:1000] + [b"inserted.example\n"] + lines[1000:])
+    before = {chunk.md5 for chunk in prepare_hostlist(data).chunks}
+    after = [chunk.md5 for chunk in prepare_hostlist(edited).chunks]
+    assert sum(md5 not in before for md5 in after) <= 2
+
+def test_parse_remote_chunks() -> None:
+    """The file hash and chunk names are read; noise is ignored."""
+    output = (
+        "file 0123456789abcdef0123456789abcdef\n"
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa  000000\n"
+        "bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb  000001\n"
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa  000002\n"
+        "md5sum: can't open '[0-9]*'\n"
+    )
+    file_md5, chunks = parse_remote_chunks(output)
+    assert file_md5 == "0123456789abcdef0123456789abcdef"
+    assert chunks == {
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa": "000000",
+        "bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb": "000001",
+    }
+
+def test_parse_remote_chunks_missing_file() -> None:
+    """A router without the file reports no hash and no chunks."""
+    assert parse_remote_chunks("") == (None, {})
+    assert parse_remote_chunks("file \n") == (None, {})
+
+def _sync(tmp_path: Path, data: bytes) -> str:
+    """Sync data to user.list in tmp_path through the local shell; return the sync mode."""
+    sync = NFQWSHostlistSync(LocalShell(), str(tmp_path / "user.list"), str(tmp_path / "state"))
+    return asyncio.run(sync.async_sync(prepare_hostlist(data)))["mode"]
+
+@needs_tools
+def test_sync_stages_chunks_in_private_state_dir(tmp_path: Path) -> None:
+    """Chunks go to a 0700 state directory that is emptied afterwards; the list stays readable."""
+    data = _domains(1000, 5)
+    assert _sync(tmp_path, data) == "full"
+    lines = data.splitlines(keepends=True)
+    assert _sync(tmp_path, b"".join(lines[:500] + [b"inserted.example\n"] + lines[500:])) == "delta"
+    state = tmp_path / "state"
+    assert state.stat().st_mode & 0o777 == 0o700
+    assert list(state.iterdir()) == []
+    assert (tmp_path / "user.list").stat().st_mode & 0o044 == 0o044
+
+@needs_tools
+def test_sync_after_empty_list(tmp_path: Path) -> None:
+    """An empty list on the router has no chunks, which must not fail the next sync."""
+    assert _sync(tmp_path, _domains(10, 6)) == "full"
+    _sync(tmp_path, b"")
+    assert (tmp_path / "user.list").read_bytes() == b""
+    assert _sync(tmp_path, b"example.com\n") == "full"
+    assert (tmp_path / "user.list").read_bytes() == b"example.com\n"
@@ -0,0 +1,43 @@
+"""Import-time checks: SSH backends load on the first connection, not with the integration."""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Что HA импортирует при настройке записи: сам пакет, платформы и мастер настройки
+_INTEGRATION = (
+    "custom_components.nfqws",
+    "custom_components.nfqws.sensor",
+    "custom_components.nfqws.button",
+    "custom_components.nfqws.config_flow",
+    "custom_components.nfqws.diagnostics",
+)
+
+_CHILD = """
+import importlib, json, sys
+for name in {integration!r}:
+    importlib.import_module(name)
+print(json.dumps(sorted(name for name in ("paramiko", "asyncssh") if name in sys.modules)))
+"""
+
+def test_backends_not_imported_with_integration() -> None:
+    """Importing the integration does not pull in paramiko or asyncssh."""
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(integration=_INTEGRATION)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parents[1],
+    ).stdout
+    assert json.loads(output.splitlines()[-1]) == []
+
+@pytest.mark.parametrize("backend", ["paramiko", "asyncssh"])
+def test_backend_loads_on_demand(backend: str) -> None:
+    """Each backend module still resolves to its transport class."""
+    from custom_components.nfqws.transport import SSHTransport, load_transport
+
+    assert issubclass(load_transport(backend), SSHTransport)
@@ -0,0 +1,105 @@
+"""Tests for the incremental nfqws log reader, run against the local shell."""
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+from custom_components.nfqws.const import LOG_TAIL_INITIAL_BYTES
+from custom_components.nfqws.log_tail import NFQWSLogTail
+
+from .common import LocalShell
+
+def _fetch(tail: NFQWSLogTail) -> list[str]:
+    """Run one fetch."""
+    return asyncio.run(tail.async_fetch())
+
+def test_missing_file(tmp_path: Path) -> None:
+    """A log that does not exist yet is read from the start once it appears."""
+    log = tmp_path / "nfqws.log"
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    assert _fetch(tail) == []
+    assert (tail.inode, tail.offset) == (None, 0)
+    log.write_text("nfqws: error: first\n")
+    assert _fetch(tail) == ["nfqws: error: first"]
+
+def test_first_read_covers_only_the_tail(tmp_path: Path) -> None:
+    """The first fetch skips old history and the cut-off line at the tail start."""
+    log = tmp_path / "nfqws.log"
+    old = "nfqws: error: long ago\n" + "nfqws: ok\n" * (LOG_TAIL_INITIAL_BYTES // 10 + 10)
+    log.write_text(old + "nfqws: cannot open queue\nnfqws: started\n")
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    assert _fetch(tail) == ["nfqws: cannot open queue"]
+    assert tail.offset == log.stat().st_size
+
+def test_first_read_skips_the_cut_line(tmp_path: Path) -> None:
+    """The line the tail window starts in the middle of is not reported."""
+    log = tmp_path / "nfqws.log"
+    fresh = "nfqws: ok\n" * 400 + "nfqws: error: fresh\n"
+    # Окно хвоста начинается на 24-м байте этой строки, до слова error
+    cut = "A" * 30 + " error " + "B" * 62 + "\n"
+    log.write_text("nfqws: ok\n" * 10 + cut + fresh)
+    assert len(fresh) + len(cut) - 24 == LOG_TAIL_INITIAL_BYTES
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    assert _fetch(tail) == ["nfqws: error: fresh"]
+
+def test_reads_only_appended_lines(tmp_path: Path) -> None:
+    """Later fetches return errors from the new lines only."""
+    log = tmp_path / "nfqws.log"
+    log.write_text("nfqws: error: old\n")
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    _fetch(tail)
+    with log.open("a") as file:
+        file.write("nfqws: ok\nnfqws: Failed to bind\n")
+    assert _fetch(tail) == ["nfqws: Failed to bind"]
+    assert _fetch(tail) == []
+    assert list(tail.recent_errors)[-1] == "nfqws: Failed to bind"
+
+def test_incomplete_line_waits_for_newline(tmp_path: Path) -> None:
+    """A line still being written is read once it is complete."""
+    log = tmp_path / "nfqws.log"
+    log.write_text("")
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    _fetch(tail)
+    with log.open("a") as file:
+        file.write("nfqws: fatal: half")
+    assert _fetch(tail) == []
+    with log.open("a") as file:
+        file.write(" done\n")
+    assert _fetch(tail) == ["nfqws: fatal: half done"]
+
+def test_rotation_restarts_from_the_beginning(tmp_path: Path) -> None:
+    """A new file in place of the old one (new inode) is read from the start."""
+    log = tmp_path / "nfqws.log"
+    log.write_text("nfqws: started\n" * 10)
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    _fetch(tail)
+    rotated = tmp_path / "nfqws.log.new"
+    rotated.write_text("nfqws: error: after rotation\n")
+    os.replace(rotated, log)
+    assert _fetch(tail) == ["nfqws: error: after rotation"]
+
+def test_truncation_restarts_from_the_beginning(tmp_path: Path) -> None:
+    """A file truncated below the saved offset is read from the start."""
+    log = tmp_path / "nfqws.log"
+    log.write_text("nfqws: started\n" * 10)
+    tail = NFQWSLogTail(LocalShell(), str(log))
+    _fetch(tail)
+    with log.open("r+") as file:
+        file.truncate(0)
+        file.write("nfqws: unable to start\n")
+    assert _fetch(tail) == ["nfqws: unable to start"]
+
+def test_reads_are_bounded(tmp_path: Path) -> None:
+    """A burst larger than max_bytes is read over several fetches."""
+    log = tmp_path / "nfqws.log"
+    log.write_text("")
+    tail = NFQWSLogTail(LocalShell(), str(log), max_bytes=100)
+    _fetch(tail)
+    with log.open("a") as file:
+        file.write("".join(f"nfqws: error {i:02d}\n" for i in range(20)))
+    batches = []
+    while errors := _fetch(tail):
+        batches.append(errors)
+    assert len(batches) > 1
+    assert sum(batches, []) == [f"nfqws: error {i:02d}" for i in range(20)]
@@ -0,0 +1,74 @@
+"""Tests for the nfqws process statistics parser."""
+from __future__ import annotations
+
+from custom_components.nfqws.const import PROC_CLOCK_TICKS
+from custom_components.nfqws.process_stats import (
+    EMPTY_PROCESS_STATS,
+    parse_process_sample,
+    process_stats,
+)
+
+def _stat(pid: int, name: str, utime: int, stime: int, start: int) -> str:
+    """Build a /proc/<pid>/stat line with the fields the parser reads."""
+    # Поля после имени: state, затем с 4-го; utime/stime — 14/15, starttime — 22
+    fields = ["S"] + ["0"] * 10 + [str(utime), str(stime)] + ["0"] * 6 + [str(start)] + ["0"] * 10
+    return f"{pid} ({name}) {' '.join(fields)}"
+
+def _output(uptime: float, cpus: int, *pids: tuple[int, int, int]) -> str:
+    """Build the collection script output for (pid, utime, stime) triples."""
+    lines = [f"uptime {uptime} {cpus}"]
+    for pid, utime, stime in pids:
+        lines.append(
+            f"pid {pid} fds=12 VmRSS=2048 Threads=3 stat={_stat(pid, 'nfqws', utime, stime, 500)}"
+        )
+    return "\n".join(lines)
+
+def test_parse_sums_all_processes() -> None:
+    """Resources of every nfqws process are added up."""
+    sample = parse_process_sample(_output(1000.0, 2, (20, 100, 50), (10, 30, 20)))
+    assert sample is not None
+    assert sample.pids == (10, 20)
+    assert sample.cpus == 2
+    assert sample.cpu_ticks == 200
+    assert (sample.rss_kb, sample.threads, sample.open_fds) == (4096, 6, 24)
+    assert sample.started_ticks == 500
+
+def test_parse_process_name_with_spaces() -> None:
+    """The command name in parentheses may contain spaces and parentheses."""
+    stat = _stat(7, "nf qws (x)", 40, 2, 300)
+    sample = parse_process_sample(f"uptime 50.5 1\npid 7 fds=1 stat={stat}")
+    assert sample is not None
+    assert sample.cpu_ticks == 42
+    assert sample.started_ticks == 300
+
+def test_parse_without_process_returns_none() -> None:
+    """No pid lines means the daemon is not running."""
+    assert parse_process_sample("uptime 1000.0 1") is None
+    assert parse_process_sample("") is None
+
+def test_parse_skips_malformed_lines() -> None:
+    """A broken pid line does not hide the others."""
+    output = _output(1000.0, 1, (10, 1, 1)) + "\npid 11 fds=x stat=garbage"
+    sample = parse_process_sample(output)
+    assert sample is not None
+    assert sample.pids == (10,)
+
+def test_cpu_percent_from_delta() -> None:
+    """CPU usage is the tick delta over elapsed time and CPU count."""
+    previous = parse_process_sample(_output(1000.0, 2, (10, 100, 0)))
+    current = parse_process_sample(_output(1010.0, 2, (10, 100 + 5 * PROC_CLOCK_TICKS, 0)))
+    stats = process_stats(current, previous)
+    assert stats["cpu_percent"] == 25.0
+    assert stats["memory_rss"] == 2048 * 1024
+    assert stats["process_uptime"] == int(1010.0 - 500 / PROC_CLOCK_TICKS)
+
+def test_cpu_percent_unknown_after_restart() -> None:
+    """A new pid set means counters started over, so no CPU value yet."""
+    previous = parse_process_sample(_output(1000.0, 1, (10, 100, 0)))
+    current = parse_process_sample(_output(1010.0, 1, (11, 5, 0)))
+    assert process_stats(current, previous)["cpu_percent"] is None
+    assert process_stats(current, None)["cpu_percent"] is None
+
+def test_stopped_daemon_has_empty_stats() -> None:
+    """Without a sample all values are unknown."""
+    assert process_stats(None, None) == EMPTY_PROCESS_STATS
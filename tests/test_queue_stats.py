@@ -0,0 +1,67 @@
+"""Tests for the NFQUEUE statistics parser."""
+from __future__ import annotations
+
+from custom_components.nfqws.queue_stats import EMPTY_QUEUE_STATS, parse_queue_sample, queue_stats
+
+def _output(uptime: float, packets: int, dropped: int = 0, length: int = 0, rule_bytes: int = 0) -> str:
+    """Build the collection script output for queue 200 and one firewall rule."""
+    # queue portid queue_total copy_mode copy_range queue_dropped user_dropped id_sequence 1
+    return (
+        f"uptime {uptime}\n"
+        f"nfq 200 1234 {length} 2 65531 3 {dropped} {packets} 1\n"
+        f"rule {packets} {rule_bytes}\n"
+    )
+
+def test_parse_kernel_and_rule_counters() -> None:
+    """Kernel queue counters and firewall rule counters are read."""
+    sample = parse_queue_sample(_output(100.0, 500, dropped=4, length=7, rule_bytes=9000))
+    assert sample is not None
+    assert sample.queues == (200,)
+    assert (sample.length, sample.packets, sample.overflows, sample.drops) == (7, 500, 3, 4)
+    assert (sample.rule_packets, sample.rule_bytes) == (500, 9000)
+
+def test_parse_sums_queues_and_rules() -> None:
+    """Several queues and rules (IPv4 and IPv6) are added up."""
+    output = (
+        "uptime 100.0\n"
+        "nfq 201 1 1 2 65531 0 0 10 1\n"
+        "nfq 200 1 2 2 65531 0 0 20 1\n"
+        "rule 10 100\nrule 20 200\n"
+    )
+    sample = parse_queue_sample(output)
+    assert sample is not None
+    assert sample.queues == (200, 201)
+    assert (sample.length, sample.packets, sample.rule_bytes) == (3, 30, 300)
+
+def test_parse_without_rules_keeps_rule_counters_unknown() -> None:
+    """Missing firewall counters stay None rather than zero."""
+    sample = parse_queue_sample("uptime 100.0\nnfq 200 1 0 2 65531 0 0 5 1\n")
+    assert sample is not None
+    assert sample.rule_bytes is None
+
+def test_parse_without_queue_returns_none() -> None:
+    """No kernel queue means nfqws is not attached."""
+    assert parse_queue_sample("uptime 100.0\nrule 1 2\n") is None
+
+def test_rates_from_delta() -> None:
+    """Rates are counter deltas per second of router uptime."""
+    previous = parse_queue_sample(_output(100.0, 500, dropped=0, rule_bytes=1000))
+    current = parse_queue_sample(_output(110.0, 1500, dropped=20, length=3, rule_bytes=51000))
+    stats = queue_stats(current, previous)
+    assert stats["queue_packets_rate"] == 100.0
+    assert stats["queue_bytes_rate"] == 5000.0
+    assert stats["queue_drop_rate"] == 2.0
+    assert stats["queue_overflow_rate"] == 0.0
+    assert stats["queue_length"] == 3
+
+def test_counter_reset_gives_no_rate() -> None:
+    """A counter that went down (queue recreated) yields no rate."""
+    previous = parse_queue_sample(_output(100.0, 500))
+    current = parse_queue_sample(_output(110.0, 10))
+    assert queue_stats(current, previous)["queue_packets_rate"] is None
+
+def test_first_sample_has_length_only() -> None:
+    """Without a previous sample only the current length is known."""
+    stats = queue_stats(parse_queue_sample(_output(100.0, 5, length=2)), None)
+    assert stats == {**EMPTY_QUEUE_STATS, "queue_length": 2}
+    assert queue_stats(None, None) == EMPTY_QUEUE_STATS
@@ -0,0 +1,43 @@
+"""Tests for the bypass probe parsers."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.nfqws.reachability import parse_probe_line, parse_probe_targets
+
+def test_parse_probe_targets() -> None:
+    """Targets are split on commas and whitespace, without duplicates."""
+    assert parse_probe_targets("youtube.com, rutracker.org:8443\n youtube.com") == [
+        "youtube.com",
+        "rutracker.org:8443",
+    ]
+    assert parse_probe_targets("") == []
+
+@pytest.mark.parametrize("value", ["https://example.com", "exa mple;rm", "-x.com", "a.com:"])
+def test_parse_probe_targets_rejects_invalid(value: str) -> None:
+    """Only bare host[:port] targets are accepted."""
+    with pytest.raises(ValueError):
+        parse_probe_targets(value)
+
+def test_parse_successful_probe() -> None:
+    """Phase durations are split out of curl's cumulative timings."""
+    target, result, phases = parse_probe_line("probe example.com 0 200 0.050 0.200 0.350")
+    assert target == "example.com"
+    assert result == {"ok": True, "exit_code": 0, "http_code": 200, "first_byte_ms": 350.0}
+    assert phases == pytest.approx({"connect": 0.05, "tls": 0.15, "first_byte": 0.35})
+
+def test_parse_failed_probe() -> None:
+    """A failed request has no timings."""
+    target, result, phases = parse_probe_line("probe blocked.org 28 000 0.000 0.000 0.000")
+    assert target == "blocked.org"
+    assert result["ok"] is False
+    assert result["exit_code"] == 28
+    assert result["first_byte_ms"] is None
+    assert phases == {}
+
+@pytest.mark.parametrize(
+    "line", ["", "probe-error curl not found", "probe a.com 0 200", "probe a.com x 200 0 0 0"]
+)
+def test_parse_probe_line_ignores_other_lines(line: str) -> None:
+    """Anything but a complete probe line is skipped."""
+    assert parse_probe_line(line) is None
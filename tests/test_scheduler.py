@@ -0,0 +1,60 @@
+"""Tests for the fleet poll scheduler."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+from custom_components.nfqws.scheduler import NFQWSFleetScheduler
+
+class FakeCoordinator:
+    """Coordinator whose poll may plan an extra check, like a command does."""
+
+    name = "router"
+
+    def __init__(self, scheduler: NFQWSFleetScheduler, extra_check: float | None) -> None:
+        """Initialize the coordinator."""
+        self.entry = SimpleNamespace(entry_id="entry")
+        self.poll_interval = timedelta(seconds=300)
+        self.scheduler = scheduler
+        self.extra_check = extra_check
+
+    async def async_refresh(self) -> None:
+        """Poll; a command finishing meanwhile asks for a check soon."""
+        if self.extra_check is not None:
+            self.scheduler.async_schedule(self, self.extra_check)
+
+async def _deadline_after_poll(extra_check: float | None) -> float:
+    """Run one scheduled poll and return how far away the next one is."""
+    loop = asyncio.get_running_loop()
+    scheduler = NFQWSFleetScheduler(SimpleNamespace(loop=loop), jitter=0)
+    coordinator = FakeCoordinator(scheduler, extra_check)
+    scheduler._coordinators["entry"] = coordinator
+    await scheduler._async_poll(coordinator)
+    delay = scheduler._deadlines["entry"] - loop.time()
+    scheduler.async_shutdown()
+    return delay
+
+def test_poll_keeps_extra_check_planned_meanwhile() -> None:
+    """The regular reschedule does not push back a sooner check."""
+    assert asyncio.run(_deadline_after_poll(5)) <= 5
+
+def test_poll_replaces_later_timer() -> None:
+    """Without a sooner check the next poll is one interval away."""
+    assert 299 < asyncio.run(_deadline_after_poll(None)) <= 300
+    assert 299 < asyncio.run(_deadline_after_poll(1000)) <= 300
+
+def test_schedule_without_keep_earlier_replaces() -> None:
+    """A plain schedule may move a pending poll further away (push mode)."""
+    async def _run() -> float:
+        loop = asyncio.get_running_loop()
+        scheduler = NFQWSFleetScheduler(SimpleNamespace(loop=loop), jitter=0)
+        coordinator = FakeCoordinator(scheduler, None)
+        scheduler._coordinators["entry"] = coordinator
+        scheduler.async_schedule(coordinator, 5)
+        scheduler.async_schedule(coordinator)
+        delay = scheduler._deadlines["entry"] - loop.time()
+        scheduler.async_shutdown()
+        return delay
+
+    assert asyncio.run(_run()) > 299
@@ -0,0 +1,91 @@
+"""Tests for the framed batch execution, run against the local shell."""
+from __future__ import annotations
+
+import asyncio
+import subprocess
+
+import pytest
+
+from custom_components.nfqws.ssh_helper import SSHHelper, build_batch_script, parse_batch_output
+from custom_components.nfqws.transport import CommandResult, SSHTransport
+
+MARKER = "__nfqws_test__"
+
+class LocalTransport(SSHTransport):
+    """Transport that runs commands with the local sh instead of a router."""
+
+    def __init__(self) -> None:
+        """Initialize the transport."""
+        super().__init__("localhost", 22, "root", "secret")
+        self.commands: list[str] = []
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True: the local shell is always there."""
+        return True
+
+    async def async_connect(self) -> None:
+        """Connect."""
+
+    async def async_exec(self, command: str, timeout: int) -> CommandResult:
+        """Run the command with sh."""
+        self.commands.append(command)
+        done = subprocess.run(["sh", "-c", command], capture_output=True, text=True, check=False)
+        return CommandResult(done.stdout, done.stderr, done.returncode)
+
+    async def async_close(self) -> None:
+        """Close the transport."""
+
+def _run_batch(commands: dict[str, str]) -> dict[str, CommandResult]:
+    """Run a batch script locally and split its output."""
+    script = build_batch_script(commands, MARKER)
+    done = subprocess.run(["sh", "-c", script], capture_output=True, text=True, check=False)
+    return parse_batch_output(commands, MARKER, CommandResult(done.stdout, done.stderr, done.returncode))
+
+def test_batch_splits_output_per_command() -> None:
+    """Each command gets its own stdout, stderr and exit status."""
+    results = _run_batch(
+        {
+            "status": "echo running",
+            "info": "printf 'Package: nfqws2\\nVersion: 1.0'",
+            "failing": "echo oops >&2; exit 3",
+        }
+    )
+    assert results["status"] == CommandResult("running", "", 0)
+    assert results["info"] == CommandResult("Package: nfqws2\nVersion: 1.0", "", 0)
+    assert results["failing"] == CommandResult("", "oops", 3)
+
+def test_exit_does_not_stop_the_batch() -> None:
+    """A command that exits only ends its own subshell."""
+    results = _run_batch({"first": "exit 1", "second": "echo still here"})
+    assert results["first"].exit_status == 1
+    assert results["second"] == CommandResult("still here", "", 0)
+
+def test_cut_off_batch_marks_missing_commands() -> None:
+    """Commands whose frame never arrived have no exit status."""
+    commands = {"first": "echo one", "second": "echo two"}
+    script = build_batch_script(commands, MARKER)
+    stdout = subprocess.run(["sh", "-c", script], capture_output=True, text=True, check=True).stdout
+    # Соединение оборвалось посреди второй команды
+    cut = stdout[: stdout.index(f"{MARKER} begin second")]
+    results = parse_batch_output(commands, MARKER, CommandResult(cut, "Connection lost", None))
+    assert results["first"] == CommandResult("one", "", 0)
+    assert results["second"] == CommandResult("", "Connection lost", None)
+
+@pytest.mark.parametrize("name", ["with space", "semi;colon", "quote'", ""])
+def test_invalid_command_name(name: str) -> None:
+    """Names end up in the framing, so only word characters are allowed."""
+    with pytest.raises(ValueError):
+        build_batch_script({name: "true"}, MARKER)
+
+def test_helper_runs_batch_in_one_exec() -> None:
+    """SSHHelper sends the whole batch as a single remote command."""
+    async def _run() -> dict[str, CommandResult]:
+        helper = SSHHelper("router", 22, "root", "secret")
+        helper._transport = transport
+        return await helper.async_execute_batch({"a": "echo 1", "b": "echo 2; exit 4"})
+
+    transport = LocalTransport()
+    results = asyncio.run(_run())
+    assert len(transport.commands) == 1
+    assert results == {"a": CommandResult("1", "", 0), "b": CommandResult("2", "", 4)}
@@ -0,0 +1,107 @@
+"""Tests for the pooled SSH helper."""
+from __future__ import annotations
+
+import asyncio
+
+from custom_components.nfqws.ssh_helper import SSHConnectionPool
+
+from .common import FakeTransport
+
+def _pool_with_helper(lines: list[bytes] | None = None):
+    """Return a pool with zero idle timeout and one connected helper."""
+    pool = SSHConnectionPool(idle_timeout=0, max_workers=1)
+    helper = pool.acquire("router", 22, "root", "secret")
+    helper._transport = FakeTransport(lines)
+    return pool, helper
+
+def test_open_stream_survives_idle_eviction() -> None:
+    """A connection carrying a live stream is not closed as idle."""
+    async def _run() -> None:
+        pool, helper = _pool_with_helper([b"watch\n"])
+        stream = await helper.async_open_stream("watch")
+        assert not helper.is_idle
+        assert await pool.async_evict_idle() == 0
+        assert helper.is_connected
+        await stream.async_close()
+        assert helper.is_idle
+        assert await pool.async_evict_idle() == 1
+        await pool.async_close()
+
+    asyncio.run(_run())
+
+def test_stream_releases_connection_once_at_eof() -> None:
+    """Reading to the end frees the connection; a later close does not free it twice."""
+    async def _run() -> None:
+        pool, helper = _pool_with_helper([b"one\n"])
+        stream = await helper.async_open_stream("cat")
+        assert [line async for line in stream] == ["one"]
+        assert helper.is_idle
+        await stream.async_close()
+        assert helper._in_use == 0
+        await pool.async_close()
+
+    asyncio.run(_run())
+
+def test_failed_stream_does_not_hold_connection() -> None:
+    """A stream that could not be opened leaves the connection idle."""
+    async def _run() -> None:
+        pool, helper = _pool_with_helper()
+        helper._transport.closed = True
+        helper.breaker.allow = lambda: False
+        assert await helper.async_open_stream("watch") is None
+        assert helper.is_idle
+        await pool.async_close()
+
+    asyncio.run(_run())
+
+def test_write_file_waits_for_queued_command() -> None:
+    """Uploads run in the host queue after the operations queued before them."""
+    async def _run() -> None:
+        pool, helper = _pool_with_helper()
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async def _async_command() -> None:
+            order.append("command started")
+            await release.wait()
+            order.append("command done")
+
+        async def _async_write(path: str, data: bytes) -> None:
+            order.append("write")
+
+        helper._transport.async_write_file = _async_write
+        command = asyncio.ensure_future(helper.queue.async_run(None, _async_command))
+        await asyncio.sleep(0)
+        write = asyncio.ensure_future(helper.async_write_file("/tmp/x", b"x"))
+        await asyncio.sleep(0)
+        assert order == ["command started"]
+        release.set()
+        await command
+        assert await write
+        assert order == ["command started", "command done", "write"]
+        await pool.async_close()
+
+    asyncio.run(_run())
+
+def test_cancelled_probe_does_not_wedge_breaker() -> None:
+    """A half-open connect cancelled midway lets the next attempt probe again."""
+    async def _run() -> None:
+        pool, helper = _pool_with_helper()
+        helper._transport.closed = True
+        for _ in range(helper.breaker.failure_threshold):
+            helper.breaker.record_failure()
+        helper.breaker._next_probe = 0
+        hang = asyncio.Event()
+
+        async def _async_connect() -> None:
+            await hang.wait()
+
+        helper._transport.async_connect = _async_connect
+        probe = asyncio.ensure_future(helper.async_connect())
+        await asyncio.sleep(0)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        assert helper.breaker.allow()
+        await pool.async_close()
+
+    asyncio.run(_run())
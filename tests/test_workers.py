@@ -0,0 +1,78 @@
+"""Tests for the per-host operation queue and the control command coalescer."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.nfqws.coordinator import _COMMAND_MERGE
+from custom_components.nfqws.workers import CommandCoalescer
+
+async def _async_submit_while_busy(commands: list[str]) -> tuple[list[str], list[bool]]:
+    """Submit commands while the first one runs; return what ran and the results."""
+    ran: list[str] = []
+    release = asyncio.Event()
+
+    async def _async_run(command: str) -> bool:
+        ran.append(command)
+        await release.wait()
+        return True
+
+    coalescer = CommandCoalescer(_async_run, _COMMAND_MERGE)
+    first = asyncio.ensure_future(coalescer.async_submit("reload"))
+    await asyncio.sleep(0)
+    waiting = [asyncio.ensure_future(coalescer.async_submit(command)) for command in commands]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(first, *waiting)
+    return ran, results
+
+@pytest.mark.parametrize(("pending", "new"), list(_COMMAND_MERGE))
+def test_waiting_commands_are_merged(pending: str, new: str) -> None:
+    """Commands waiting behind a running one run once, as the merged command."""
+    ran, results = asyncio.run(_async_submit_while_busy([pending, new]))
+    assert ran == ["reload", _COMMAND_MERGE[(pending, new)]]
+    assert all(results)
+
+def test_unlisted_pair_keeps_latest_command() -> None:
+    """Without a merge rule the latest waiting command wins."""
+    ran, _ = asyncio.run(_async_submit_while_busy(["start", "stop"]))
+    assert ran == ["reload", "stop"]
+
+def test_merges_chain() -> None:
+    """A merged command can be merged again with the next one."""
+    ran, _ = asyncio.run(_async_submit_while_busy(["stop", "start", "reload"]))
+    assert ran == ["reload", "restart"]
+
+def test_running_command_is_not_merged_into() -> None:
+    """A command submitted while another runs waits for it and runs on its own."""
+    ran, _ = asyncio.run(_async_submit_while_busy(["start"]))
+    assert ran == ["reload", "start"]
+
+def test_cancelled_drain_task_releases_callers() -> None:
+    """Cancelling the drain task (entry unload) does not leave callers hanging."""
+    async def _run() -> None:
+        started = asyncio.Event()
+        tasks: list[asyncio.Task[None]] = []
+
+        async def _async_run(command: str) -> bool:
+            started.set()
+            await asyncio.Event().wait()
+            return True
+
+        def _create_task(coro):
+            tasks.append(asyncio.ensure_future(coro))
+            return tasks[-1]
+
+        coalescer = CommandCoalescer(_async_run, _COMMAND_MERGE, _create_task)
+        running = asyncio.ensure_future(coalescer.async_submit("stop"))
+        await started.wait()
+        waiting = asyncio.ensure_future(coalescer.async_submit("start"))
+        await asyncio.sleep(0)
+        tasks[0].cancel()
+        for caller in (running, waiting):
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+        assert coalescer.pending is None
+
+    asyncio.run(_run())